@@ -0,0 +1,139 @@
+import random
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.scenarios import BENCHMARK_SEED, RestingOrdersAgent
+from trade_simulator.order.order import Order
+from trade_simulator.order.order_book import OrderBook
+from trade_simulator.pool.pool import Pool
+from trade_simulator.utils.consts import AWAITING, CANCELED, SUCCEED
+
+# Orders per measured batch and number of batches; the best batch is kept.
+BATCH_SIZE = 10_000
+REPEATS = 5
+
+
+def make_pool() -> Pool:
+    return Pool(
+        id=1,
+        name="pool",
+        steps_to_check_orderbook=1,
+        step_to_start_simulation=0,
+        amm_settings={"type": "UniswapV2", "fee": 0.001},
+        tokens=[
+            {"name": "USDT", "start_quantity": 1_000_000_000},
+            {"name": "DAI", "start_quantity": 1_000_000_000},
+        ],
+    )
+
+
+def make_traders(number_of_traders: int) -> List[RestingOrdersAgent]:
+    traders = []
+    for i in range(number_of_traders):
+        trader = RestingOrdersAgent(
+            portfolio=[
+                {"name": "USDT", "quantity": 1e12},
+                {"name": "DAI", "quantity": 1e12},
+            ]
+        )
+        trader.id = i
+        traders.append(trader)
+    return traders
+
+
+def make_market_orders(
+    traders: List[RestingOrdersAgent], operation_type: str, number_of_orders: int
+) -> List[Order]:
+    rng = random.Random(BENCHMARK_SEED)
+    return [
+        Order(
+            trader=traders[i % len(traders)],
+            creation_timestamp=0,
+            operation_type=operation_type,
+            token="DAI",
+            token_volume=rng.choice([1, 2, 3]),
+            priority=rng.choice([1, 2]),
+            second_token="USDT",
+        )
+        for i in range(number_of_orders)
+    ]
+
+
+def best_of(setup: Callable, run: Callable) -> float:
+    """Best time in nanoseconds per order of ``run(setup())`` over the repeats."""
+    timings = []
+    for _ in range(REPEATS):
+        state = setup()
+        started_at = time.perf_counter_ns()
+        run(state)
+        timings.append((time.perf_counter_ns() - started_at) / BATCH_SIZE)
+    return min(timings)
+
+
+def bench_market(operation_type: str) -> float:
+    pool = make_pool()
+    traders = make_traders(100)
+    method = (
+        pool.amm_agent._buy_market
+        if operation_type == "BUY"
+        else pool.amm_agent._sell_market
+    )
+
+    def run(orders):
+        for order in orders:
+            method(order, 0)
+
+    return best_of(lambda: make_market_orders(traders, operation_type, BATCH_SIZE), run)
+
+
+def bench_order_book_ordering() -> float:
+    traders = make_traders(1_000)
+    orders = make_market_orders(traders, "BUY", BATCH_SIZE)
+    random.Random(BENCHMARK_SEED).shuffle(orders)
+
+    def run(order_book):
+        for order in orders:
+            order_book.add(order)
+        order_book.pop_market_orders()
+
+    return best_of(lambda: OrderBook(BENCHMARK_SEED), run)
+
+
+def bench_clean_order_book() -> float:
+    pool = make_pool()
+    traders = make_traders(100)
+    orders = make_market_orders(traders, "BUY", BATCH_SIZE)
+    rng = random.Random(BENCHMARK_SEED)
+    status_codes = [SUCCEED, CANCELED]
+
+    def setup():
+        pool.order_book = OrderBook(BENCHMARK_SEED)
+        for order in orders:
+            order.status_code = AWAITING
+            pool.order_book.add(order)
+        pool.order_book.pop_market_orders()
+        for order in orders:
+            order.status_code = rng.choice(status_codes)
+        return pool
+
+    def run(pool):
+        pool.order_book.settle(orders)
+        pool.amm_agent.clean_order_book()
+
+    return best_of(setup, run)
+
+
+MICRO_BENCHMARKS: Dict[str, Callable[[], float]] = {
+    "uniswap_buy_market": lambda: bench_market("BUY"),
+    "uniswap_sell_market": lambda: bench_market("SELL"),
+    "order_book_ordering": bench_order_book_ordering,
+    "clean_order_book": bench_clean_order_book,
+}
+
+
+def run_micro_benchmarks() -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, benchmark in MICRO_BENCHMARKS.items():
+        results[name] = {"ns_per_order": benchmark()}
+        print(f"{name}: {results[name]['ns_per_order']:.0f} ns/order")
+    return results
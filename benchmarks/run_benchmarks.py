@@ -0,0 +1,120 @@
+import argparse
+import json
+import platform
+import sys
+from typing import Any, Dict, List
+
+from benchmarks.micro import run_micro_benchmarks
+from benchmarks.scenarios import SUITES, run_scenarios
+
+DEFAULT_BASELINE_PATH = "benchmarks/baseline.json"
+DEFAULT_TOLERANCE = 0.25
+
+# Metric -> whether higher values are better.
+COMPARED_METRICS = {
+    "steps_per_second": True,
+    "orders_per_second": True,
+    "peak_rss_mib": False,
+    "ns_per_order": False,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the trade simulator against a stored baseline."
+    )
+    parser.add_argument("--suite", choices=list(SUITES), default="quick")
+    parser.add_argument(
+        "--only",
+        choices=["scenarios", "micro"],
+        default=None,
+        help="Run only the simulation scenarios or only the micro-benchmarks.",
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Relative slowdown or memory growth reported as a regression.",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the results in the baseline instead of comparing.",
+    )
+    parser.add_argument("--output", default=None, help="Write the results as JSON.")
+    return parser.parse_args()
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, Dict[str, float]]],
+    baseline: Dict[str, Dict[str, Dict[str, float]]],
+    tolerance: float,
+) -> List[str]:
+    """Regressions of ``results`` against ``baseline`` as printable lines.
+
+    Benchmarks or metrics missing from the baseline are not compared.
+    """
+    regressions = []
+    for group, benchmarks in results.items():
+        for name, metrics in benchmarks.items():
+            expected = baseline.get(group, {}).get(name, {})
+            for metric, higher_is_better in COMPARED_METRICS.items():
+                if metric not in metrics or metric not in expected:
+                    continue
+                ratio = metrics[metric] / expected[metric]
+                if (higher_is_better and ratio < 1 - tolerance) or (
+                    not higher_is_better and ratio > 1 + tolerance
+                ):
+                    regressions.append(
+                        f"{group}/{name} {metric}: {metrics[metric]:.4g} "
+                        f"vs {expected[metric]:.4g} in the baseline ({ratio:.2f}x)"
+                    )
+    return regressions
+
+
+def get_machine_info() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = {}
+    if args.only in (None, "scenarios"):
+        results["scenarios"] = run_scenarios(SUITES[args.suite])
+    if args.only in (None, "micro"):
+        results["micro"] = run_micro_benchmarks()
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            baseline = {}
+        # Benchmarks not run this time keep their stored values.
+        for group, benchmarks in results.items():
+            baseline.setdefault(group, {}).update(benchmarks)
+        baseline["machine"] = get_machine_info()
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline was written to {args.baseline}.")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("Regressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("No regressions against the baseline.")
@@ -0,0 +1,209 @@
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+
+from trade_simulator.agents.basic_agent import BasicAgent
+from trade_simulator.order.order import Order
+from trade_simulator.simulation.simulation import Simulation
+
+# Scenarios scale one dimension at a time: agents, pools, steps, tokens per
+# pool and the number of resting limit orders per pool. Steps are chosen so a scenario
+# takes seconds, not minutes, on a single core.
+QUICK_SCENARIOS = [
+    {"name": "agents_1e2", "agents": 100, "pools": 1, "steps": 2_000},
+    {"name": "agents_1e3", "agents": 1_000, "pools": 1, "steps": 500},
+    {"name": "agents_1e4", "agents": 10_000, "pools": 1, "steps": 100},
+    {"name": "pools_1e2", "agents": 1_000, "pools": 100, "steps": 200},
+    {"name": "steps_1e4", "agents": 100, "pools": 1, "steps": 10_000},
+    {
+        "name": "limit_depth_1e3",
+        "agents": 100,
+        "pools": 1,
+        "steps": 1_000,
+        "limit_orders": 1_000,
+    },
+    {"name": "tokens_24", "agents": 1_000, "pools": 10, "steps": 200, "tokens": 24},
+]
+
+FULL_SCENARIOS = QUICK_SCENARIOS + [
+    {"name": "agents_1e5", "agents": 100_000, "pools": 1, "steps": 50},
+    {"name": "pools_1e1", "agents": 1_000, "pools": 10, "steps": 500},
+    {"name": "pools_1e3", "agents": 10_000, "pools": 1_000, "steps": 50},
+    {"name": "steps_1e5", "agents": 100, "pools": 1, "steps": 100_000},
+    {
+        "name": "limit_depth_1e4",
+        "agents": 100,
+        "pools": 1,
+        "steps": 500,
+        "limit_orders": 10_000,
+    },
+    {"name": "tokens_48", "agents": 1_000, "pools": 10, "steps": 200, "tokens": 48},
+]
+
+SUITES = {
+    "quick": QUICK_SCENARIOS,
+    "full": FULL_SCENARIOS,
+}
+
+BENCHMARK_SEED = 0
+
+
+def make_settings(
+    agents: int, pools: int, steps: int, tokens: int = 2
+) -> Dict[str, Any]:
+    """Config of ``pools`` pools with random traders spread evenly, UniswapV2
+    pools for two tokens and Mariana pools for more."""
+    token_names = ["USDT", "DAI"] + [f"TOKEN_{i}" for i in range(2, tokens)]
+    portfolio = [{"name": token, "quantity": 10_000} for token in token_names]
+    pools_settings = []
+    batches = []
+    for pool_id in range(1, pools + 1):
+        pools_settings.append(
+            {
+                "id": pool_id,
+                "name": f"pool {pool_id}",
+                "steps_to_check_orderbook": 1,
+                "step_to_start_simulation": 0,
+                "amm_settings": {
+                    "type": "UniswapV2" if tokens == 2 else "Mariana",
+                    "fee": 0.001,
+                },
+                "tokens": [
+                    {"name": token, "start_quantity": 1_000_000}
+                    for token in token_names
+                ],
+            }
+        )
+        number_of_agents = agents // pools + (pool_id <= agents % pools)
+        if number_of_agents == 0:
+            continue
+        batches.append(
+            {
+                "number_of_agents": number_of_agents,
+                "agent_type": "SinglePoolFoolishRandomTrader",
+                "agent_settings": {
+                    "token_as_currency": "USDT",
+                    "pool_id": pool_id,
+                    "steps_to_make_new_transaction": 2,
+                    "probability_to_make_order": 0.5,
+                    "portfolio": portfolio,
+                },
+            }
+        )
+    return {
+        "meta_info": {"experiment_id": 1, "experiment_name": "benchmark"},
+        "simulation": {
+            "steps_of_simulation": steps,
+            "pools_settings": {"pools": pools_settings},
+            "agents_settings": {"agents_batches": batches},
+        },
+    }
+
+
+class RestingOrdersAgent(BasicAgent):
+    """Owner of limit orders priced so they never fill, giving every pool
+    an order book of a fixed depth."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.type = "RestingOrdersAgent"
+        self.id = -1
+
+    def run_agent_action(self, timestamp: int):
+        pass
+
+
+def add_resting_limit_orders(simulation: Simulation, number_of_orders: int):
+    agent = RestingOrdersAgent(
+        portfolio=[
+            {"name": "USDT", "quantity": 1e12},
+            {"name": "DAI", "quantity": 1e12},
+        ]
+    )
+    for pool in simulation.pools.values():
+        for i in range(number_of_orders):
+            operation_type = "BUY" if i % 2 == 0 else "SELL"
+            pool.add_order(
+                Order(
+                    trader=agent,
+                    creation_timestamp=0,
+                    operation_type=operation_type,
+                    token="DAI",
+                    token_volume=1,
+                    order_type="Limit",
+                    limit_price=1e-6 if operation_type == "BUY" else 1e6,
+                    second_token="USDT",
+                )
+            )
+
+
+def get_peak_rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if os.uname().sysname == "Darwin":
+        peak_rss /= 1024
+    return peak_rss / 1024
+
+
+def run_scenario(scenario: Dict[str, Any]) -> Dict[str, float]:
+    """Run one scenario and measure its loop, meant for a fresh process so
+    that peak RSS belongs to this scenario only."""
+    random.seed(BENCHMARK_SEED)
+    np.random.seed(BENCHMARK_SEED)
+    settings = make_settings(
+        scenario["agents"],
+        scenario["pools"],
+        scenario["steps"],
+        scenario.get("tokens", 2),
+    )
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        try:
+            simulation = Simulation(plots="none", progress=False, **settings)
+            add_resting_limit_orders(simulation, scenario.get("limit_orders", 0))
+            resting_orders = sum(
+                pool.total_number_of_unique_orders for pool in simulation.pools.values()
+            )
+            # Saving metrics is not part of the loop, so it is skipped.
+            simulation.save_metrics_after_simulation = lambda: None
+            started_at = time.perf_counter()
+            simulation.run()
+            elapsed = time.perf_counter() - started_at
+        finally:
+            os.chdir(cwd)
+    orders = (
+        sum(pool.total_number_of_unique_orders for pool in simulation.pools.values())
+        - resting_orders
+    )
+    return {
+        "seconds": elapsed,
+        "steps_per_second": scenario["steps"] / elapsed,
+        "orders_per_second": orders / elapsed,
+        "peak_rss_mib": get_peak_rss_mib(),
+    }
+
+
+def run_scenarios(scenarios: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for scenario in scenarios:
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            results[scenario["name"]] = executor.submit(run_scenario, scenario).result()
+        print(f"{scenario['name']}: {format_result(results[scenario['name']])}")
+    return results
+
+
+def format_result(result: Dict[str, float]) -> str:
+    return (
+        f"{result['steps_per_second']:.1f} steps/s, "
+        f"{result['orders_per_second']:.0f} orders/s, "
+        f"{result['peak_rss_mib']:.0f} MiB peak RSS"
+    )
@@ -0,0 +1,7 @@
+#!/bin/bash
+
+# Перейти в корень проекта
+cd "$(dirname "$0")/.."
+
+export PYTHONPATH=src
+poetry run python -m benchmarks.run_benchmarks "$@"
@@ -1,4 +1,8 @@
+import random
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Set
+
+from trade_simulator.utils.portfolio_history import PortfolioHistory
 
 
 class BasicAgent(ABC):
@@ -7,17 +11,41 @@ class BasicAgent(ABC):
         self.id = None
         self.type = None
         self.pools = {}
-        self.metrics = {
-            "portfolio": {},
+        # Every agent draws from its own generator, so its decisions do not
+        # depend on the order agents act in or on the process it runs in.
+        self.rng = random.Random(random.getrandbits(64))
+        # Steps the portfolio metrics hold, see `pad_metrics`.
+        self.recorded_steps = 0
+        # Metrics besides the portfolio, which is kept in `portfolio_history`.
+        self.agent_metrics = {
             "sell_orders": [],
             "buy_orders": [],
         }
         self.parse_portfolio(kwargs["portfolio"])
 
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "portfolio": self.portfolio_history.dense(self.recorded_steps + 1),
+            **self.agent_metrics,
+            "id": self.id,
+            "type": self.type,
+        }
+
     @abstractmethod
     def run_agent_action(self, timestamp: int):
         pass
 
+    def update_settings(self, **kwargs):
+        """Apply new settings to an agent restored from a checkpoint."""
+        pass
+
+    def get_traded_tokens_by_pool(self) -> Dict[int, Set[str]]:
+        """Tokens of its portfolio the agent may trade in each of its pools."""
+        return {
+            pool_id: set(pool.tokens_info.keys()) for pool_id, pool in self.pools.items()
+        }
+
     def complete_agent_action(self, timestamp: int):
         self.run_agent_action(timestamp)
         self.update_metrics()
@@ -26,8 +54,29 @@ class BasicAgent(ABC):
         self.portfolio = {}
         for el in input_portfolio:
             self.portfolio[el["name"]] = el["quantity"]
-            self.metrics["portfolio"][el["name"]] = [el["quantity"]]
+        self.portfolio_history = PortfolioHistory(self.portfolio)
+
+    def get_next_action_step(self, timestamp: int) -> int:
+        """First step after ``timestamp`` the agent may do something at."""
+        return timestamp + 1
 
     def update_metrics(self):
-        for token in self.portfolio.keys():
-            self.metrics["portfolio"][token].append(self.portfolio[token])
+        self.recorded_steps += 1
+        self.portfolio_history.record(self.recorded_steps, self.portfolio)
+
+    def pad_metrics(self, timestamp: int):
+        """Record the current portfolio for the steps before ``timestamp``
+        the agent was not run at."""
+        # Unchanged balances are implicit in the change-only history.
+        self.recorded_steps = max(self.recorded_steps, timestamp)
+
+    def drain_metrics(self):
+        """Hand out the per-step metric lists collected so far and reset them."""
+        drained = {}
+        portfolio = self.portfolio_history.drain(self.recorded_steps + 1)
+        for token, balances in portfolio.items():
+            drained[("portfolio", token)] = balances
+        for key in ("sell_orders", "buy_orders"):
+            drained[(key,)] = self.agent_metrics[key]
+            self.agent_metrics[key] = []
+        return drained
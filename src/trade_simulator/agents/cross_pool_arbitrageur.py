@@ -0,0 +1,200 @@
+import heapq
+import math
+from typing import Dict, Optional, Set, Tuple
+
+from trade_simulator.agents.basic_agent import BasicAgent
+from trade_simulator.order.order import Order
+from trade_simulator.pool.pair_index import Pair, TokenPairIndex
+
+
+def get_optimal_cycle_volume(
+    reserve_in_1: float,
+    reserve_out_1: float,
+    fee_multiplier_1: float,
+    reserve_in_2: float,
+    reserve_out_2: float,
+    fee_multiplier_2: float,
+) -> float:
+    """Amount of a token to sell in pool 1 for the other token, which is then
+    sold back in pool 2, that maximizes the amount got back minus the amount
+    sold. Both pools are constant product pools taking the fee from the
+    amount sold; the result is not positive when the cycle does not pay.
+
+    Two such swaps in a row are one constant product swap with the virtual
+    reserves below, whose optimal input has a closed form.
+    """
+    denominator = reserve_in_2 + fee_multiplier_2 * reserve_out_1
+    virtual_in = reserve_in_1 * reserve_in_2 / denominator
+    virtual_out = fee_multiplier_2 * reserve_out_1 * reserve_out_2 / denominator
+    return (
+        math.sqrt(fee_multiplier_1 * virtual_in * virtual_out) - virtual_in
+    ) / fee_multiplier_1
+
+
+def get_swap_output(
+    reserve_in: float, reserve_out: float, fee_multiplier: float, amount_in: float
+) -> float:
+    amount_in_with_fee = amount_in * fee_multiplier
+    return reserve_out * amount_in_with_fee / (reserve_in + amount_in_with_fee)
+
+
+class CrossPoolArbitrageur(BasicAgent):
+    """Sells a token for another in the pool paying the most for it and sells
+    the proceeds back in the pool paying the most in return.
+
+    Both legs are paid from the portfolio at once, so they do not depend on
+    the order pools execute them in. Only pairs with a reserve changed in
+    one of their pools since the last check are evaluated again.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.type = "CrossPoolArbitrageur"
+        self.pool_ids = kwargs.get("pool_ids")
+        self.min_profit = kwargs.get("min_profit", 0.0)
+        self.steps_to_check_pools = kwargs.get("steps_to_check_pools", 1)
+        if self.steps_to_check_pools < 1:
+            raise ValueError(
+                f"Parameter 'steps_to_check_pools' has to be more or equal to 1, got {self.steps_to_check_pools}."
+            )
+        self.pair_index: Optional[TokenPairIndex] = None
+        # Pairs that still have to be evaluated, see `run_agent_action`.
+        self.pairs_to_check: Set[Pair] = set()
+
+    def update_settings(self, **kwargs):
+        if kwargs.get("pool_ids") != self.pool_ids:
+            raise ValueError("Arbitrageur pools can not change.")
+        self.min_profit = kwargs.get("min_profit", 0.0)
+        self.steps_to_check_pools = kwargs.get("steps_to_check_pools", 1)
+
+    def build_pair_index(self):
+        self.pair_index = TokenPairIndex(self.pools, self.portfolio.keys())
+
+    def get_traded_tokens_by_pool(self) -> Dict[int, Set[str]]:
+        return self.pair_index.get_tokens_by_pool()
+
+    def get_next_action_step(self, timestamp: int) -> int:
+        return timestamp + self.steps_to_check_pools
+
+    def find_cycle(self, pair: Pair) -> Optional[Tuple[float, int, int]]:
+        """(product of marginal rates, pool to sell the first token of
+        ``pair`` in, pool to sell the second one in) of the best cycle."""
+        token_a, token_b = pair
+        rates = []
+        for pool_id in self.pair_index.pool_ids_by_pair[pair]:
+            pool = self.pools[pool_id]
+            reserve_a = pool.tokens_info[token_a]
+            reserve_b = pool.tokens_info[token_b]
+            if reserve_a <= 0 or reserve_b <= 0:
+                continue
+            fee_multiplier = 1 - pool.amm_agent.fee
+            rates.append(
+                (
+                    fee_multiplier * reserve_b / reserve_a,
+                    fee_multiplier * reserve_a / reserve_b,
+                    pool_id,
+                )
+            )
+        # The best cycle sells in the pools with the best rates, one of the
+        # two best for each leg as both legs can not use the same pool.
+        best = None
+        for rate_a_b, _, pool_id_a in heapq.nlargest(2, rates, key=lambda r: r[0]):
+            for _, rate_b_a, pool_id_b in heapq.nlargest(2, rates, key=lambda r: r[1]):
+                if pool_id_a == pool_id_b:
+                    continue
+                if best is None or rate_a_b * rate_b_a > best[0]:
+                    best = (rate_a_b * rate_b_a, pool_id_a, pool_id_b)
+        if best is None or best[0] <= 1:
+            return None
+        return best
+
+    def run_agent_action(self, timestamp: int):
+        self.pairs_to_check |= self.pair_index.pop_changed_pairs(self.pools)
+        # Orders are executed at the next step, so the balances and pools
+        # used by this step's orders are not used again until then.
+        available = dict(self.portfolio)
+        used_pool_ids = set()
+        for pair in sorted(self.pairs_to_check):
+            cycle = self.find_cycle(pair)
+            if cycle is None:
+                self.pairs_to_check.discard(pair)
+                continue
+            _, pool_id_a, pool_id_b = cycle
+            if pool_id_a in used_pool_ids or pool_id_b in used_pool_ids:
+                continue
+            self.pairs_to_check.discard(pair)
+            if self.make_cycle_orders(pair, pool_id_a, pool_id_b, available, timestamp):
+                used_pool_ids.update((pool_id_a, pool_id_b))
+
+    def make_cycle_orders(
+        self,
+        pair: Pair,
+        pool_id_a: int,
+        pool_id_b: int,
+        available: Dict[str, float],
+        timestamp: int,
+    ) -> bool:
+        token_a, token_b = pair
+        pool_a, pool_b = self.pools[pool_id_a], self.pools[pool_id_b]
+        reserve_a_1 = pool_a.tokens_info[token_a]
+        reserve_b_1 = pool_a.tokens_info[token_b]
+        fee_multiplier_1 = 1 - pool_a.amm_agent.fee
+        reserve_b_2 = pool_b.tokens_info[token_b]
+        reserve_a_2 = pool_b.tokens_info[token_a]
+        fee_multiplier_2 = 1 - pool_b.amm_agent.fee
+
+        volume_a = get_optimal_cycle_volume(
+            reserve_a_1,
+            reserve_b_1,
+            fee_multiplier_1,
+            reserve_b_2,
+            reserve_a_2,
+            fee_multiplier_2,
+        )
+        # The profit only grows up to the optimal volume, so a smaller one
+        # the portfolio can pay for is still profitable.
+        volume_a = min(volume_a, available[token_a])
+        available_b = available[token_b]
+        if (
+            get_swap_output(reserve_a_1, reserve_b_1, fee_multiplier_1, volume_a)
+            > available_b
+        ):
+            volume_a = reserve_a_1 * available_b / (
+                fee_multiplier_1 * (reserve_b_1 - available_b)
+            )
+        if volume_a <= 0:
+            return False
+        volume_b = get_swap_output(reserve_a_1, reserve_b_1, fee_multiplier_1, volume_a)
+        volume_b = min(volume_b, available_b)
+        returned_a = get_swap_output(
+            reserve_b_2, reserve_a_2, fee_multiplier_2, volume_b
+        )
+        if returned_a - volume_a <= self.min_profit:
+            return False
+
+        pool_a.add_order(
+            Order(
+                trader=self,
+                creation_timestamp=timestamp,
+                operation_type="SELL",
+                token=token_a,
+                token_volume=volume_a,
+                priority=1,
+                second_token=token_b,
+            )
+        )
+        pool_b.add_order(
+            Order(
+                trader=self,
+                creation_timestamp=timestamp,
+                operation_type="SELL",
+                token=token_b,
+                token_volume=volume_b,
+                priority=1,
+                second_token=token_a,
+            )
+        )
+        available[token_a] -= volume_a
+        available[token_b] -= volume_b
+        self.agent_metrics["sell_orders"].extend((timestamp, timestamp))
+        return True
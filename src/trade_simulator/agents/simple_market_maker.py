@@ -1,4 +1,4 @@
-import random
+from typing import Dict, Set
 
 from trade_simulator.agents.basic_agent import BasicAgent
 from trade_simulator.order.order import Order
@@ -13,6 +13,26 @@ class SimpleMarketMaker(BasicAgent):
         for rule in self.rules:
             rule["steps_without_action"] = 0
 
+    def update_settings(self, **kwargs):
+        if len(kwargs["rules"]) != len(self.rules):
+            raise ValueError(
+                f"Expected {len(self.rules)} market maker rules, got {len(kwargs['rules'])}."
+            )
+        for rule, new_rule in zip(self.rules, kwargs["rules"]):
+            if new_rule["pool_id"] != rule["pool_id"]:
+                raise ValueError("Market maker rules can not change their pool.")
+            steps_without_action = rule["steps_without_action"]
+            rule.update(new_rule)
+            rule["steps_without_action"] = steps_without_action
+
+    def get_traded_tokens_by_pool(self) -> Dict[int, Set[str]]:
+        tokens_by_pool = {}
+        for rule in self.rules:
+            tokens_by_pool.setdefault(rule["pool_id"], set()).update(
+                (rule["token_as_asset"], rule["token_as_currency"])
+            )
+        return tokens_by_pool
+
     def is_make_action(self, pool, rule, timestamp: int):
         if (
             rule["steps_without_action"]
@@ -58,24 +78,24 @@ class SimpleMarketMaker(BasicAgent):
                 creation_timestamp=timestamp,
                 operation_type="BUY",
                 token=token_as_asset,
-                token_volume=random.choice(list(range(1, 10))),
+                token_volume=self.rng.choice(list(range(1, 10))),
                 priority=1,  # lowest priority
                 second_token=token_as_currency,
             )
             pool.add_order(order)
-            self.metrics["buy_orders"].append(timestamp)
+            self.agent_metrics["buy_orders"].append(timestamp)
         elif current_asset_price_in_currency > upper_bound_of_asset_price_in_currency:
             order = Order(
                 trader=self,
                 creation_timestamp=timestamp,
                 operation_type="SELL",
                 token=token_as_asset,
-                token_volume=random.choice(list(range(1, 100))),
+                token_volume=self.rng.choice(list(range(1, 100))),
                 priority=1,  # lowest priority
                 second_token=token_as_currency,
             )
             pool.add_order(order)
-            self.metrics["sell_orders"].append(timestamp)
+            self.agent_metrics["sell_orders"].append(timestamp)
         rule["steps_without_action"] = 0
 
     def run_agent_action(self, timestamp: int):
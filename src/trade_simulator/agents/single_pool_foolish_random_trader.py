@@ -1,5 +1,3 @@
-import random
-
 from trade_simulator.agents.basic_agent import BasicAgent
 from trade_simulator.order.order import Order
 
@@ -16,30 +14,40 @@ class SinglePoolFoolishRandomTrader(BasicAgent):
         self.pool_id = [kwargs["pool_id"]]
         self.probability_to_make_order = kwargs["probability_to_make_order"]
         self.pool = None
-        self.metrics["pool_id"] = self.pool_id
+        self.agent_metrics["pool_id"] = self.pool_id
+
+    def update_settings(self, **kwargs):
+        self.steps_to_make_new_transaction = kwargs["steps_to_make_new_transaction"]
+        self.probability_to_make_order = kwargs["probability_to_make_order"]
+
+    def get_next_action_step(self, timestamp: int) -> int:
+        return max(
+            timestamp + 1,
+            self.last_action_timestamp + self.steps_to_make_new_transaction,
+        )
 
     def run_agent_action(self, timestamp: int):
         if timestamp - self.last_action_timestamp >= self.steps_to_make_new_transaction:
             self.make_order(timestamp)
 
     def make_order_decision(self) -> bool:
-        return random.random() < self.probability_to_make_order
+        return self.rng.random() < self.probability_to_make_order
 
     def get_token(self) -> str:
-        return random.choice(list(self.portfolio.keys()))
+        return self.rng.choice(list(self.portfolio.keys()))
 
     def get_other_token(self, current_token: str):
         tokens = list(self.portfolio.keys())
         tokens.remove(current_token)
-        return random.choice(tokens)
+        return self.rng.choice(tokens)
 
     def get_order_volume(self, token: str, operation_type: str) -> int:
-        return random.choice([1, 2, 3])
+        return self.rng.choice([1, 2, 3])
 
     def make_order(self, timestamp: int):
         if not self.make_order_decision():
             return
-        operation_type = random.choice(["BUY", "SELL"])
+        operation_type = self.rng.choice(["BUY", "SELL"])
         token = self.get_token()
         token_volume = self.get_order_volume(token, operation_type)
         order = Order(
@@ -51,6 +59,6 @@ class SinglePoolFoolishRandomTrader(BasicAgent):
             priority=1,
             second_token=self.get_other_token(token)
         )
-        self.metrics[f"{operation_type.lower()}_orders"].append(timestamp)
+        self.agent_metrics[f"{operation_type.lower()}_orders"].append(timestamp)
         self.last_action_timestamp = timestamp
         self.pool.add_order(order)
@@ -0,0 +1,284 @@
+import random
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+import numpy as np
+
+from trade_simulator.order.order import Order
+from trade_simulator.utils.portfolio_history import PortfolioMatrixHistory
+
+if TYPE_CHECKING:
+    from trade_simulator.pool.pool import Pool
+
+
+OPERATION_TYPES = ("BUY", "SELL")
+MIN_ORDER_VOLUME = 1
+MAX_ORDER_VOLUME = 3
+# `float_since` of balances that never became floats.
+NEVER = np.iinfo(np.int64).max
+
+
+class PortfolioView(MutableMapping):
+    """Dict-like view on one row of the population portfolio matrix.
+
+    AMMs update traders through ``order.trader.portfolio[token] -= dx``,
+    so the view reads and writes the shared array in place. Balances that
+    are still ints in an agent's portfolio dict are read as ints, so they
+    turn into floats at the same trade as they would there.
+    """
+
+    __slots__ = (
+        "_portfolios",
+        "_row",
+        "_balances",
+        "_token_index",
+        "_int_balances",
+        "_new_float_balances",
+    )
+
+    def __init__(
+        self,
+        portfolios: np.ndarray,
+        row: int,
+        token_index: Dict[str, int],
+        int_balances: List[bool],
+        new_float_balances: List[Tuple[int, int]],
+    ):
+        self._portfolios = portfolios
+        self._row = row
+        # A view of the row, indexed faster than the whole matrix.
+        self._balances = portfolios[row]
+        self._token_index = token_index
+        self._int_balances = int_balances
+        self._new_float_balances = new_float_balances
+
+    def __getstate__(self):
+        # The row view would be pickled as a copy, it is taken again instead.
+        return (
+            self._portfolios,
+            self._row,
+            self._token_index,
+            self._int_balances,
+            self._new_float_balances,
+        )
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __getitem__(self, token: str) -> float:
+        column = self._token_index[token]
+        value = self._balances[column]
+        return int(value) if self._int_balances[column] else value
+
+    def __setitem__(self, token: str, value: float):
+        column = self._token_index[token]
+        self._balances[column] = value
+        if self._int_balances[column] and type(value) is not int:
+            self._int_balances[column] = False
+            self._new_float_balances.append((self._row, column))
+
+    def __delitem__(self, token: str):
+        raise TypeError("Tokens can not be removed from a population portfolio.")
+
+    def __iter__(self):
+        return iter(self._token_index)
+
+    def __len__(self) -> int:
+        return len(self._token_index)
+
+
+class SinglePoolFoolishRandomTraderView:
+    """Agent-like handle on one member of a population.
+
+    Exposes the attributes the rest of the simulator expects from an agent
+    (``id``, ``type``, ``portfolio``, ``metrics``, ``pool``) while the state
+    itself lives in the population arrays.
+    """
+
+    def __init__(self, population: "SinglePoolFoolishRandomTraderPopulation", row: int):
+        self.population = population
+        self.row = row
+        self.id = None
+        self.type = population.type
+        self.pool = population.pool
+        self.pools = population.pools
+        self.portfolio = PortfolioView(
+            population.portfolios,
+            row,
+            population.token_index,
+            population.int_balances[row],
+            population.new_float_balances,
+        )
+        self.sell_orders: List[int] = []
+        self.buy_orders: List[int] = []
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return self.population.get_member_metrics(self.row)
+
+    def update_settings(self, **kwargs):
+        population = self.population
+        population.steps_to_make_new_transaction[self.row] = kwargs[
+            "steps_to_make_new_transaction"
+        ]
+        population.probability_to_make_order[self.row] = kwargs[
+            "probability_to_make_order"
+        ]
+
+
+class SinglePoolFoolishRandomTraderPopulation:
+    """Batch of ``SinglePoolFoolishRandomTrader`` agents stored as arrays.
+
+    All members share one pool and one set of tokens, so decisions, tokens
+    and volumes for every due member are drawn in a single vectorized call
+    per step and the resulting orders are handed to the pool in bulk.
+    """
+
+    def __init__(self, number_of_agents: int, pool: "Pool", **kwargs):
+        self.type = "SinglePoolFoolishRandomTrader"
+        self.number_of_agents = number_of_agents
+        self.pool = pool
+        self.pools = {kwargs["pool_id"]: pool}
+        self.rng = np.random.default_rng(random.getrandbits(64))
+
+        self.tokens = [el["name"] for el in kwargs["portfolio"]]
+        self.token_index = {token: i for i, token in enumerate(self.tokens)}
+        quantities = [el["quantity"] for el in kwargs["portfolio"]]
+        start_portfolio = np.array(quantities, dtype=np.float64)
+        self.portfolios = np.tile(start_portfolio, (number_of_agents, 1))
+        # Balances are kept as floats, but exported as ints up to the
+        # position they first became floats, as an agent's portfolio would.
+        int_start = [type(quantity) is int for quantity in quantities]
+        self.int_balances = [list(int_start) for _ in range(number_of_agents)]
+        self.float_since = np.tile(
+            np.where(int_start, NEVER, 0).astype(np.int64), (number_of_agents, 1)
+        )
+        # (row, column) of balances that became floats since the last record.
+        self.new_float_balances: List[Tuple[int, int]] = []
+        self.last_action_timestamp = np.zeros(number_of_agents, dtype=np.int64)
+        self.steps_to_make_new_transaction = np.full(
+            number_of_agents, kwargs["steps_to_make_new_transaction"], dtype=np.int64
+        )
+        self.probability_to_make_order = np.full(
+            number_of_agents, kwargs["probability_to_make_order"], dtype=np.float64
+        )
+        self.pool_id = np.full(number_of_agents, kwargs["pool_id"], dtype=np.int64)
+
+        self.portfolio_history = PortfolioMatrixHistory(self.portfolios)
+        self.recorded_steps = 0
+        self.members = [
+            SinglePoolFoolishRandomTraderView(self, row)
+            for row in range(number_of_agents)
+        ]
+
+    def complete_agent_action(self, timestamp: int):
+        self.run_agent_action(timestamp)
+        self.update_metrics()
+
+    def run_agent_action(self, timestamp: int):
+        due = np.flatnonzero(
+            timestamp - self.last_action_timestamp
+            >= self.steps_to_make_new_transaction
+        )
+        if len(due) == 0:
+            return
+        decisions = self.rng.random(len(due)) < self.probability_to_make_order[due]
+        acting = due[decisions]
+        number_of_orders = len(acting)
+        if number_of_orders == 0:
+            return
+
+        number_of_tokens = len(self.tokens)
+        operation_types = self.rng.integers(0, 2, number_of_orders)
+        tokens = self.rng.integers(0, number_of_tokens, number_of_orders)
+        # Shift by a non-zero offset so the second token is uniform over the rest.
+        second_tokens = (
+            tokens + self.rng.integers(1, number_of_tokens, number_of_orders)
+        ) % number_of_tokens
+        volumes = self.rng.integers(
+            MIN_ORDER_VOLUME, MAX_ORDER_VOLUME + 1, number_of_orders
+        )
+
+        orders = []
+        for row, operation_type, token, second_token, volume in zip(
+            acting.tolist(),
+            operation_types.tolist(),
+            tokens.tolist(),
+            second_tokens.tolist(),
+            volumes.tolist(),
+        ):
+            member = self.members[row]
+            operation_type = OPERATION_TYPES[operation_type]
+            orders.append(
+                Order(
+                    trader=member,
+                    creation_timestamp=timestamp,
+                    operation_type=operation_type,
+                    token=self.tokens[token],
+                    token_volume=volume,
+                    priority=1,
+                    second_token=self.tokens[second_token],
+                )
+            )
+            if operation_type == "BUY":
+                member.buy_orders.append(timestamp)
+            else:
+                member.sell_orders.append(timestamp)
+        self.last_action_timestamp[acting] = timestamp
+        self.pool.add_orders(orders)
+
+    def get_next_action_step(self, timestamp: int) -> int:
+        return max(
+            timestamp + 1,
+            int(
+                np.min(
+                    self.last_action_timestamp + self.steps_to_make_new_transaction
+                )
+            ),
+        )
+
+    def update_metrics(self):
+        self.recorded_steps += 1
+        for row, column in self.new_float_balances:
+            self.float_since[row, column] = self.recorded_steps
+        self.new_float_balances.clear()
+        self.portfolio_history.record(self.recorded_steps, self.portfolios)
+
+    def pad_metrics(self, timestamp: int):
+        self.recorded_steps = max(self.recorded_steps, timestamp)
+
+    def drain_metrics(self):
+        """Hand out the collected metrics of all members and reset them.
+
+        The portfolio history comes as one (steps, members, tokens) array and
+        order timestamps as parallel (member row, timestamp) arrays.
+        """
+        drained = {
+            ("portfolio",): self.portfolio_history.drain(self.recorded_steps + 1)
+        }
+        for key in ("sell_orders", "buy_orders"):
+            rows, timestamps = [], []
+            for member in self.members:
+                orders = getattr(member, key)
+                rows.extend([member.row] * len(orders))
+                timestamps.extend(orders)
+                orders.clear()
+            drained[(key, "row")] = np.array(rows, dtype=np.int64)
+            drained[(key, "timestamp")] = np.array(timestamps, dtype=np.int64)
+        return drained
+
+    def get_member_metrics(self, row: int) -> Dict[str, Any]:
+        member = self.members[row]
+        history = self.portfolio_history.dense_row(row, self.recorded_steps + 1)
+        start = self.portfolio_history.start
+        for balances, float_since in zip(history, self.float_since[row].tolist()):
+            ints = min(max(float_since - start, 0), len(balances))
+            balances[:ints] = [int(balance) for balance in balances[:ints]]
+        return {
+            "portfolio": dict(zip(self.tokens, history)),
+            "sell_orders": member.sell_orders,
+            "buy_orders": member.buy_orders,
+            "pool_id": [int(self.pool_id[row])],
+            "id": member.id,
+            "type": self.type,
+        }
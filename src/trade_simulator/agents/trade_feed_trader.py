@@ -0,0 +1,66 @@
+import sys
+
+from trade_simulator.agents.basic_agent import BasicAgent
+from trade_simulator.order.order import Order
+from trade_simulator.utils.consts import ORDER_OPERATION_TYPES
+from trade_simulator.utils.trade_feed import TradeFeed
+
+
+class TradeFeedTrader(BasicAgent):
+    """Places the trades of a recorded trade tape as market orders.
+
+    Feed step ``s`` is placed at simulation step ``first_step + s``. The
+    feed is memory-mapped, every action turns only its own step's records
+    into orders, and the agent sleeps until the next step with trades.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.type = "TradeFeedTrader"
+        self.feed = TradeFeed(kwargs["path"])
+        self.first_step = kwargs.get("first_step", 0)
+        self.pool_id = [kwargs["pool_id"]]
+        self.pool = None
+        self.agent_metrics["pool_id"] = self.pool_id
+
+    def get_next_action_step(self, timestamp: int) -> int:
+        next_step = self.feed.get_next_step(timestamp - self.first_step)
+        if next_step is None:
+            # The tape is over, the agent is never due again.
+            return sys.maxsize
+        return next_step + self.first_step
+
+    def get_other_token(self, token: str) -> str:
+        other_tokens = [other for other in self.pool.tokens_info if other != token]
+        if len(other_tokens) != 1:
+            raise ValueError(
+                f"Trades in pool {self.pool.id} need a second token, "
+                f"it has {len(self.pool.tokens_info)} tokens."
+            )
+        return other_tokens[0]
+
+    def run_agent_action(self, timestamp: int):
+        trades = self.feed.get_step(timestamp - self.first_step)
+        if not len(trades):
+            return
+        tokens = self.feed.tokens
+        orders = []
+        for _, volume, token, second_token, operation_type_code in trades.tolist():
+            operation_type = ORDER_OPERATION_TYPES[operation_type_code]
+            orders.append(
+                Order(
+                    trader=self,
+                    creation_timestamp=timestamp,
+                    operation_type=operation_type,
+                    token=tokens[token],
+                    token_volume=volume,
+                    priority=1,
+                    second_token=(
+                        self.get_other_token(tokens[token])
+                        if second_token < 0
+                        else tokens[second_token]
+                    ),
+                )
+            )
+            self.agent_metrics[f"{operation_type.lower()}_orders"].append(timestamp)
+        self.pool.add_orders(orders)
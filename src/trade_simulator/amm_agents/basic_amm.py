@@ -2,11 +2,14 @@ import random
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 if TYPE_CHECKING:
     from trade_simulator.order.order import Order
     from trade_simulator.pool.pool import Pool
 
-from trade_simulator.utils.consts import ORDER_OPERATION_STATUSES
+from trade_simulator.order.limit_order_book import LimitOrderBook
+from trade_simulator.utils.consts import CANCELED
 
 
 class AMM(ABC):
@@ -15,70 +18,150 @@ class AMM(ABC):
         self.settings = kwargs
         self.type = None
         self.fee = 0.0 if "fee" not in self.settings else self.settings["fee"]
+        self.limit_order_book = LimitOrderBook()
+        self.rng = random.Random(random.getrandbits(64))
+        self.reset_price_cache()
+
+    def update_settings(self, **kwargs):
+        if kwargs["type"] != self.type:
+            raise ValueError(
+                f"Amm type can not change from {self.type} to {kwargs['type']}."
+            )
+        self.settings = kwargs
+        self.fee = 0.0 if "fee" not in self.settings else self.settings["fee"]
+        self.reset_price_cache()
+
+    def reset_price_cache(self):
+        # Prices keyed by (token in, token out) and quotes keyed by (asset,
+        # currency, amount), valid for one version of the pool reserves.
+        self.price_cache = {}
+        self.price_cache_version = None
 
     @abstractmethod
     def execute_order(self, order: "Order"):
         pass
 
-    def sort_orders(self):
-        random.shuffle(self.market_orders)
-        random.shuffle(self.limit_orders)
-        self.market_orders = sorted(
-            self.market_orders, key=lambda o: (o.creation_timestamp, o.priority)
-        )
-        self.limit_orders = sorted(
-            self.limit_orders, key=lambda o: (o.creation_timestamp, o.priority)
-        )
-
     @abstractmethod
     def write_metrics(self):
         pass
 
-    def clean_order_book(self):
-        orders_to_statuses = {}
-        for status in ORDER_OPERATION_STATUSES:
-            orders_to_statuses[status] = []
-
-        for order in self.pool.order_book:
-            orders_to_statuses[order.status].append(order)
-
-        for status in orders_to_statuses.keys():
-            self.pool.metrics[f"number_of_{status}_orders_in_order_book"].append(
-                len(orders_to_statuses[status])
+    def write_idle_metrics(self, number_of_steps: int):
+        """`write_metrics` for steps in which the reserves did not change."""
+        for _ in range(number_of_steps):
+            self.write_metrics()
+
+    def register_profit_from_fees_metrics(self, tokens):
+        self.profit_from_fees_series = {}
+        # Running totals of the tokens that earned fees in the current step,
+        # see `write_profit_from_fees`.
+        self.profit_from_fees_in_step = {}
+        for token in tokens:
+            self.profit_from_fees_series[token] = (
+                self.pool.metrics_recorder.register(
+                    "profit_from_fees",
+                    token,
+                    "timestamp",
+                    dtype=np.int64,
+                    initial=[0],
+                    per_step=False,
+                ),
+                self.pool.metrics_recorder.register(
+                    "profit_from_fees", token, "value", initial=[0], per_step=False
+                ),
             )
 
-        self.pool.order_book = orders_to_statuses["Awaiting"]
+    def add_profit_from_fees(self, token: str, profit: float, timestamp: int):
+        totals = self.profit_from_fees_in_step
+        total = totals.get(token)
+        if total is None:
+            total = self.profit_from_fees_series[token][1].last()
+        # Summed one order at a time, as the series would be.
+        totals[token] = total + profit
+
+    def write_profit_from_fees(self, timestamp: int):
+        """Write the fee totals of the step to the series."""
+        for token, total in self.profit_from_fees_in_step.items():
+            timestamps, values = self.profit_from_fees_series[token]
+            if timestamps.last() != timestamp:
+                timestamps.append(timestamp)
+                values.append(total)
+            else:
+                values.set_last(total)
+        self.profit_from_fees_in_step = {}
+
+    def clean_order_book(self):
+        self.pool.order_book.record_status_counts(self.pool.status_count_series)
 
-    def get_orders_by_type(self):
-        limit_orders = []
-        market_orders = []
-        for order in self.pool.order_book:
-            if order.order_type == "Limit":
-                limit_orders.append(order)
-            elif order.order_type == "Market":
-                market_orders.append(order)
-        return limit_orders, market_orders
+    def add_limit_order(self, order: "Order"):
+        self.limit_order_book.add(order)
 
     @abstractmethod
     def _process_limit_order(self, order: "Order", timestamp: int):
         pass
 
     def process_limit_orders(self, timestamp: int):
-        for order in self.limit_orders:
-            if order.status == "Awaiting":
-                self._process_limit_order(order, timestamp)
+        expired = self.limit_order_book.pop_expired(timestamp)
+        for order in expired:
+            order.status_code = CANCELED
+        self.pool.order_book.settle(expired)
+        order = self.limit_order_book.pop_crossing(self.get_price)
+        while order is not None:
+            self._process_limit_order(order, timestamp)
+            self.pool.order_book.settle([order])
+            order = self.limit_order_book.pop_crossing(self.get_price)
 
     def execute_orders(self, timestamp: int):
-        self.limit_orders, self.market_orders = self.get_orders_by_type()
-        self.sort_orders()
+        # Limit orders live in `self.limit_order_book` from the moment they
+        # are added to the pool, so only market orders are taken here.
+        self.market_orders = self.pool.order_book.pop_market_orders()
         self.process_limit_orders(timestamp)
-        for order in self.market_orders:
-            self.execute_order(order, timestamp)
-            self.process_limit_orders(timestamp)
+        # Limit orders are only added between steps, so an empty book stays
+        # empty for the rest of the step.
+        if self.limit_order_book.is_empty():
+            for order in self.market_orders:
+                self.execute_order(order, timestamp)
+        else:
+            for order in self.market_orders:
+                self.execute_order(order, timestamp)
+                self.process_limit_orders(timestamp)
+        self.write_profit_from_fees(timestamp)
+        self.pool.order_book.settle(self.market_orders)
         self.clean_order_book()
 
-    @abstractmethod
+    # Both lookups below are called for every market maker rule and every
+    # limit order check, so the version check is inlined rather than shared.
+    def get_price(self, token_in: str, token_out: str) -> float:
+        version = self.pool.tokens_info_version
+        if self.price_cache_version != version:
+            self.price_cache = {}
+            self.price_cache_version = version
+        key = (token_in, token_out)
+        price = self.price_cache.get(key)
+        if price is None:
+            price = self.price_cache[key] = self._get_price(token_in, token_out)
+        return price
+
     def get_asset_price_in_currency(
         self, token_as_asset, token_as_currency, amount_of_asset=1.0
+    ) -> float:
+        version = self.pool.tokens_info_version
+        if self.price_cache_version != version:
+            self.price_cache = {}
+            self.price_cache_version = version
+        key = (token_as_asset, token_as_currency, amount_of_asset)
+        price = self.price_cache.get(key)
+        if price is None:
+            price = self.price_cache[key] = self._get_asset_price_in_currency(
+                token_as_asset, token_as_currency, amount_of_asset
+            )
+        return price
+
+    @abstractmethod
+    def _get_price(self, token_in: str, token_out: str) -> float:
+        pass
+
+    @abstractmethod
+    def _get_asset_price_in_currency(
+        self, token_as_asset, token_as_currency, amount_of_asset=1.0
     ) -> float:
         pass
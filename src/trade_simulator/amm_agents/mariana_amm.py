@@ -1,5 +1,7 @@
+import math
 from typing import TYPE_CHECKING
 
+from trade_simulator.amm_agents.basic_amm import AMM
 from trade_simulator.amm_agents.uniswap_amm import UniswapAMM
 
 if TYPE_CHECKING:
@@ -9,20 +11,24 @@ if TYPE_CHECKING:
 class MarianaAMM(UniswapAMM):
 
     def __init__(self, pool: "Pool", **kwargs):
-        self.pool = pool
-        self.settings = kwargs
-        self.type = None
-        self.fee = 0.0 if "fee" not in self.settings else self.settings["fee"]
+        # UniswapAMM.__init__ assumes exactly two tokens, so skip it.
+        AMM.__init__(self, pool, **kwargs)
 
         self.type = "Mariana"
         self.tokens = list(self.pool.tokens_info.keys())
-        self.pool.metrics["k"] = []
-        self.pool.metrics["profit_from_fees"] = {}
-        for token in self.tokens:
-            self.pool.metrics["profit_from_fees"][token] = {"timestamp": [0], "value": [0]}
+        self.k_series = self.pool.metrics_recorder.register("k")
+        self.k_version = None
+        self.register_profit_from_fees_metrics(self.tokens)
 
     def write_metrics(self):
-        k_value = 1
-        for token in self.tokens:
-            k_value *= self.pool.tokens_info[token]
-        self.pool.metrics["k"].append(k_value)
+        # The product over all tokens only changes with the reserves.
+        version = self.pool.tokens_info_version
+        if self.k_version == version:
+            self.k_series.append(self.k_series.last())
+            return
+        self.k_series.append(math.prod(self.pool.tokens_info.values()))
+        self.k_version = version
+
+    def write_idle_metrics(self, number_of_steps: int):
+        self.write_metrics()
+        self.k_series.append_repeated(self.k_series.last(), number_of_steps - 1)
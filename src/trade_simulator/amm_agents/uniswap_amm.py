@@ -1,6 +1,15 @@
 from typing import TYPE_CHECKING
 
 from trade_simulator.amm_agents.basic_amm import AMM
+from trade_simulator.utils.consts import (
+    AWAITING,
+    BUY,
+    CANCELED,
+    LIMIT,
+    MARKET,
+    SELL,
+    SUCCEED,
+)
 
 if TYPE_CHECKING:
     from trade_simulator.order.order import Order
@@ -14,27 +23,38 @@ class UniswapAMM(AMM):
         tokens = list(self.pool.tokens_info.keys())
         self.type = "UniswapV2"
         self.token_a, self.token_b = tokens
-        self.pool.metrics["k"] = []
-        self.pool.metrics[f"price_of_{self.token_a}_{self.token_b}"] = []
-        self.pool.metrics[f"price_of_{self.token_b}_{self.token_a}"] = []
-        self.pool.metrics["k"].append(
-            self.pool.tokens_info[self.token_a] * self.pool.tokens_info[self.token_b]
+        recorder = self.pool.metrics_recorder
+        self.k_series = recorder.register(
+            "k",
+            initial=[
+                self.pool.tokens_info[self.token_a]
+                * self.pool.tokens_info[self.token_b]
+            ],
+        )
+        self.price_a_b_series = recorder.register(
+            f"price_of_{self.token_a}_{self.token_b}"
         )
-        self.pool.metrics["profit_from_fees"] = {}
-        for token in tokens:
-            self.pool.metrics["profit_from_fees"][token] = {"timestamp": [0], "value": [0]}
+        self.price_b_a_series = recorder.register(
+            f"price_of_{self.token_b}_{self.token_a}"
+        )
+        self.register_profit_from_fees_metrics(tokens)
 
     def write_metrics(self):
-        self.pool.metrics["k"].append(
+        self.k_series.append(
             self.pool.tokens_info[self.token_a] * self.pool.tokens_info[self.token_b]
         )
-        self.pool.metrics[f"price_of_{self.token_a}_{self.token_b}"].append(
+        self.price_a_b_series.append(
             self.get_asset_price_in_currency(self.token_a, self.token_b)
         )
-        self.pool.metrics[f"price_of_{self.token_b}_{self.token_a}"].append(
+        self.price_b_a_series.append(
             self.get_asset_price_in_currency(self.token_b, self.token_a)
         )
 
+    def write_idle_metrics(self, number_of_steps: int):
+        self.write_metrics()
+        for series in (self.k_series, self.price_a_b_series, self.price_b_a_series):
+            series.append_repeated(series.last(), number_of_steps - 1)
+
     def _buy_market(self, order: "Order", timestamp: int):
         token_out = order.token  # токен, который трейдер хочет получить
         token_in = order.second_token
@@ -44,7 +64,7 @@ class UniswapAMM(AMM):
         dy = order.token_volume
 
         if dy >= y:
-            order.status = "Canceled"
+            order.status_code = CANCELED
             return
 
         # Расчёт dx: сколько нужно заплатить с учётом комиссии
@@ -55,25 +75,18 @@ class UniswapAMM(AMM):
         dx = dx_without_fee / (1 - self.fee)
 
         if order.trader.portfolio[token_in] < dx:
-            order.status = "Canceled"
+            order.status_code = CANCELED
             return
 
-        if self.pool.metrics["profit_from_fees"][token_in]["timestamp"][-1] != timestamp:
-            self.pool.metrics["profit_from_fees"][token_in]["timestamp"].append(
-                timestamp)
-            self.pool.metrics["profit_from_fees"][token_in]["value"].append(0)
-            self.pool.metrics["profit_from_fees"][token_in]["value"][-1] += self.pool.metrics["profit_from_fees"][token_in]["value"][-2]
-        self.pool.metrics["profit_from_fees"][token_in]["value"][-1] += dx - dx_without_fee
-
+        self.add_profit_from_fees(token_in, dx - dx_without_fee, timestamp)
 
         # Обновление портфеля и пула
         order.trader.portfolio[token_in] -= dx
         order.trader.portfolio[token_out] += dy
 
-        self.pool.tokens_info[token_in] += dx
-        self.pool.tokens_info[token_out] -= dy
+        self.pool.swap_reserves(token_in, dx, token_out, dy)
 
-        order.status = "Succeed"
+        order.status_code = SUCCEED
 
     def _sell_market(self, order: "Order", timestamp: int):
         token_in = order.token  # токен, который трейдер продаёт
@@ -81,7 +94,7 @@ class UniswapAMM(AMM):
 
         dx = order.token_volume
         if order.trader.portfolio[token_in] < dx:
-            order.status = "Canceled"
+            order.status_code = CANCELED
             return
 
         x = self.pool.tokens_info[token_in]
@@ -95,26 +108,20 @@ class UniswapAMM(AMM):
         dy = y - new_y
 
         if dy > y:
-            order.status = "Canceled"
+            order.status_code = CANCELED
             return
 
-        if self.pool.metrics["profit_from_fees"][token_in]["timestamp"][-1] != timestamp:
-            self.pool.metrics["profit_from_fees"][token_in]["timestamp"].append(
-                timestamp)
-            self.pool.metrics["profit_from_fees"][token_in]["value"].append(0)
-            self.pool.metrics["profit_from_fees"][token_in]["value"][-1] += self.pool.metrics["profit_from_fees"][token_in]["value"][-2]
-        self.pool.metrics["profit_from_fees"][token_in]["value"][-1] += abs(dx_with_fee - dx)
+        self.add_profit_from_fees(token_in, abs(dx_with_fee - dx), timestamp)
 
         # Обновление портфеля и пула
         order.trader.portfolio[token_in] -= dx
         order.trader.portfolio[token_out] += dy
 
-        self.pool.tokens_info[token_in] += dx
-        self.pool.tokens_info[token_out] -= dy
+        self.pool.swap_reserves(token_in, dx, token_out, dy)
 
-        order.status = "Succeed"
+        order.status_code = SUCCEED
 
-    def get_asset_price_in_currency(
+    def _get_asset_price_in_currency(
         self, token_as_asset: str, token_as_currency: str, amount_of_asset: float = 1.0
     ) -> float:
 
@@ -132,7 +139,7 @@ class UniswapAMM(AMM):
 
         return numerator / denominator
 
-    def get_price(self, token_in: str, token_out: str) -> float:
+    def _get_price(self, token_in: str, token_out: str) -> float:
         x = self.pool.tokens_info[token_in]
         y = self.pool.tokens_info[token_out]
         if x == 0:
@@ -144,16 +151,14 @@ class UniswapAMM(AMM):
             order.lifetime is not None
             and timestamp - order.creation_timestamp > order.lifetime
         ):
-            order.status = "Canceled"
+            order.status_code = CANCELED
             return
-        token_in = (
-            order.token
-            if order.operation_type == "SELL"
-            else order.second_token
-        )
-        token_out = order.second_token if order.operation_type == "SELL" else order.token
+        if order.operation_type_code == SELL:
+            token_in, token_out = order.token, order.second_token
+        else:
+            token_in, token_out = order.second_token, order.token
         price = self.get_price(token_in, token_out)
-        if order.operation_type == "BUY":
+        if order.operation_type_code == BUY:
             if price <= order.limit_price:
                 self._buy_market(order, timestamp)
         else:
@@ -161,15 +166,15 @@ class UniswapAMM(AMM):
                 self._sell_market(order, timestamp)
 
     def execute_order(self, order: "Order", timestamp: int):
-        if order.status != "Awaiting":
+        if order.status_code != AWAITING:
             return
 
-        if order.order_type == "Market":
-            if order.operation_type == "BUY":
+        if order.order_type_code == MARKET:
+            if order.operation_type_code == BUY:
                 self._buy_market(order, timestamp)
             else:
                 self._sell_market(order, timestamp)
-        elif order.order_type == "Limit":
+        elif order.order_type_code == LIMIT:
             self._process_limit_order(order, timestamp)
         else:
             raise ValueError(f"Unsupported order type {order.order_type}.")
@@ -0,0 +1,180 @@
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+
+from trade_simulator.amm_agents.uniswap_amm import UniswapAMM
+from trade_simulator.utils.consts import BUY
+
+if TYPE_CHECKING:
+    from trade_simulator.order.order import Order
+    from trade_simulator.pool.pool import Pool
+
+
+class UniswapEnsembleAMM(UniswapAMM):
+    """K variants of one UniswapV2 pool fed with the same orders.
+
+    Variants differ in fee and start reserves. Agents trade with the
+    primary variant, which is the pool itself and runs exactly like a
+    UniswapV2 pool. Every market order and every limit order the primary
+    triggers is then applied to all variants at once with NumPy, whether
+    the primary filled it or not, so one run gives k, prices and profit
+    from fees for every variant. A variant fills an order when its own
+    reserves allow and the trader held enough at the time of the order.
+    """
+
+    def __init__(self, pool: "Pool", **kwargs):
+        variants = kwargs["variants"]
+        self.primary_variant = kwargs.get("primary_variant", 0)
+        tokens = list(pool.tokens_info.keys())
+        start_quantities = [
+            [
+                variant.get("start_quantities", pool.tokens_info)[token]
+                for token in tokens
+            ]
+            for variant in variants
+        ]
+        # The pool holds the reserves of the primary variant.
+        pool.set_reserves(dict(zip(tokens, start_quantities[self.primary_variant])))
+        super().__init__(
+            pool, **{**kwargs, "fee": variants[self.primary_variant]["fee"]}
+        )
+        self.type = "UniswapV2Ensemble"
+
+        # One row per variant, columns are token a and token b.
+        self.variant_fees = np.array(
+            [variant["fee"] for variant in variants], dtype=np.float64
+        )
+        self.variant_reserves = np.array(start_quantities, dtype=np.float64)
+        self.variant_profit_from_fees = np.zeros((len(variants), 2))
+        # Orders that reached the primary variant in the current step, in
+        # order, with the trader's balance of the token paid before each.
+        self.variant_orders: List[Tuple["Order", float]] = []
+
+        recorder = self.pool.metrics_recorder
+        self.variant_series = []
+        for i, reserves in enumerate(self.variant_reserves):
+            variant = str(i)
+            self.variant_series.append(
+                (
+                    recorder.register(
+                        "variants", variant, "k", initial=[reserves[0] * reserves[1]]
+                    ),
+                    recorder.register(
+                        "variants", variant, f"price_of_{self.token_a}_{self.token_b}"
+                    ),
+                    recorder.register(
+                        "variants", variant, f"price_of_{self.token_b}_{self.token_a}"
+                    ),
+                    *(
+                        recorder.register(
+                            "variants", variant, "profit_from_fees", token, initial=[0]
+                        )
+                        for token in (self.token_a, self.token_b)
+                    ),
+                )
+            )
+
+    def update_settings(self, **kwargs):
+        variants = kwargs["variants"]
+        if len(variants) != len(self.variant_fees):
+            raise ValueError(
+                f"Expected {len(self.variant_fees)} ensemble variants, "
+                f"got {len(variants)}."
+            )
+        if kwargs.get("primary_variant", 0) != self.primary_variant:
+            raise ValueError("Primary ensemble variant can not change on resume.")
+        super().update_settings(
+            **{**kwargs, "fee": variants[self.primary_variant]["fee"]}
+        )
+        self.variant_fees = np.array(
+            [variant["fee"] for variant in variants], dtype=np.float64
+        )
+
+    def _buy_market(self, order: "Order", timestamp: int):
+        balance = order.trader.portfolio[order.second_token]
+        super()._buy_market(order, timestamp)
+        self.variant_orders.append((order, balance))
+
+    def _sell_market(self, order: "Order", timestamp: int):
+        balance = order.trader.portfolio[order.token]
+        super()._sell_market(order, timestamp)
+        self.variant_orders.append((order, balance))
+
+    def execute_orders(self, timestamp: int):
+        self.variant_orders = []
+        super().execute_orders(timestamp)
+        if self.variant_orders:
+            self.execute_variant_orders(self.variant_orders)
+            self.variant_orders = []
+
+    def execute_variant_orders(self, orders: List[Tuple["Order", float]]):
+        """Apply ``orders`` to every variant, one vectorized update per order.
+
+        Each order comes with the balance its trader held of the token paid.
+        The arithmetic and the checks follow `UniswapAMM._buy_market` and
+        `UniswapAMM._sell_market` with a fee and reserves per variant.
+        """
+        reserves = self.variant_reserves
+        profit_from_fees = self.variant_profit_from_fees
+        fee_multipliers = 1 - self.variant_fees
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for order, balance in orders:
+                buy = order.operation_type_code == BUY
+                token_in = order.second_token if buy else order.token
+                i_in = 0 if token_in == self.token_a else 1
+                i_out = 1 - i_in
+                x = reserves[:, i_in]
+                y = reserves[:, i_out]
+                if buy:
+                    dy = np.full_like(y, order.token_volume)
+                    filled = dy < y
+                    new_y = y - dy
+                    k = x * y
+                    new_x = k / new_y
+                    dx_without_fee = new_x - x
+                    dx = dx_without_fee / fee_multipliers
+                    filled &= balance >= dx
+                    fees = dx - dx_without_fee
+                else:
+                    dx = np.full_like(x, order.token_volume)
+                    dx_with_fee = dx * fee_multipliers
+                    new_x = x + dx_with_fee
+                    k = x * y
+                    new_y = k / new_x
+                    dy = y - new_y
+                    filled = (dy <= y) & (balance >= dx)
+                    fees = np.abs(dx_with_fee - dx)
+                reserves[:, i_in] = np.where(filled, x + dx, x)
+                reserves[:, i_out] = np.where(filled, y - dy, y)
+                profit_from_fees[:, i_in] += np.where(filled, fees, 0.0)
+        # The primary variant reports what the agents traded with.
+        reserves[self.primary_variant] = [
+            self.pool.tokens_info[self.token_a],
+            self.pool.tokens_info[self.token_b],
+        ]
+
+    def write_metrics(self):
+        super().write_metrics()
+        reserves_a = self.variant_reserves[:, 0]
+        reserves_b = self.variant_reserves[:, 1]
+        fee_multipliers = 1 - self.variant_fees
+        # `get_asset_price_in_currency` of one unit, for every variant.
+        with np.errstate(divide="ignore"):
+            prices_a_b = reserves_b / ((reserves_a - 1) * fee_multipliers)
+            prices_b_a = reserves_a / ((reserves_b - 1) * fee_multipliers)
+        rows = zip(
+            (reserves_a * reserves_b).tolist(),
+            prices_a_b.tolist(),
+            prices_b_a.tolist(),
+            self.variant_profit_from_fees[:, 0].tolist(),
+            self.variant_profit_from_fees[:, 1].tolist(),
+        )
+        for series, row in zip(self.variant_series, rows):
+            for one_series, value in zip(series, row):
+                one_series.append(value)
+
+    def write_idle_metrics(self, number_of_steps: int):
+        super().write_idle_metrics(number_of_steps)
+        for series in self.variant_series:
+            for one_series in series:
+                one_series.append_repeated(one_series.last(), number_of_steps - 1)
@@ -1,9 +1,118 @@
+import argparse
+import json
+import os
+
+from trade_simulator.order.order_flow import read_order_flow
+from trade_simulator.simulation.replay import replay_order_flow
 from trade_simulator.simulation.simulation import Simulation
+from trade_simulator.utils.consts import DEFAULT_PLOTS_SAMPLE_SIZE, PLOTS_MODES
+from trade_simulator.utils.trade_feed import convert_csv_to_trade_feed
 from trade_simulator.utils.utils import read_settings
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the trade simulator.")
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="Simulation config, defaults to simulation.yaml. "
+        "With --resume it replaces the checkpoint's config.",
+    )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        help="Checkpoint to continue the simulation from.",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        help="Order flow log to run against the config's pools_settings "
+        "without agents, pool metrics go to replay_pools_data next to it.",
+    )
+    parser.add_argument(
+        "--convert-trade-feed",
+        nargs=2,
+        default=None,
+        metavar=("CSV", "FEED"),
+        help="Convert a CSV trade tape to a trade feed file for "
+        "TradeFeedTrader agents and exit.",
+    )
+    parser.add_argument(
+        "--plots",
+        choices=PLOTS_MODES,
+        default="all",
+        help="Which plots to render after the run.",
+    )
+    parser.add_argument(
+        "--plots-sample-size",
+        type=int,
+        default=DEFAULT_PLOTS_SAMPLE_SIZE,
+        help="Number of random agents to plot with '--plots sample'.",
+    )
+    parser.add_argument(
+        "--plot-processes",
+        type=int,
+        default=None,
+        help="Worker processes for plot rendering, defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Only write metrics: no plots and no progress bar, plotting "
+        "libraries are never imported.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write time per phase, order counters and memory snapshots "
+        "to profile.json in the experiment folder.",
+    )
+    return parser.parse_args()
+
+
+def replay(path: str, config: str):
+    order_flow = read_order_flow(path)
+    pools_settings = read_settings(config)["simulation"]["pools_settings"]
+    pools = replay_order_flow(order_flow, pools_settings)
+    output_path = os.path.join(os.path.dirname(path), "replay_pools_data")
+    os.makedirs(output_path, exist_ok=True)
+    for pool_id, pool in pools.items():
+        with open(f"{output_path}/pool_{pool_id}.json", "w") as f:
+            json.dump(pool.export_metrics(), f)
+    print(f"Replayed pools data was written to {output_path}.")
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.convert_trade_feed is not None:
+        convert_csv_to_trade_feed(*args.convert_trade_feed)
+        print(f"Trade feed was written to {args.convert_trade_feed[1]}.")
+        raise SystemExit
+    if args.replay is not None:
+        replay(args.replay, args.config or "simulation.yaml")
+        raise SystemExit
     print("Simulation started.")
+    plots = "none" if args.headless else args.plots
+    progress = not args.headless
 
-    settings = read_settings("simulation.yaml")
-    simulation = Simulation(**settings)
+    if args.resume is not None:
+        simulation = Simulation.from_checkpoint(
+            args.resume,
+            settings=None if args.config is None else read_settings(args.config),
+            plots=plots,
+            progress=progress,
+            profile=args.profile,
+        )
+        simulation.plots_sample_size = args.plots_sample_size
+        simulation.plot_processes = args.plot_processes
+    else:
+        settings = read_settings(args.config or "simulation.yaml")
+        simulation = Simulation(
+            plots=plots,
+            plots_sample_size=args.plots_sample_size,
+            plot_processes=args.plot_processes,
+            progress=progress,
+            profile=args.profile,
+            **settings,
+        )
     simulation.run()
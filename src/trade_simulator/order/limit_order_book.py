@@ -0,0 +1,93 @@
+import heapq
+import itertools
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from trade_simulator.utils.consts import AWAITING, BUY
+
+if TYPE_CHECKING:
+    from trade_simulator.order.order import Order
+
+
+class LimitOrderBook:
+    """Limit orders indexed by pair, side and limit price.
+
+    BUY orders fire when the pool price drops to their limit, so they sit in a
+    max-heap; SELL orders fire when the price rises to their limit and sit in
+    a min-heap. Orders with a lifetime are also pushed to an expiry heap.
+    Filled or canceled orders are dropped lazily when they reach a heap top.
+    """
+
+    def __init__(self):
+        self.buy_orders: Dict[Tuple[str, str], List] = {}
+        self.sell_orders: Dict[Tuple[str, str], List] = {}
+        self.expiry_index: List = []
+        # A plain counter rather than itertools.count, so the book pickles.
+        self._sequence = 0
+
+    def add(self, order: "Order"):
+        pair = (order.token, order.second_token)
+        sequence = self._sequence
+        self._sequence += 1
+        if order.operation_type_code == BUY:
+            heap = self.buy_orders.setdefault(pair, [])
+            key = -order.limit_price
+        else:
+            heap = self.sell_orders.setdefault(pair, [])
+            key = order.limit_price
+        # Ties are broken by trader before arrival, see `AMM.sort_orders`.
+        heapq.heappush(
+            heap,
+            (
+                key,
+                order.creation_timestamp,
+                order.priority,
+                order.trader.id,
+                sequence,
+                order,
+            ),
+        )
+        if order.lifetime is not None:
+            heapq.heappush(
+                self.expiry_index,
+                (order.creation_timestamp + order.lifetime, sequence, order),
+            )
+
+    def pop_expired(self, timestamp: int) -> List["Order"]:
+        expired = []
+        while self.expiry_index and self.expiry_index[0][0] < timestamp:
+            order = heapq.heappop(self.expiry_index)[-1]
+            if order.status_code == AWAITING:
+                expired.append(order)
+        return expired
+
+    def pop_crossing(
+        self, get_price: Callable[[str, str], float]
+    ) -> Optional["Order"]:
+        """Pop the best order whose limit is crossed by the current price.
+
+        ``get_price(token_in, token_out)`` is the pool price the AMM uses to
+        trigger limit orders. Only heap tops are inspected.
+        """
+        for pair, heap in self.buy_orders.items():
+            self._drop_inactive(heap)
+            if heap and get_price(pair[1], pair[0]) <= -heap[0][0]:
+                return heapq.heappop(heap)[-1]
+        for pair, heap in self.sell_orders.items():
+            self._drop_inactive(heap)
+            if heap and get_price(pair[0], pair[1]) >= heap[0][0]:
+                return heapq.heappop(heap)[-1]
+        return None
+
+    @staticmethod
+    def _drop_inactive(heap: List):
+        while heap and heap[0][-1].status_code != AWAITING:
+            heapq.heappop(heap)
+
+    def is_empty(self) -> bool:
+        for heap in itertools.chain(
+            self.buy_orders.values(), self.sell_orders.values()
+        ):
+            self._drop_inactive(heap)
+            if heap:
+                return False
+        return True
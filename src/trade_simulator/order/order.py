@@ -1,10 +1,38 @@
 from typing import Optional
 
 from trade_simulator.agents.basic_agent import BasicAgent
-from trade_simulator.utils.consts import ORDER_OPERATION_TYPES, ORDER_TYPES
+from trade_simulator.utils.consts import (
+    AWAITING,
+    ORDER_OPERATION_STATUS_CODES,
+    ORDER_OPERATION_STATUSES,
+    ORDER_OPERATION_TYPE_CODES,
+    ORDER_OPERATION_TYPES,
+    ORDER_TYPE_CODES,
+    ORDER_TYPES,
+)
 
 
 class Order:
+    # Orders are created millions of times per run, so they are slotted and
+    # keep operation type, order type and status as integer codes. The string
+    # attributes below are a compatibility view over the codes. Tokens stay
+    # names: reserves and portfolios are keyed by name, and a slot holding a
+    # shared name string is as small as one holding an int.
+    __slots__ = (
+        "trader",
+        "creation_timestamp",
+        "token",
+        "second_token",
+        "cancel_possibility",
+        "lifetime",
+        "token_volume",
+        "priority",
+        "operation_type_code",
+        "status_code",
+        "order_type_code",
+        "limit_price",
+    )
+
     def __init__(
         self,
         trader: BasicAgent,
@@ -22,21 +50,49 @@ class Order:
         self.trader = trader
         self.creation_timestamp = creation_timestamp
         self.token = token
+        self.second_token = second_token
         self.cancel_possibility = cancel_possibility
         self.lifetime = lifetime
         self.token_volume = token_volume
         self.priority = priority
-        self.operation_type = operation_type
-        self.status = "Awaiting"
-        self.order_type = order_type
+        self.status_code = AWAITING
         self.limit_price = limit_price
-        self.second_token = second_token
-        self.check_order_fields()
+        self.check_order_fields(operation_type, order_type)
 
-    def check_order_fields(self):
+    def check_order_fields(self, operation_type: str, order_type: str):
         if self.priority < 1:
-            raise (f"Order priority has to be more or equal to 1, got {self.priority}.")
-        if self.operation_type not in ORDER_OPERATION_TYPES:
-            raise ValueError(f"Unsupported order operation type {self.operation_type}.")
-        if self.order_type not in ORDER_TYPES:
-            raise ValueError(f"Unsupported order type {self.order_type}.")
+            raise ValueError(
+                f"Order priority has to be more or equal to 1, got {self.priority}."
+            )
+        operation_type_code = ORDER_OPERATION_TYPE_CODES.get(operation_type)
+        if operation_type_code is None:
+            raise ValueError(f"Unsupported order operation type {operation_type}.")
+        order_type_code = ORDER_TYPE_CODES.get(order_type)
+        if order_type_code is None:
+            raise ValueError(f"Unsupported order type {order_type}.")
+        self.operation_type_code = operation_type_code
+        self.order_type_code = order_type_code
+
+    @property
+    def operation_type(self) -> str:
+        return ORDER_OPERATION_TYPES[self.operation_type_code]
+
+    @property
+    def order_type(self) -> str:
+        return ORDER_TYPES[self.order_type_code]
+
+    @property
+    def status(self) -> str:
+        return ORDER_OPERATION_STATUSES[self.status_code]
+
+    @status.setter
+    def status(self, status: str):
+        self.status_code = ORDER_OPERATION_STATUS_CODES[status]
+
+    def __getstate__(self):
+        # A plain dict, sharded runs also send it without the trader.
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
@@ -0,0 +1,132 @@
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Tuple
+
+from trade_simulator.utils.consts import AWAITING, LIMIT, ORDER_OPERATION_STATUSES
+
+if TYPE_CHECKING:
+    from trade_simulator.order.order import Order
+    from trade_simulator.utils.metrics import MetricSeries
+
+
+class OrderBook:
+    """Orders of a pool that are not settled yet, with counts by status.
+
+    Market orders are put into buckets keyed by (creation timestamp,
+    priority) as they are added, each with a random tie-breaking key, so a
+    step only sorts its own orders. The AMM reports the orders it settled
+    through `settle`, which keeps the status counts and the owners of
+    awaiting limit orders up to date without going over the whole book.
+    Settled limit orders are dropped from `limit_orders` lazily.
+    """
+
+    def __init__(self, seed: int):
+        self.seed = seed
+        self.market_orders: Dict[Tuple[int, int], List[Tuple[int, "Order"]]] = {}
+        self.limit_orders: List["Order"] = []
+        self.settled_limit_orders = 0
+        # Awaiting orders and orders settled since the last
+        # `record_status_counts`, by status code.
+        self.status_counts = [0] * len(ORDER_OPERATION_STATUSES)
+        # id(trader) -> [trader, number of its awaiting limit orders];
+        # traders are not always hashable.
+        self.limit_traders: Dict[int, List[Any]] = {}
+
+    def __len__(self) -> int:
+        return self.status_counts[AWAITING]
+
+    def __iter__(self) -> Iterator["Order"]:
+        """Awaiting orders, market orders in execution order first."""
+        for key in sorted(self.market_orders):
+            for _, order in sorted(self.market_orders[key], key=itemgetter(0)):
+                yield order
+        for order in self.limit_orders:
+            if order.status_code == AWAITING:
+                yield order
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Object ids do not survive pickling, the index is rebuilt on load.
+        state["limit_traders"] = list(self.limit_traders.values())
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.limit_traders = {
+            id(entry[0]): entry for entry in state["limit_traders"]
+        }
+
+    def add(self, order: "Order"):
+        self.status_counts[AWAITING] += 1
+        if order.order_type_code == LIMIT:
+            self.limit_orders.append(order)
+            entry = self.limit_traders.get(id(order.trader))
+            if entry is None:
+                self.limit_traders[id(order.trader)] = [order.trader, 1]
+            else:
+                entry[1] += 1
+            return
+        bucket_key = (order.creation_timestamp, order.priority)
+        bucket = self.market_orders.get(bucket_key)
+        if bucket is None:
+            bucket = self.market_orders[bucket_key] = []
+        # A hash of the trader rather than a draw from a generator, so the
+        # order of execution does not depend on the order agents placed their
+        # orders in, which differs between single process and sharded runs.
+        # Orders of one trader keep their own order, the sort is stable.
+        bucket.append(
+            (hash((self.seed, order.trader.id, order.creation_timestamp)), order)
+        )
+
+    def pop_market_orders(self) -> List["Order"]:
+        """All market orders, sorted by creation timestamp and priority with
+        random tie-breaking, removed from the book until they are settled."""
+        orders = []
+        for key in sorted(self.market_orders):
+            bucket = self.market_orders[key]
+            bucket.sort(key=itemgetter(0))
+            orders.extend(order for _, order in bucket)
+        self.market_orders = {}
+        return orders
+
+    def settle(self, orders: List["Order"]):
+        """Account for ``orders`` that may have left the awaiting status."""
+        status_counts = self.status_counts
+        for order in orders:
+            status_code = order.status_code
+            if status_code == AWAITING:
+                continue
+            status_counts[AWAITING] -= 1
+            status_counts[status_code] += 1
+            if order.order_type_code == LIMIT:
+                self.settled_limit_orders += 1
+                trader_key = id(order.trader)
+                entry = self.limit_traders[trader_key]
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.limit_traders[trader_key]
+        if self.settled_limit_orders * 2 > len(self.limit_orders):
+            self.limit_orders = [
+                order for order in self.limit_orders if order.status_code == AWAITING
+            ]
+            self.settled_limit_orders = 0
+
+    def record_status_counts(self, series: List["MetricSeries"]):
+        """Append the status counts to ``series`` and forget settled orders."""
+        for status_series, count in zip(series, self.status_counts):
+            status_series.append(count)
+        for status_code in range(len(self.status_counts)):
+            if status_code != AWAITING:
+                self.status_counts[status_code] = 0
+
+    def get_traders(self) -> List[Any]:
+        """Owners of awaiting orders, with repeats."""
+        traders = [
+            order.trader
+            for bucket in self.market_orders.values()
+            for _, order in bucket
+        ]
+        traders.extend(trader for trader, _ in self.limit_traders.values())
+        return traders
+
+    def is_empty(self) -> bool:
+        return not self.status_counts[AWAITING]
@@ -0,0 +1,199 @@
+import json
+import mmap
+import os
+import struct
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+
+if TYPE_CHECKING:
+    from trade_simulator.order.order import Order
+
+MAGIC = b"TSOFLOW1"
+FOOTER_MARKER = b"FOOT"
+END_MARKER = b"TSOFLEND"
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+# One fixed-size record per order. Tokens are codes into the token list of
+# the log, missing values are -1 for integers and NaN for the limit price.
+ORDER_FLOW_DTYPE = np.dtype(
+    [
+        ("step", "<i8"),
+        ("pool_id", "<i8"),
+        ("trader_id", "<i8"),
+        ("operation_type", "u1"),
+        ("order_type", "u1"),
+        ("token", "<i2"),
+        ("second_token", "<i2"),
+        ("priority", "<i4"),
+        ("volume", "<f8"),
+        ("limit_price", "<f8"),
+        ("lifetime", "<i8"),
+    ]
+)
+
+RECORDS_PER_WRITE = 65_536
+
+
+class OrderFlowRecorder:
+    """Append-only binary log of the orders added to pools.
+
+    File layout::
+
+        MAGIC | u32 header length | header json
+        records of ORDER_FLOW_DTYPE*
+        FOOT | footer json | u64 footer length | END_MARKER
+
+    The header holds what a replay needs besides the orders: the starting
+    portfolios of the traders and the order book seeds of the pools. The
+    footer holds the token names the records refer to and the number of
+    steps of the run.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        portfolios: Dict[int, Dict[str, float]],
+        order_book_seeds: Dict[int, int],
+    ):
+        self.path = path
+        self.tokens: List[str] = []
+        # Token name -> token code in the log.
+        self._token_codes: Dict[str, int] = {}
+        self.records: List[tuple] = []
+        header = json.dumps(
+            {
+                "portfolios": {
+                    str(trader_id): {token: float(q) for token, q in portfolio.items()}
+                    for trader_id, portfolio in portfolios.items()
+                },
+                "order_book_seeds": {
+                    str(pool_id): seed for pool_id, seed in order_book_seeds.items()
+                },
+            }
+        ).encode()
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.file.write(_U32.pack(len(header)))
+        self.file.write(header)
+
+    def get_token_code(self, token: Optional[str]) -> int:
+        if token is None:
+            return -1
+        code = self._token_codes.get(token)
+        if code is None:
+            code = self._token_codes[token] = len(self.tokens)
+            self.tokens.append(token)
+        return code
+
+    def record(self, pool_id: int, order: "Order"):
+        trader_id = order.trader.id
+        self.records.append(
+            (
+                order.creation_timestamp,
+                pool_id,
+                -1 if trader_id is None else trader_id,
+                order.operation_type_code,
+                order.order_type_code,
+                self.get_token_code(order.token),
+                self.get_token_code(order.second_token),
+                order.priority,
+                order.token_volume,
+                np.nan if order.limit_price is None else order.limit_price,
+                -1 if order.lifetime is None else order.lifetime,
+            )
+        )
+        if len(self.records) >= RECORDS_PER_WRITE:
+            self.write_records()
+
+    def write_records(self):
+        if self.records:
+            self.file.write(np.array(self.records, dtype=ORDER_FLOW_DTYPE).tobytes())
+            self.records = []
+
+    def __getstate__(self):
+        self.write_records()
+        self.file.flush()
+        state = self.__dict__.copy()
+        state["offset"] = self.file.tell()
+        del state["file"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.file = None
+
+    def reopen(self, path: str):
+        """Continue a recorder restored from a checkpoint, see
+        `MetricsStreamWriter.reopen`."""
+        if path != self.path:
+            with open(self.path, "rb") as source, open(path, "wb") as target:
+                target.write(source.read(self.offset))
+            self.path = path
+        self.file = open(path, "r+b")
+        self.file.truncate(self.offset)
+        self.file.seek(self.offset)
+        del self.offset
+
+    def close(self, steps: int):
+        self.write_records()
+        footer = json.dumps({"tokens": self.tokens, "steps": steps}).encode()
+        self.file.write(FOOTER_MARKER)
+        self.file.write(footer)
+        self.file.write(_U64.pack(len(footer)))
+        self.file.write(END_MARKER)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+
+class OrderFlow:
+    """An order flow log read back, records in the order they were added."""
+
+    def __init__(
+        self,
+        records: np.ndarray,
+        tokens: List[str],
+        steps: int,
+        portfolios: Dict[int, Dict[str, float]],
+        order_book_seeds: Dict[int, int],
+    ):
+        self.records = records
+        self.tokens = tokens
+        self.steps = steps
+        self.portfolios = portfolios
+        self.order_book_seeds = order_book_seeds
+
+
+def read_order_flow(path: str) -> OrderFlow:
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        if data[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an order flow file.")
+        if data[-len(END_MARKER) :] != END_MARKER:
+            raise ValueError(f"{path} is incomplete, the recorded run did not finish.")
+        (header_length,) = _U32.unpack_from(data, len(MAGIC))
+        records_start = len(MAGIC) + _U32.size + header_length
+        header = json.loads(data[len(MAGIC) + _U32.size : records_start])
+
+        footer_end = len(data) - len(END_MARKER) - _U64.size
+        (footer_length,) = _U64.unpack_from(data, footer_end)
+        footer_start = footer_end - footer_length
+        footer = json.loads(data[footer_start:footer_end])
+        records_end = footer_start - len(FOOTER_MARKER)
+        records = np.frombuffer(
+            data[records_start:records_end], dtype=ORDER_FLOW_DTYPE
+        ).copy()
+    return OrderFlow(
+        records,
+        footer["tokens"],
+        footer["steps"],
+        {
+            int(trader_id): portfolio
+            for trader_id, portfolio in header["portfolios"].items()
+        },
+        {int(pool_id): seed for pool_id, seed in header["order_book_seeds"].items()},
+    )
@@ -0,0 +1,79 @@
+import itertools
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+Pair = Tuple[str, str]
+
+
+def get_pair(token_a: str, token_b: str) -> Pair:
+    return (token_a, token_b) if token_a < token_b else (token_b, token_a)
+
+
+class TokenPairIndex:
+    """Ids of the pools holding each pair of tokens.
+
+    Only pairs held by at least two pools are indexed, as a pair can not be
+    arbitraged within a single pool. Pools are looked up by id, so the index
+    stays valid when pools are swapped for proxies or restored.
+    """
+
+    def __init__(self, pools: Dict[int, Any], tokens: Optional[Iterable[str]] = None):
+        tokens = None if tokens is None else set(tokens)
+        pool_ids_by_pair: Dict[Pair, List[int]] = {}
+        for pool_id, pool in pools.items():
+            pool_tokens = sorted(
+                token for token in pool.tokens_info if tokens is None or token in tokens
+            )
+            for pair in itertools.combinations(pool_tokens, 2):
+                pool_ids_by_pair.setdefault(pair, []).append(pool_id)
+        self.pool_ids_by_pair = {
+            pair: pool_ids
+            for pair, pool_ids in pool_ids_by_pair.items()
+            if len(pool_ids) > 1
+        }
+
+        # Indexed pairs of every pool by token, to find the pairs touched by
+        # a change of one reserve without going over all pairs of the pool.
+        self.pairs_by_pool: Dict[int, Dict[str, List[Pair]]] = {}
+        for pair, pool_ids in self.pool_ids_by_pair.items():
+            for pool_id in pool_ids:
+                pairs_by_token = self.pairs_by_pool.setdefault(pool_id, {})
+                for token in pair:
+                    pairs_by_token.setdefault(token, []).append(pair)
+        # `tokens_info_version` and reserves of every pool as of the last
+        # `pop_changed_pairs`.
+        self.versions: Dict[int, Optional[int]] = {
+            pool_id: None for pool_id in self.pairs_by_pool
+        }
+        self.reserves: Dict[int, Dict[str, float]] = {
+            pool_id: {} for pool_id in self.pairs_by_pool
+        }
+
+    def get_pairs(self) -> List[Pair]:
+        return sorted(self.pool_ids_by_pair)
+
+    def get_pool_ids(self, token_a: str, token_b: str) -> List[int]:
+        return self.pool_ids_by_pair.get(get_pair(token_a, token_b), [])
+
+    def get_tokens_by_pool(self) -> Dict[int, Set[str]]:
+        return {
+            pool_id: set(pairs_by_token)
+            for pool_id, pairs_by_token in self.pairs_by_pool.items()
+        }
+
+    def pop_changed_pairs(self, pools: Dict[int, Any]) -> Set[Pair]:
+        """Pairs with a reserve changed in any of their pools since the last
+        call, every pair on the first call."""
+        changed = set()
+        for pool_id, pairs_by_token in self.pairs_by_pool.items():
+            pool = pools[pool_id]
+            version = pool.tokens_info_version
+            if self.versions[pool_id] == version:
+                continue
+            self.versions[pool_id] = version
+            reserves = self.reserves[pool_id]
+            for token, pairs in pairs_by_token.items():
+                reserve = pool.tokens_info[token]
+                if reserves.get(token) != reserve:
+                    reserves[token] = reserve
+                    changed.update(pairs)
+        return changed
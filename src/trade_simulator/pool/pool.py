@@ -1,10 +1,17 @@
-from typing import Any, Dict, List, Union
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
 
 from trade_simulator.amm_agents.basic_amm import AMM
 from trade_simulator.amm_agents.uniswap_amm import UniswapAMM
+from trade_simulator.amm_agents.uniswap_ensemble_amm import UniswapEnsembleAMM
 from trade_simulator.amm_agents.mariana_amm import MarianaAMM
 from trade_simulator.order.order import Order
-from trade_simulator.utils.consts import ORDER_OPERATION_STATUSES
+from trade_simulator.order.order_book import OrderBook
+from trade_simulator.order.order_flow import OrderFlowRecorder
+from trade_simulator.utils.consts import LIMIT, ORDER_OPERATION_STATUSES
+from trade_simulator.utils.metrics import MetricsRecorder
 
 
 class Pool:
@@ -14,25 +21,83 @@ class Pool:
         self.steps_to_check_orderbook = kwargs["steps_to_check_orderbook"]
         self.last_timestamp_to_check_orderbook = kwargs["step_to_start_simulation"]
 
-        self.tokens_info = self.create_tokens_pool(kwargs["tokens"])
-        self.order_book: List[Order] = []
+        self._tokens_info = self.create_tokens_pool(kwargs["tokens"])
+        # Read-only view of the reserves. They only change through
+        # `swap_reserves` and `set_reserves`, which bump
+        # `tokens_info_version`, the version AMM prices are cached for.
+        self.tokens_info = MappingProxyType(self._tokens_info)
+        self.tokens_info_version = 0
 
-        self.metrics = {
-            "total_number_of_unique_orders": 0,
-            "number_of_orders_in_order_book": [],
-            "portfolio": {},
-        }
+        # Number of steps the metric buffers have to hold before they are
+        # exported or drained to a metrics stream.
+        metrics_buffer_steps = kwargs.get("metrics_buffer_steps")
+        self.metrics_recorder = MetricsRecorder(
+            None if metrics_buffer_steps is None else metrics_buffer_steps + 1,
+            cadence=kwargs.get("metrics_cadence"),
+        )
+        self.total_number_of_unique_orders = 0
+        self.metrics_recorder.register("number_of_orders_in_order_book", dtype=np.int64)
+        self.portfolio_series = [
+            self.metrics_recorder.register("portfolio", token)
+            for token in self.tokens_info.keys()
+        ]
         self.amm_agent = self.generate_amm(kwargs["amm_settings"])
+        self.order_book = OrderBook(self.amm_agent.rng.getrandbits(64))
+        # Set by the simulation when the order flow is recorded.
+        self.order_flow_recorder: Optional[OrderFlowRecorder] = None
+
+        # The order book is cleaned twice per step, see `execute_orders`.
+        self.status_count_series = [
+            self.metrics_recorder.register(
+                f"number_of_{status}_orders_in_order_book",
+                dtype=np.int64,
+                capacity=2 * self.metrics_recorder.capacity,
+                per_step=False,
+            )
+            for status in ORDER_OPERATION_STATUSES
+        ]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["tokens_info"]
+        return state
 
-        for token in self.tokens_info.keys():
-            self.metrics["portfolio"][token] = []
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.tokens_info = MappingProxyType(self._tokens_info)
 
-        for status in ORDER_OPERATION_STATUSES:
-            self.metrics[f"number_of_{status}_orders_in_order_book"] = []
+    def swap_reserves(
+        self, token_in: str, amount_in: float, token_out: str, amount_out: float
+    ):
+        """Add ``amount_in`` of ``token_in`` to the reserves and take
+        ``amount_out`` of ``token_out`` out of them."""
+        tokens_info = self._tokens_info
+        tokens_info[token_in] += amount_in
+        tokens_info[token_out] -= amount_out
+        self.tokens_info_version += 1
+
+    def set_reserves(self, reserves: Dict[str, float]):
+        self._tokens_info.update(reserves)
+        self.tokens_info_version += 1
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "total_number_of_unique_orders": self.total_number_of_unique_orders,
+            **self.metrics_recorder.views(),
+        }
+
+    def export_metrics(self) -> Dict[str, Any]:
+        return {
+            "total_number_of_unique_orders": self.total_number_of_unique_orders,
+            **self.metrics_recorder.export(),
+        }
 
     def generate_amm(self, amm_settings: Dict[str, Any]) -> AMM:
         if amm_settings["type"] == "UniswapV2":
             return UniswapAMM(self, **amm_settings)
+        elif amm_settings["type"] == "UniswapV2Ensemble":
+            return UniswapEnsembleAMM(self, **amm_settings)
         elif amm_settings["type"] == "Mariana":
             return MarianaAMM(self, **amm_settings)
 
@@ -52,9 +117,40 @@ class Pool:
             self.amm_agent.execute_orders(timestamp)
             self.last_timestamp_to_check_orderbook = timestamp
         self.amm_agent.clean_order_book()
-        for token in self.tokens_info.keys():
-            self.metrics["portfolio"][token].append(self.tokens_info[token])
+        for series, quantity in zip(self.portfolio_series, self.tokens_info.values()):
+            series.append(quantity)
+
+    def is_idle(self) -> bool:
+        # Limit orders are kept in the order book too.
+        return self.order_book.is_empty()
+
+    def get_traders_with_orders(self) -> List[Any]:
+        return self.order_book.get_traders()
+
+    def fill_idle_steps(self, first_timestamp: int, number_of_steps: int):
+        """Write the metrics of ``number_of_steps`` steps without orders at
+        once, the same values `execute_orders` would write one by one."""
+        for series, quantity in zip(self.portfolio_series, self.tokens_info.values()):
+            series.append_repeated(quantity, number_of_steps)
+        for series in self.status_count_series:
+            series.append_repeated(0, 2 * number_of_steps)
+        self.amm_agent.write_idle_metrics(number_of_steps)
+        self.last_timestamp_to_check_orderbook = first_timestamp + number_of_steps - 1
 
     def add_order(self, order: Order):
-        self.order_book.append(order)
-        self.metrics["total_number_of_unique_orders"] += 1
+        if self.order_flow_recorder is not None:
+            self.order_flow_recorder.record(self.id, order)
+        self.order_book.add(order)
+        self.total_number_of_unique_orders += 1
+        if order.order_type_code == LIMIT:
+            self.amm_agent.add_limit_order(order)
+
+    def add_orders(self, orders: List[Order]):
+        self.total_number_of_unique_orders += len(orders)
+        if self.order_flow_recorder is not None:
+            for order in orders:
+                self.order_flow_recorder.record(self.id, order)
+        for order in orders:
+            self.order_book.add(order)
+            if order.order_type_code == LIMIT:
+                self.amm_agent.add_limit_order(order)
@@ -0,0 +1,31 @@
+import argparse
+
+from trade_simulator.sweep.sweep import run_sweep
+from trade_simulator.utils.utils import read_settings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Run a parameter sweep of the trade simulator."
+    )
+    parser.add_argument("--config", default="simulation.yaml")
+    parser.add_argument("--sweep", default="sweep.yaml")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Worker processes for the runs, defaults to the CPU count.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("Sweep started.")
+
+    results = run_sweep(
+        read_settings(args.config),
+        read_settings(args.sweep),
+        processes=args.processes,
+    )
+    print(results.to_string(index=False))
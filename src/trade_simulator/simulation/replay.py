@@ -0,0 +1,104 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from trade_simulator.order.order import Order
+from trade_simulator.order.order_flow import OrderFlow
+from trade_simulator.pool.pool import Pool
+from trade_simulator.utils.consts import ORDER_OPERATION_TYPES, ORDER_TYPES
+from trade_simulator.utils.utils import check_pools_settings
+
+
+class ReplayTrader:
+    """Stand-in for a recorded trader, holding only its id and a portfolio
+    that starts from the recorded one."""
+
+    def __init__(self, trader_id: int, portfolio: Dict[str, float]):
+        self.id = trader_id
+        self.type = "ReplayTrader"
+        self.portfolio = dict(portfolio)
+
+
+def replay_order_flow(
+    order_flow: OrderFlow,
+    pools_settings: Dict[str, Any],
+    steps: Optional[int] = None,
+) -> Dict[int, Pool]:
+    """Feed a recorded order flow into fresh pools built from
+    ``pools_settings``, without building any agents.
+
+    Orders are added at the step they were created at, in the order they
+    were recorded, and pools execute them exactly as in `Simulation.run`.
+    The pools keep the order book seeds of the recorded run, so the same
+    ``pools_settings`` reproduce its pool metrics and other AMM settings
+    show how they would have handled the same orders. Traders do not react
+    to the new prices: an order they can not pay for any more fails.
+    """
+    check_pools_settings(pools_settings)
+    if steps is None:
+        steps = order_flow.steps
+    pools = {
+        pool_settings["id"]: Pool(metrics_buffer_steps=steps, **pool_settings)
+        for pool_settings in pools_settings["pools"]
+    }
+    for pool_id, seed in order_flow.order_book_seeds.items():
+        if pool_id in pools:
+            pools[pool_id].order_book.seed = seed
+    traders = {
+        trader_id: ReplayTrader(trader_id, portfolio)
+        for trader_id, portfolio in order_flow.portfolios.items()
+    }
+
+    records = order_flow.records
+    # Records are in the order they were added, so by step.
+    bounds = np.searchsorted(records["step"], np.arange(steps + 1)).tolist()
+    tokens = order_flow.tokens
+    step = 0
+    while step < steps:
+        if bounds[step] == bounds[step + 1] and all(
+            pool.is_idle() for pool in pools.values()
+        ):
+            idle_until = min(get_next_order_step(bounds, step), steps)
+            for pool in pools.values():
+                pool.fill_idle_steps(step, idle_until - step)
+            step = idle_until
+            continue
+        for pool in pools.values():
+            pool.execute_orders(step)
+        for record in records[bounds[step] : bounds[step + 1]].tolist():
+            (
+                _,
+                pool_id,
+                trader_id,
+                operation_type_code,
+                order_type_code,
+                token,
+                second_token,
+                priority,
+                volume,
+                limit_price,
+                lifetime,
+            ) = record
+            order = Order(
+                traders[trader_id],
+                step,
+                ORDER_OPERATION_TYPES[operation_type_code],
+                tokens[token],
+                volume,
+                priority=priority,
+                lifetime=None if lifetime < 0 else lifetime,
+                order_type=ORDER_TYPES[order_type_code],
+                limit_price=None if limit_price != limit_price else limit_price,
+                second_token=None if second_token < 0 else tokens[second_token],
+            )
+            pools[pool_id].add_order(order)
+        for pool in pools.values():
+            pool.amm_agent.write_metrics()
+        step += 1
+    return pools
+
+
+def get_next_order_step(bounds, step: int) -> int:
+    """First step after ``step`` with recorded orders, ``len(bounds) - 1`` if
+    there is none."""
+    return int(np.searchsorted(bounds, bounds[step], side="right")) - 1
@@ -0,0 +1,35 @@
+import heapq
+from typing import Any, List, Optional
+
+
+class AgentScheduler:
+    """Min-heap of actors keyed by the next step they have to act at.
+
+    Actors report that step through ``get_next_action_step`` after acting,
+    so agents waiting for ``steps_to_make_new_transaction`` are not called
+    in between.
+    """
+
+    def __init__(self, actors: List[Any], timestamp: int):
+        self.heap = []
+        self._sequence = 0
+        for actor in actors:
+            self.push(actor, timestamp)
+
+    def push(self, actor, timestamp: int):
+        heapq.heappush(self.heap, (timestamp, self._sequence, actor))
+        self._sequence += 1
+
+    def get_next_step(self) -> Optional[int]:
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, timestamp: int) -> List[Any]:
+        due = []
+        while self.heap and self.heap[0][0] <= timestamp:
+            due.append(heapq.heappop(self.heap)[-1])
+        return due
+
+
+def get_trader_actor(trader):
+    """The actor stepping ``trader``: its population or the agent itself."""
+    return getattr(trader, "population", trader)
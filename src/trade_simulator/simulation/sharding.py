@@ -0,0 +1,273 @@
+import copy
+import multiprocessing
+from types import MappingProxyType
+from typing import Any, Dict, List, Tuple
+
+from trade_simulator.order.order import Order
+from trade_simulator.pool.pool import Pool
+
+
+class PoolProxy:
+    """Coordinator side stand-in for a pool that lives in a shard worker.
+
+    Prices come from reserves synced at every barrier, orders are kept
+    until they are sent to the worker with the next window of steps.
+    """
+
+    def __init__(self, pool: Pool):
+        self.id = pool.id
+        self.name = pool.name
+        self._tokens_info = dict(pool.tokens_info)
+        self.tokens_info = MappingProxyType(self._tokens_info)
+        self.tokens_info_version = 0
+        self.amm_agent = copy.copy(pool.amm_agent)
+        self.amm_agent.pool = self
+        self.amm_agent.reset_price_cache()
+        self.pending_orders: List[Order] = []
+
+    def set_reserves(self, reserves: Dict[str, float]):
+        self._tokens_info.update(reserves)
+        self.tokens_info_version += 1
+
+    def add_order(self, order: Order):
+        self.pending_orders.append(order)
+
+    def add_orders(self, orders: List[Order]):
+        self.pending_orders.extend(orders)
+
+
+class RemoteTrader:
+    """Worker side stand-in for a coordinator agent trading in the shard.
+
+    Holds only the part of the agent's portfolio the shard may change.
+    """
+
+    def __init__(self, agent_id: int, agent_type: str, tokens: List[str]):
+        self.id = agent_id
+        self.type = agent_type
+        self.portfolio = {token: 0.0 for token in tokens}
+
+
+def get_actor_pool_ids(actor) -> List[int]:
+    return list(actor.pools.keys())
+
+
+def partition_pools(
+    pools: Dict[int, Pool], actors: List[Any], number_of_shards: int
+) -> List[List[int]]:
+    """Split pool ids into at most ``number_of_shards`` shards.
+
+    Pools an agent trades the same token in are kept in one shard, so the
+    part of a portfolio a shard changes is never changed by another shard.
+    Groups of pools are spread over the shards by number of bound agents.
+    """
+    parent = {pool_id: pool_id for pool_id in pools}
+
+    def find(pool_id):
+        while parent[pool_id] != pool_id:
+            parent[pool_id] = parent[parent[pool_id]]
+            pool_id = parent[pool_id]
+        return pool_id
+
+    weights = {pool_id: 1 for pool_id in pools}
+    for actor in actors:
+        pool_ids = get_actor_pool_ids(actor)
+        if len(pool_ids) == 1:
+            weights[pool_ids[0]] += len(getattr(actor, "members", [actor]))
+            continue
+        tokens_by_pool = actor.get_traded_tokens_by_pool()
+        for i, first in enumerate(pool_ids):
+            for second in pool_ids[i + 1 :]:
+                if tokens_by_pool.get(first, set()) & tokens_by_pool.get(second, set()):
+                    parent[find(first)] = find(second)
+
+    groups: Dict[int, List[int]] = {}
+    for pool_id in pools:
+        groups.setdefault(find(pool_id), []).append(pool_id)
+    shards = [[] for _ in range(min(number_of_shards, len(groups)))]
+    shard_weights = [0] * len(shards)
+    for group in sorted(
+        groups.values(), key=lambda group: -sum(weights[i] for i in group)
+    ):
+        lightest = shard_weights.index(min(shard_weights))
+        shards[lightest].extend(group)
+        shard_weights[lightest] += sum(weights[i] for i in group)
+    return [sorted(shard) for shard in shards]
+
+
+def add_remote_orders(pools, remote_traders, orders):
+    for pool_id, trader_id, state in orders:
+        order = Order.__new__(Order)
+        order.__setstate__(state)
+        order.trader = remote_traders[trader_id]
+        pools[pool_id].add_order(order)
+
+
+def run_shard_worker(connection):
+    pools, actors, remote_traders = connection.recv()
+    while True:
+        message = connection.recv()
+        if message[0] == "close":
+            # Orders placed at the last step are added but never executed,
+            # as in the single process loop.
+            add_remote_orders(pools, remote_traders, message[1])
+            connection.send((pools, actors))
+            connection.close()
+            return
+
+        _, first_step, last_step, orders, portfolios = message
+        for trader_id, portfolio in portfolios.items():
+            remote_traders[trader_id].portfolio.update(portfolio)
+        add_remote_orders(pools, remote_traders, orders)
+
+        for step in range(first_step, last_step):
+            for pool in pools.values():
+                pool.execute_orders(step)
+            for actor in actors:
+                actor.complete_agent_action(step)
+            for pool in pools.values():
+                pool.amm_agent.write_metrics()
+
+        connection.send(
+            (
+                {pool_id: dict(pool.tokens_info) for pool_id, pool in pools.items()},
+                {
+                    trader_id: trader.portfolio
+                    for trader_id, trader in remote_traders.items()
+                },
+            )
+        )
+
+
+class ShardedExecution:
+    """Runs pools and the agents bound to them in worker processes.
+
+    Agents spanning several shards stay on the coordinator and trade through
+    `PoolProxy` objects. Workers run a window of steps at a time. At the
+    barrier that ends a window, reserves and the coordinator agents' shard
+    portfolios are synced back, the coordinator agents act for each step of
+    the window and their orders go to the workers with the next window.
+    With a window of one step this is the same as the single process loop.
+    """
+
+    def __init__(self, pools: Dict[int, Pool], actors: List[Any], processes: int):
+        self.pools = pools
+        self.actors = actors
+        shards = partition_pools(pools, actors, processes)
+        shard_by_pool = {
+            pool_id: shard_index
+            for shard_index, shard in enumerate(shards)
+            for pool_id in shard
+        }
+
+        self.coordinator_actors = []
+        shard_actors = [[] for _ in shards]
+        for actor in actors:
+            actor_shards = {shard_by_pool[i] for i in get_actor_pool_ids(actor)}
+            if len(actor_shards) == 1:
+                shard_actors[actor_shards.pop()].append(actor)
+            else:
+                self.coordinator_actors.append(actor)
+
+        self.proxies = {pool_id: PoolProxy(pool) for pool_id, pool in pools.items()}
+        # (trader id -> tokens) each shard may change, per shard.
+        self.remote_tokens: List[Dict[int, List[str]]] = [{} for _ in shards]
+        remote_traders = [{} for _ in shards]
+        for actor in self.coordinator_actors:
+            for pool_id, tokens in actor.get_traded_tokens_by_pool().items():
+                shard_index = shard_by_pool[pool_id]
+                owned = self.remote_tokens[shard_index].setdefault(actor.id, [])
+                owned.extend(sorted(set(tokens) - set(owned)))
+                remote_traders[shard_index][actor.id] = RemoteTrader(
+                    actor.id, actor.type, owned
+                )
+            for pool_id in actor.pools:
+                actor.pools[pool_id] = self.proxies[pool_id]
+
+        self.shards = shards
+        self.shard_actors = shard_actors
+        self.connections = []
+        self.processes = []
+        # Workers get their state through the pipe, so nothing relies on
+        # fork and the progress bar thread of the parent is not inherited.
+        context = multiprocessing.get_context("spawn")
+        for shard, actors_of_shard, traders in zip(
+            shards, shard_actors, remote_traders
+        ):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=run_shard_worker, args=(worker_connection,), daemon=True
+            )
+            process.start()
+            connection.send(
+                (
+                    {pool_id: pools[pool_id] for pool_id in shard},
+                    actors_of_shard,
+                    traders,
+                )
+            )
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def take_pending_orders(self, shard: List[int]) -> List[Tuple[int, int, Dict]]:
+        """Coordinator orders for a shard as (pool id, trader id, order state)."""
+        orders = []
+        for pool_id in shard:
+            proxy = self.proxies[pool_id]
+            for order in proxy.pending_orders:
+                state = order.__getstate__()
+                del state["trader"]
+                orders.append((pool_id, order.trader.id, state))
+            proxy.pending_orders = []
+        return orders
+
+    def run_steps(self, first_step: int, last_step: int):
+        agents_by_id = {actor.id: actor for actor in self.coordinator_actors}
+        for shard, connection, remote_tokens in zip(
+            self.shards, self.connections, self.remote_tokens
+        ):
+            orders = self.take_pending_orders(shard)
+            portfolios = {
+                trader_id: {
+                    token: agents_by_id[trader_id].portfolio[token] for token in tokens
+                }
+                for trader_id, tokens in remote_tokens.items()
+            }
+            connection.send(("run", first_step, last_step, orders, portfolios))
+
+        for connection in self.connections:
+            reserves, portfolios = connection.recv()
+            for pool_id, tokens_info in reserves.items():
+                self.proxies[pool_id].set_reserves(tokens_info)
+            for trader_id, portfolio in portfolios.items():
+                agents_by_id[trader_id].portfolio.update(portfolio)
+
+        for step in range(first_step, last_step):
+            for actor in self.coordinator_actors:
+                actor.complete_agent_action(step)
+
+    def close(self) -> Tuple[Dict[int, Pool], List[Any]]:
+        """Stop the workers and return the pools and actors they ran.
+
+        Actors keep their position in the original actors list and the
+        coordinator agents are bound to the returned pools again.
+        """
+        for shard, connection in zip(self.shards, self.connections):
+            connection.send(("close", self.take_pending_orders(shard)))
+        pools = {}
+        returned_actors = {}
+        for connection, process, actors_of_shard in zip(
+            self.connections, self.processes, self.shard_actors
+        ):
+            shard_pools, shard_actors = connection.recv()
+            process.join()
+            pools.update(shard_pools)
+            for original, returned in zip(actors_of_shard, shard_actors):
+                returned_actors[id(original)] = returned
+
+        pools = {pool_id: pools[pool_id] for pool_id in self.pools}
+        for actor in self.coordinator_actors:
+            for pool_id in actor.pools:
+                actor.pools[pool_id] = pools[pool_id]
+        actors = [returned_actors.get(id(actor), actor) for actor in self.actors]
+        return pools, actors
@@ -1,69 +1,556 @@
+import contextlib
+import gzip
 import json
 import os
+import pickle
 import random
 import shutil
+import struct
+import time
+from typing import Any, Dict, List, Optional
 
-from tqdm import tqdm
+import numpy as np
 
+from trade_simulator.agents.cross_pool_arbitrageur import CrossPoolArbitrageur
 from trade_simulator.agents.simple_market_maker import SimpleMarketMaker
 from trade_simulator.agents.single_pool_foolish_random_trader import (
     SinglePoolFoolishRandomTrader,
 )
+from trade_simulator.agents.single_pool_foolish_random_trader_population import (
+    SinglePoolFoolishRandomTraderPopulation,
+)
+from trade_simulator.agents.trade_feed_trader import TradeFeedTrader
+from trade_simulator.order.order_flow import OrderFlowRecorder
 from trade_simulator.pool.pool import Pool
+from trade_simulator.simulation.scheduler import AgentScheduler, get_trader_actor
+from trade_simulator.simulation.sharding import ShardedExecution
+from trade_simulator.utils.consts import (
+    CHECKPOINT_VERSION,
+    DEFAULT_BARRIER_EVERY_STEPS,
+    DEFAULT_FLUSH_METRICS_EVERY_STEPS,
+    DEFAULT_PLOTS_SAMPLE_SIZE,
+    DEFAULT_TELEMETRY_BUFFER_SIZE,
+    DEFAULT_TELEMETRY_EVERY_STEPS,
+    EXECUTION_MODES,
+    METRICS_OUTPUT_MODES,
+    PLOTS_MODES,
+)
+from trade_simulator.utils.metrics_stream import MetricsStreamWriter
 from trade_simulator.utils.plots import (
-    plot_agent_balance,
-    plot_pair_balance,
-    plot_pool_balace,
-    plot_k,
-    plot_profit_from_fees,
-    plot_agent_orders,
+    PlotJob,
+    agent_balance_job,
+    agent_orders_job,
+    k_job,
+    pair_balance_job,
+    pool_balance_job,
+    profit_from_fees_jobs,
+    render_plot_jobs,
 )
-from trade_simulator.utils.utils import check_pools_settings
+from trade_simulator.utils.profiler import SimulationProfiler
+from trade_simulator.utils.results_store import ResultsStoreWriter, get_block_rows
+from trade_simulator.utils.progress import progress_bar
+from trade_simulator.utils.telemetry import TelemetryServer
+from trade_simulator.utils.utils import check_metrics_cadence, check_pools_settings
+
+
+# Checkpoints start with the magic and the u32 version, uncompressed, so a
+# checkpoint of another version is rejected before any state is unpickled.
+CHECKPOINT_MAGIC = b"TSCKPT01"
+_U32 = struct.Struct("<I")
 
 
 class Simulation:
-    def __init__(self, **kwargs):
-        self.simulation_build_args = kwargs["simulation"]
-        self.steps = self.simulation_build_args["steps_of_simulation"]
-        self.simulation_meta_args = kwargs["meta_info"]
+    def __init__(
+        self,
+        plots: str = "all",
+        plots_sample_size: int = DEFAULT_PLOTS_SAMPLE_SIZE,
+        plot_processes: Optional[int] = None,
+        progress: bool = True,
+        profile: bool = False,
+        **kwargs,
+    ):
+        if plots not in PLOTS_MODES:
+            raise ValueError(f"Unsupported plots mode {plots}.")
+        self.plots = plots
+        self.plots_sample_size = plots_sample_size
+        self.plot_processes = plot_processes
+        self.progress = progress
+        self.profiler = SimulationProfiler() if profile else None
+
+        self.current_step = 0
+        self.scheduler = None
+        self.read_settings(kwargs)
 
         self.prepare_experiment_environment()
         self.create_pools()
         self.create_agents()
+        self.create_metrics_stream()
+        self.create_order_flow_recorder()
+
+    def read_settings(self, settings: Dict[str, Any]):
+        self.simulation_build_args = settings["simulation"]
+        self.steps = self.simulation_build_args["steps_of_simulation"]
+        self.simulation_meta_args = settings["meta_info"]
+
+        metrics_output = self.simulation_build_args.get("metrics_output", {})
+        self.metrics_output_mode = metrics_output.get("mode", "json")
+        if self.metrics_output_mode not in METRICS_OUTPUT_MODES:
+            raise ValueError(
+                f"Unsupported metrics output mode {self.metrics_output_mode}."
+            )
+        self.flush_metrics_every_steps = metrics_output.get(
+            "flush_every_steps", DEFAULT_FLUSH_METRICS_EVERY_STEPS
+        )
+
+        self.metrics_cadence = self.simulation_build_args.get("metrics_cadence", {})
+        check_metrics_cadence(self.metrics_cadence)
+
+        checkpoints = self.simulation_build_args.get("checkpoints", {})
+        self.checkpoint_every_steps = checkpoints.get("every_steps")
+        self.checkpoint_at_steps = set(checkpoints.get("at_steps", []))
+
+        execution = self.simulation_build_args.get("execution", {})
+        self.execution_mode = execution.get("mode", "single")
+        if self.execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unsupported execution mode {self.execution_mode}.")
+        self.execution_processes = execution.get("processes", os.cpu_count() or 1)
+        self.barrier_every_steps = execution.get(
+            "barrier_every_steps", DEFAULT_BARRIER_EVERY_STEPS
+        )
+        if self.barrier_every_steps < 1:
+            raise ValueError(
+                f"Parameter 'barrier_every_steps' has to be more or equal to 1, got {self.barrier_every_steps}."
+            )
+        if self.execution_mode == "sharded" and (
+            self.metrics_output_mode == "stream" or checkpoints
+        ):
+            raise ValueError(
+                "Sharded execution does not support metrics streaming and checkpoints."
+            )
+        if self.execution_mode == "sharded" and self.profiler is not None:
+            raise ValueError("Sharded execution does not support profiling.")
+
+        self.telemetry_settings = self.simulation_build_args.get("telemetry")
+        if self.telemetry_settings is not None:
+            if self.execution_mode == "sharded":
+                raise ValueError("Sharded execution does not support telemetry.")
+            self.telemetry_every_steps = self.telemetry_settings.get(
+                "every_steps", DEFAULT_TELEMETRY_EVERY_STEPS
+            )
+            if self.telemetry_every_steps < 1:
+                raise ValueError(
+                    f"Parameter 'every_steps' has to be more or equal to 1, got {self.telemetry_every_steps}."
+                )
+
+        self.record_order_flow = self.simulation_build_args.get(
+            "order_flow", {}
+        ).get("record", False)
+        if self.execution_mode == "sharded" and self.record_order_flow:
+            raise ValueError("Sharded execution does not support order flow recording.")
 
     def run(self):
-        for step in tqdm(range(self.steps)):
-            for pool_id in self.pools.keys():
-                self.pools[pool_id].execute_orders(step)
-            random.shuffle(self.agents)
-            for agent in self.agents:
-                agent.complete_agent_action(step)
-            for pool in self.pools.values():
-                pool.amm_agent.write_metrics()
+        if self.execution_mode == "sharded":
+            self.run_sharded()
+            return
+        if self.scheduler is None:
+            self.scheduler = AgentScheduler(self.actors, self.current_step)
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.attach(self)
+            started_at = time.perf_counter()
+        with self.start_telemetry() as telemetry, progress_bar(
+            initial=self.current_step, total=self.steps, disable=not self.progress
+        ) as progress:
+            while self.current_step < self.steps:
+                step = self.current_step
+                idle_until = self.get_idle_until(step)
+                if idle_until > step:
+                    for pool in self.pools.values():
+                        pool.fill_idle_steps(step, idle_until - step)
+                    self.current_step = idle_until
+                else:
+                    self.run_step(step)
+                    self.current_step = step + 1
+                progress.update(self.current_step - step)
+
+                if (
+                    telemetry is not None
+                    and self.current_step // self.telemetry_every_steps
+                    > step // self.telemetry_every_steps
+                ):
+                    self.publish_telemetry(telemetry, self.current_step - 1)
+                if (
+                    self.metrics_stream is not None
+                    and self.current_step % self.flush_metrics_every_steps == 0
+                ):
+                    with self.profile_phase("flush_metrics_stream"):
+                        self.flush_metrics_stream(self.current_step - 1)
+                if self.is_checkpoint_step(self.current_step):
+                    with self.profile_phase("save_checkpoint"):
+                        self.save_checkpoint(
+                            self.get_checkpoint_path(self.current_step)
+                        )
+                if profiler is not None:
+                    profiler.on_step(step, self.current_step)
+        for actor in self.actors:
+            actor.pad_metrics(self.steps)
+        if profiler is not None:
+            profiler.detach(self)
+        with self.profile_phase("save_metrics"):
+            self.save_metrics_after_simulation()
+        if profiler is not None:
+            profiler.finish(self.current_step, time.perf_counter() - started_at)
+            path = f"{self.experiment_logs_path}/profile.json"
+            profiler.write_report(path)
+            print(f"Profile was written to {path}.")
+
+    @contextlib.contextmanager
+    def start_telemetry(self):
+        """Serve sampled metrics while the run goes on, see `TelemetryServer`.
+
+        The server lives only as long as the run, it is not checkpointed.
+        """
+        if self.telemetry_settings is None:
+            yield None
+            return
+        telemetry = TelemetryServer(
+            self.get_telemetry_sources(),
+            host=self.telemetry_settings.get("host", "127.0.0.1"),
+            port=self.telemetry_settings.get("port", 0),
+            unix_socket=self.telemetry_settings.get("unix_socket"),
+            buffer_size=self.telemetry_settings.get(
+                "buffer_size", DEFAULT_TELEMETRY_BUFFER_SIZE
+            ),
+        )
+        telemetry.start()
+        print(f"Telemetry is served at {telemetry.address}.")
+        try:
+            yield telemetry
+        finally:
+            telemetry.stop()
+
+    def get_telemetry_series(self, pool: Pool) -> Dict[str, Any]:
+        # Fee timestamps only say when a fee was last taken.
+        return {
+            "/".join(path): series
+            for path, series in pool.metrics_recorder.series.items()
+            if path[-1] != "timestamp"
+        }
+
+    def get_telemetry_sources(self) -> Dict[str, List[str]]:
+        sources = {}
+        for pool_id, pool in self.pools.items():
+            sources[f"pool_{pool_id}"] = list(self.get_telemetry_series(pool))
+        for actor in self.actors:
+            if isinstance(actor, SinglePoolFoolishRandomTraderPopulation):
+                sources[self.get_metrics_stream_name(actor)] = [
+                    f"mean_portfolio/{token}" for token in actor.tokens
+                ]
+        return sources
+
+    def publish_telemetry(self, telemetry: TelemetryServer, step: int):
+        rows = {}
+        for pool_id, pool in self.pools.items():
+            rows[f"pool_{pool_id}"] = [
+                series.last() if len(series) else np.nan
+                for series in self.get_telemetry_series(pool).values()
+            ]
+        for actor in self.actors:
+            if isinstance(actor, SinglePoolFoolishRandomTraderPopulation):
+                rows[self.get_metrics_stream_name(actor)] = actor.portfolios.mean(
+                    axis=0
+                )
+        telemetry.publish(step, rows)
+
+    def profile_phase(self, name: str):
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.phase(name)
+
+    def run_step(self, step: int):
+        # Agents only record metrics when they act or when a pool may change
+        # their portfolio. The steps they skipped are padded with the
+        # portfolio they had before that, see `pad_metrics`.
+        touched = {}
+        for pool in self.pools.values():
+            for trader in pool.get_traders_with_orders():
+                actor = get_trader_actor(trader)
+                touched[id(actor)] = actor
+        for actor in touched.values():
+            actor.pad_metrics(step)
+
+        for pool in self.pools.values():
+            pool.execute_orders(step)
+
+        due = self.scheduler.pop_due(step)
+        random.shuffle(due)
+        for actor in due:
+            actor.pad_metrics(step)
+            actor.complete_agent_action(step)
+            self.scheduler.push(actor, actor.get_next_action_step(step))
+            touched.pop(id(actor), None)
+        for actor in touched.values():
+            actor.update_metrics()
+
+        for pool in self.pools.values():
+            pool.amm_agent.write_metrics()
+
+    def get_idle_until(self, step: int) -> int:
+        """End of the run of steps from ``step`` in which no agent is due and
+        no pool has orders, ``step`` itself if there is nothing to skip."""
+        next_step = self.scheduler.get_next_step()
+        if next_step is not None and next_step <= step:
+            return step
+        if not all(pool.is_idle() for pool in self.pools.values()):
+            return step
+        idle_until = self.steps if next_step is None else min(next_step, self.steps)
+        if self.metrics_stream is not None:
+            flush = self.flush_metrics_every_steps
+            idle_until = min(idle_until, (step // flush + 1) * flush)
+        next_checkpoint_step = self.get_next_checkpoint_step(step)
+        if next_checkpoint_step is not None:
+            idle_until = min(idle_until, next_checkpoint_step)
+        return idle_until
+
+    def run_sharded(self):
+        execution = ShardedExecution(self.pools, self.actors, self.execution_processes)
+        with progress_bar(
+            initial=self.current_step, total=self.steps, disable=not self.progress
+        ) as progress:
+            for first_step in range(
+                self.current_step, self.steps, self.barrier_every_steps
+            ):
+                last_step = min(first_step + self.barrier_every_steps, self.steps)
+                execution.run_steps(first_step, last_step)
+                self.current_step = last_step
+                progress.update(last_step - first_step)
+
+        self.pools, self.actors = execution.close()
+        for actor in self.actors:
+            for agent in getattr(actor, "members", [actor]):
+                self.agents[agent.id] = agent
         self.save_metrics_after_simulation()
 
+    def get_next_checkpoint_step(self, step: int) -> Optional[int]:
+        steps = [at_step for at_step in self.checkpoint_at_steps if at_step > step]
+        if self.checkpoint_every_steps is not None:
+            every = self.checkpoint_every_steps
+            steps.append((step // every + 1) * every)
+        return min(steps, default=None)
+
+    def is_checkpoint_step(self, step: int) -> bool:
+        if step in self.checkpoint_at_steps:
+            return True
+        return (
+            self.checkpoint_every_steps is not None
+            and step % self.checkpoint_every_steps == 0
+            and step < self.steps
+        )
+
+    def get_checkpoint_path(self, step: int) -> str:
+        return f"{self.experiment_logs_path}/checkpoints/step_{step}.ckpt"
+
+    def save_checkpoint(self, path: str):
+        """Pickle the whole simulation state, RNG states included, to ``path``.
+
+        The file is gzip compressed and written under a temporary name
+        first, so a crash while saving never leaves a broken checkpoint.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        checkpoint = {
+            "simulation": self,
+            "random_state": random.getstate(),
+            "numpy_random_state": np.random.get_state(),
+        }
+        temporary_path = f"{path}.tmp"
+        # The profiler's method wrappers can not be pickled.
+        detached = contextlib.nullcontext()
+        if self.profiler is not None:
+            detached = self.profiler.detached(self)
+        with detached, open(temporary_path, "wb") as raw:
+            raw.write(CHECKPOINT_MAGIC)
+            raw.write(_U32.pack(CHECKPOINT_VERSION))
+            with gzip.open(raw, "wb", compresslevel=1) as f:
+                pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def from_checkpoint(
+        cls,
+        path: str,
+        settings: Optional[Dict[str, Any]] = None,
+        plots: Optional[str] = None,
+        progress: Optional[bool] = None,
+        profile: bool = False,
+    ) -> "Simulation":
+        """Restore a simulation saved by `save_checkpoint`.
+
+        ``settings`` is an optional config to continue with. It has to
+        describe the same pools and agents, but may change the experiment,
+        the number of steps, fees, agent parameters and checkpointing.
+        """
+        with open(path, "rb") as raw:
+            if raw.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+                raise ValueError(
+                    f"{path} is not a checkpoint or was written before version "
+                    f"{CHECKPOINT_VERSION}."
+                )
+            (version,) = _U32.unpack(raw.read(_U32.size))
+            if version != CHECKPOINT_VERSION:
+                raise ValueError(f"Unsupported checkpoint version {version}.")
+            with gzip.open(raw, "rb") as f:
+                checkpoint = pickle.load(f)
+        simulation = checkpoint["simulation"]
+        random.setstate(checkpoint["random_state"])
+        np.random.set_state(checkpoint["numpy_random_state"])
+
+        if plots is not None:
+            if plots not in PLOTS_MODES:
+                raise ValueError(f"Unsupported plots mode {plots}.")
+            simulation.plots = plots
+        if progress is not None:
+            simulation.progress = progress
+        simulation.profiler = SimulationProfiler() if profile else None
+        if settings is not None:
+            simulation.update_settings(settings)
+        if simulation.metrics_stream is not None:
+            simulation.metrics_stream.reopen(
+                f"{simulation.experiment_logs_path}/metrics.stream"
+            )
+        if simulation.order_flow_recorder is not None:
+            simulation.order_flow_recorder.reopen(
+                f"{simulation.experiment_logs_path}/order_flow.bin"
+            )
+        return simulation
+
+    def update_settings(self, settings: Dict[str, Any]):
+        metrics_output_mode = self.metrics_output_mode
+        record_order_flow = self.record_order_flow
+        experiment_logs_path = self.experiment_logs_path
+        self.read_settings(settings)
+        if self.metrics_output_mode != metrics_output_mode:
+            raise ValueError("Metrics output mode can not change on resume.")
+        if self.record_order_flow != record_order_flow:
+            raise ValueError("Order flow recording can not change on resume.")
+        if self.steps < self.current_step:
+            raise ValueError(
+                f"Checkpoint is at step {self.current_step}, "
+                f"can not resume with {self.steps} steps."
+            )
+
+        pools_settings = self.simulation_build_args["pools_settings"]
+        check_pools_settings(pools_settings)
+        pool_ids = [pool_settings["id"] for pool_settings in pools_settings["pools"]]
+        if sorted(pool_ids) != sorted(self.pools.keys()):
+            raise ValueError(
+                f"Checkpoint has pools {sorted(self.pools.keys())}, got {sorted(pool_ids)}."
+            )
+        for pool_settings in pools_settings["pools"]:
+            self.pools[pool_settings["id"]].amm_agent.update_settings(
+                **pool_settings["amm_settings"]
+            )
+
+        agents_settings = self.get_agents_settings()
+        if len(agents_settings) != len(self.agents):
+            raise ValueError(
+                f"Checkpoint has {len(self.agents)} agents, got {len(agents_settings)}."
+            )
+        for agent, (agent_type, agent_settings) in zip(self.agents, agents_settings):
+            if agent.type != agent_type:
+                raise ValueError(
+                    f"Agent {agent.id} is {agent.type} in the checkpoint, got {agent_type}."
+                )
+            agent.update_settings(**agent_settings)
+        # New agent settings may move wake-ups, so every actor is woken at
+        # the next step and reports its own next step again.
+        self.scheduler = None
+
+        # The checkpoint's own experiment folder is continued, not wiped.
+        if self.get_experiment_logs_path() != experiment_logs_path:
+            self.prepare_experiment_environment()
+
+    def get_agents_settings(self):
+        """(agent type, agent settings) of every agent, in `self.agents` order."""
+        agents_settings = self.simulation_build_args["agents_settings"]
+        settings = []
+        for batch in agents_settings.get("agents_batches", []):
+            settings.extend(
+                [(batch["agent_type"], batch["agent_settings"])]
+                * batch["number_of_agents"]
+            )
+        for agent in agents_settings.get("agents", []):
+            settings.append((agent["agent_type"], agent["agent_settings"]))
+        return settings
+
     def save_metrics_after_simulation(self):
-        self.save_raw_pools_data()
-        self.save_raw_agents_data()
+        if self.order_flow_recorder is not None:
+            self.order_flow_recorder.close(self.steps)
+            print(f"Order flow was recorded to {self.order_flow_recorder.path}.")
+        if self.metrics_stream is not None:
+            self.close_metrics_stream()
+            print(
+                "Metrics were streamed to "
+                f"{self.metrics_stream.path}, skipping raw data and plots."
+            )
+            return
+        if self.metrics_output_mode == "store":
+            self.save_results_store()
+        else:
+            self.save_raw_pools_data()
+            self.save_raw_agents_data()
+        self.generate_plots()
+
+    def generate_plots(self):
+        if self.plots == "none":
+            return
+        jobs = []
         for pool in self.pools.values():
-            self.generate_metrics_by_pool(pool)
-        path = f"{self.experiment_logs_path}/agents_metrics"
-        if not os.path.exists(path):
-            os.makedirs(path)
-        print("Generating metrics by agents...")
-        for agent in tqdm(self.agents):
-            self.generate_metrics_by_agent(agent)
+            jobs.extend(self.generate_metrics_by_pool(pool))
+        if self.plots in ("sample", "all"):
+            path = f"{self.experiment_logs_path}/agents_metrics"
+            if not os.path.exists(path):
+                os.makedirs(path)
+            agents = self.agents
+            if self.plots == "sample":
+                agents = random.sample(
+                    self.agents, min(self.plots_sample_size, len(self.agents))
+                )
+            for agent in agents:
+                jobs.extend(self.generate_metrics_by_agent(agent))
+        print("Generating plots...")
+        # Next to the runs of the experiment rather than in one, as a rerun
+        # replaces the folder of its run.
+        cache_dir = f"{os.path.dirname(self.experiment_logs_path)}/.plots_cache"
+        render_plot_jobs(jobs, cache_dir=cache_dir, processes=self.plot_processes)
 
     def create_pools(self):
         pools_settings = self.simulation_build_args["pools_settings"]
         check_pools_settings(pools_settings)
+        metrics_buffer_steps = self.steps
+        if self.metrics_output_mode == "stream":
+            metrics_buffer_steps = min(self.steps, self.flush_metrics_every_steps)
         pools = {}
         for pool_settings in pools_settings["pools"]:
-            pools[pool_settings["id"]] = Pool(**pool_settings)
+            # Patterns of the pool come first, the first matching one wins.
+            metrics_cadence = {
+                **pool_settings.get("metrics_cadence", {}),
+                **{
+                    pattern: cadence
+                    for pattern, cadence in self.metrics_cadence.items()
+                    if pattern not in pool_settings.get("metrics_cadence", {})
+                },
+            }
+            pools[pool_settings["id"]] = Pool(
+                metrics_buffer_steps=metrics_buffer_steps,
+                **{**pool_settings, "metrics_cadence": metrics_cadence},
+            )
         self.pools = pools
 
     def create_agents(self):
+        # `agents` holds every agent for ids and metrics, `actors` holds what
+        # is stepped: standalone agents and whole agent populations.
         self.agents = []
+        self.actors = []
         agents_settings = self.simulation_build_args["agents_settings"]
         if "agents_batches" in agents_settings:
             for batch in agents_settings["agents_batches"]:
@@ -74,6 +561,7 @@ class Simulation:
                 agent_settings = agent["agent_settings"]
                 agent = self.generate_agent(agent_type, agent_settings)
                 self.agents.append(agent)
+                self.actors.append(agent)
         self.put_ids_to_agents()
 
     def generate_agent(self, agent_type, agent_settings):
@@ -88,6 +576,17 @@ class Simulation:
             agent = SimpleMarketMaker(**agent_settings)
             for rule in agent.rules:
                 agent.pools[rule["pool_id"]] = self.pools[rule["pool_id"]]
+        elif agent_type == "CrossPoolArbitrageur":
+            agent = CrossPoolArbitrageur(**agent_settings)
+            pool_ids = agent_settings.get("pool_ids", list(self.pools.keys()))
+            agent.pools = {pool_id: self.pools[pool_id] for pool_id in pool_ids}
+            agent.build_pair_index()
+        elif agent_type == "TradeFeedTrader":
+            agent = TradeFeedTrader(**agent_settings)
+            agent.pools = {
+                agent_settings["pool_id"]: self.pools[agent_settings["pool_id"]]
+            }
+            agent.pool = self.pools[agent_settings["pool_id"]]
         else:
             raise ValueError(f"Unknown agent type {agent_type}.")
         return agent
@@ -95,15 +594,191 @@ class Simulation:
     def generate_agents_batch(self, agents_batche_settings):
         agent_type = agents_batche_settings["agent_type"]
         agent_settings = agents_batche_settings["agent_settings"]
-        for _ in range(agents_batche_settings["number_of_agents"]):
+        number_of_agents = agents_batche_settings["number_of_agents"]
+        if agent_type == "SinglePoolFoolishRandomTrader":
+            population = SinglePoolFoolishRandomTraderPopulation(
+                number_of_agents,
+                self.pools[agent_settings["pool_id"]],
+                **agent_settings,
+            )
+            self.agents.extend(population.members)
+            self.actors.append(population)
+            return
+        for _ in range(number_of_agents):
             agent = self.generate_agent(agent_type, agent_settings)
             self.agents.append(agent)
+            self.actors.append(agent)
+
+    def create_metrics_stream(self):
+        self.metrics_stream = None
+        if self.metrics_output_mode == "stream":
+            self.metrics_stream = MetricsStreamWriter(
+                f"{self.experiment_logs_path}/metrics.stream"
+            )
+            self.last_flushed_step = -1
+
+    def create_order_flow_recorder(self):
+        self.order_flow_recorder = None
+        if not self.record_order_flow:
+            return
+        self.order_flow_recorder = OrderFlowRecorder(
+            f"{self.experiment_logs_path}/order_flow.bin",
+            portfolios={agent.id: agent.portfolio for agent in self.agents},
+            order_book_seeds={
+                pool_id: pool.order_book.seed for pool_id, pool in self.pools.items()
+            },
+        )
+        for pool in self.pools.values():
+            pool.order_flow_recorder = self.order_flow_recorder
+
+    def get_metrics_stream_name(self, actor) -> str:
+        if isinstance(actor, SinglePoolFoolishRandomTraderPopulation):
+            return f"{actor.type}_population_{actor.members[0].id}"
+        return f"{actor.type}_{actor.id}"
+
+    def flush_metrics_stream(self, step: int):
+        for actor in self.actors:
+            actor.pad_metrics(step + 1)
+        columns = {}
+        for pool_id, pool in self.pools.items():
+            for path, values in pool.metrics_recorder.drain().items():
+                columns["/".join((f"pool_{pool_id}",) + path)] = values
+        for actor in self.actors:
+            name = self.get_metrics_stream_name(actor)
+            for path, values in actor.drain_metrics().items():
+                columns["/".join((name,) + path)] = np.asarray(values)
+        self.metrics_stream.write_chunk(self.last_flushed_step + 1, step, columns)
+        self.last_flushed_step = step
+
+    def close_metrics_stream(self):
+        # Windows still open at the end are written as the last rows.
+        finished = [pool.metrics_recorder.finish() for pool in self.pools.values()]
+        if self.last_flushed_step < self.steps - 1 or any(finished):
+            self.flush_metrics_stream(self.steps - 1)
+        self.metrics_stream.close(self.get_scalar_metrics())
+
+    def get_scalar_metrics(self) -> Dict[str, Any]:
+        """Metrics that are not series, by pool and by agent or population."""
+        scalars = {}
+        for pool_id, pool in self.pools.items():
+            scalars[f"pool_{pool_id}"] = {
+                "total_number_of_unique_orders": pool.total_number_of_unique_orders
+            }
+        for actor in self.actors:
+            name = self.get_metrics_stream_name(actor)
+            if isinstance(actor, SinglePoolFoolishRandomTraderPopulation):
+                scalars[name] = {
+                    "ids": [member.id for member in actor.members],
+                    "type": actor.type,
+                    "tokens": actor.tokens,
+                    "pool_id": actor.pool_id.tolist(),
+                }
+            else:
+                scalars[name] = {
+                    key: value
+                    for key, value in actor.metrics.items()
+                    if key not in ("portfolio", "sell_orders", "buy_orders")
+                }
+        return scalars
+
+    def save_results_store(self):
+        """Write every pool and agent series to one memory-mapped file, see
+        `ResultsStore` for reading it back."""
+        path = f"{self.experiment_logs_path}/results.store"
+        print("Saving results store...")
+        writer = ResultsStoreWriter(path)
+        for pool_id, pool in self.pools.items():
+            recorder = pool.metrics_recorder
+            for series_path, series in recorder.series.items():
+                metric = "/".join(series_path)
+                info = {"kind": "pool", "metric": metric, "pool_ids": [pool_id]}
+                steps_per_row = recorder.get_steps_per_row(series_path)
+                if steps_per_row is not None:
+                    info["steps_per_row"] = steps_per_row
+                    info["first_step"] = recorder.get_first_step(series_path)
+                writer.add_column(f"pool_{pool_id}/{metric}", series.view(), **info)
+        for actor in progress_bar(self.actors, disable=not self.progress):
+            name = self.get_metrics_stream_name(actor)
+            end = actor.recorded_steps + 1
+            if isinstance(actor, SinglePoolFoolishRandomTraderPopulation):
+                ids = [member.id for member in actor.members]
+                info = {
+                    "kind": "agent",
+                    "agent_type": actor.type,
+                    "agent_ids": ids,
+                    "pool_ids": list(actor.pools),
+                }
+                history = actor.portfolio_history
+                shape = (end - history.start,) + history.base.shape
+                writer.add_column_blocks(
+                    f"{name}/portfolio",
+                    history.dense_blocks(end, get_block_rows(shape[1:], np.float64)),
+                    np.float64,
+                    shape,
+                    metric="portfolio",
+                    tokens=actor.tokens,
+                    steps_per_row=1,
+                    first_step=history.start - 1,
+                    **info,
+                )
+                for key in ("sell_orders", "buy_orders"):
+                    rows, timestamps = [], []
+                    for member in actor.members:
+                        orders = getattr(member, key)
+                        rows.extend([member.row] * len(orders))
+                        timestamps.extend(orders)
+                    writer.add_column(
+                        f"{name}/{key}/row",
+                        np.array(rows, dtype=np.int64),
+                        metric=f"{key}/row",
+                        **info,
+                    )
+                    writer.add_column(
+                        f"{name}/{key}/timestamp",
+                        np.array(timestamps, dtype=np.int64),
+                        metric=f"{key}/timestamp",
+                        **info,
+                    )
+            else:
+                info = {
+                    "kind": "agent",
+                    "agent_type": actor.type,
+                    "agent_ids": [actor.id],
+                    "pool_ids": list(actor.pools),
+                }
+                portfolio = actor.portfolio_history.dense(end)
+                tokens = list(portfolio)
+                writer.add_column(
+                    f"{name}/portfolio",
+                    np.array(
+                        [portfolio[token] for token in tokens], dtype=np.float64
+                    ).T.reshape(-1, 1, len(tokens)),
+                    metric="portfolio",
+                    tokens=tokens,
+                    steps_per_row=1,
+                    first_step=actor.portfolio_history.start - 1,
+                    **info,
+                )
+                for key in ("sell_orders", "buy_orders"):
+                    writer.add_column(
+                        f"{name}/{key}",
+                        np.array(actor.agent_metrics[key], dtype=np.int64),
+                        metric=key,
+                        **info,
+                    )
+        writer.close(
+            {**self.get_scalar_metrics(), "meta_info": self.simulation_meta_args}
+        )
+        print(f"Results were saved to {path}.")
 
     def put_ids_to_agents(self):
         for i, agent in enumerate(self.agents):
             agent.id = i
-            agent.metrics["id"] = i
-            agent.metrics["type"] = agent.type
+
+    def get_experiment_logs_path(self) -> str:
+        experiment_id = self.simulation_meta_args["experiment_id"]
+        experiment_name = "_".join(self.simulation_meta_args["experiment_name"].split())
+        return f"Experiments_logs/{experiment_name}/Experiment_{experiment_id}"
 
     def prepare_experiment_environment(self, delete_existing_folder: bool = True):
         experiment_id = self.simulation_meta_args["experiment_id"]
@@ -116,9 +791,7 @@ class Simulation:
         if not os.path.exists(f"Experiments_logs/{experiment_name}"):
             os.makedirs(f"Experiments_logs/{experiment_name}")
 
-        self.experiment_logs_path = (
-            f"Experiments_logs/{experiment_name}/Experiment_{experiment_id}"
-        )
+        self.experiment_logs_path = self.get_experiment_logs_path()
         if not os.path.exists(self.experiment_logs_path):
             os.makedirs(self.experiment_logs_path)
         else:
@@ -140,31 +813,30 @@ class Simulation:
             os.makedirs(path)
         for pool_id, pool in self.pools.items():
             with open(f"{path}/pool_{pool_id}.json", "w") as f:
-                json.dump(pool.metrics, f)
+                json.dump(pool.export_metrics(), f)
 
     def save_raw_agents_data(self):
         print("Saving raw agents data...")
         path = f"{self.experiment_logs_path}/raw_agents_data"
         if not os.path.exists(path):
             os.makedirs(path)
-        for agent in tqdm(self.agents):
+        for agent in progress_bar(self.agents, disable=not self.progress):
             with open(f"{path}/{agent.type}_{agent.id}.json", "w") as f:
                 json.dump(agent.metrics, f)
 
-    def generate_metrics_by_pool(self, pool: Pool):
+    def generate_metrics_by_pool(self, pool: Pool) -> List[PlotJob]:
         path = f"{self.experiment_logs_path}/pool_{pool.id}_metrics"
         if not os.path.exists(path):
             os.makedirs(path)
-        plot_pool_balace(pool, path)
-        plot_k(pool, path)
-        if pool.amm_agent.type == "UniswapV2":
-            plot_pair_balance(pool, path)
+        jobs = [pool_balance_job(pool, path), k_job(pool, path)]
+        if pool.amm_agent.type in ("UniswapV2", "UniswapV2Ensemble"):
+            jobs.append(pair_balance_job(pool, path))
         if "profit_from_fees" in pool.metrics:
-            plot_profit_from_fees(pool, path)
+            jobs.extend(profit_from_fees_jobs(pool, path))
+        return jobs
 
-    def generate_metrics_by_agent(self, agent):
+    def generate_metrics_by_agent(self, agent) -> List[PlotJob]:
         path = f"{self.experiment_logs_path}/agents_metrics/{agent.type}_{agent.id}_metrics"
         if not os.path.exists(path):
             os.makedirs(path)
-        plot_agent_balance(agent, path)
-        plot_agent_orders(agent, path)
+        return [agent_balance_job(agent, path), agent_orders_job(agent, path)]
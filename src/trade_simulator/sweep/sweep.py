@@ -0,0 +1,193 @@
+import copy
+import itertools
+import json
+import os
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import numpy as np
+
+from trade_simulator.simulation.simulation import Simulation
+from trade_simulator.utils.consts import SWEEP_MODES
+from trade_simulator.utils.progress import progress_bar
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_PATH_PART = re.compile(r"([^.\[\]]+)|\[(\d+)\]")
+
+
+def parse_override_path(path: str) -> List[Any]:
+    """Split e.g. ``simulation.pools_settings.pools[0].amm_settings.fee``
+    into dict keys and list indexes."""
+    keys = []
+    for key, index in _PATH_PART.findall(path):
+        keys.append(int(index) if index else key)
+    if not keys:
+        raise ValueError(f"Empty override path '{path}'.")
+    return keys
+
+
+def set_by_path(config: Dict[str, Any], path: str, value: Any):
+    keys = parse_override_path(path)
+    node = config
+    try:
+        for key in keys[:-1]:
+            node = node[key]
+        # Only existing keys are overridden, so a typo can not add a new one.
+        if keys[-1] in node if isinstance(node, dict) else keys[-1] < len(node):
+            node[keys[-1]] = value
+            return
+    except (KeyError, IndexError, TypeError):
+        pass
+    raise ValueError(f"Override path '{path}' does not exist in the config.")
+
+
+def _draw_value(rng: random.Random, path: str, values: Any) -> Any:
+    if isinstance(values, list):
+        return rng.choice(values)
+    if isinstance(values, dict) and "low" in values and "high" in values:
+        if isinstance(values["low"], int) and isinstance(values["high"], int):
+            return rng.randint(values["low"], values["high"])
+        return rng.uniform(values["low"], values["high"])
+    raise ValueError(
+        f"Parameter '{path}' expects a list of values or a low/high range."
+    )
+
+
+def expand_overrides(sweep_settings: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Turn a sweep spec into the list of override sets to run.
+
+    ``grid`` takes the cartesian product of the listed values, ``random``
+    draws ``samples`` override sets from lists or ``{low, high}`` ranges.
+    """
+    mode = sweep_settings.get("mode", "grid")
+    if mode not in SWEEP_MODES:
+        raise ValueError(f"Unsupported sweep mode {mode}.")
+    parameters = sweep_settings.get("parameters", {})
+
+    if mode == "grid":
+        for path, values in parameters.items():
+            if not isinstance(values, list) or not values:
+                raise ValueError(
+                    f"Grid parameter '{path}' expects a non-empty list of values."
+                )
+        paths = list(parameters.keys())
+        return [
+            dict(zip(paths, values))
+            for values in itertools.product(*parameters.values())
+        ]
+
+    if "samples" not in sweep_settings:
+        raise ValueError("Random sweep requires 'samples'.")
+    rng = random.Random(sweep_settings.get("seed", 0))
+    return [
+        {path: _draw_value(rng, path, values) for path, values in parameters.items()}
+        for _ in range(sweep_settings["samples"])
+    ]
+
+
+def get_sweep_experiment_name(base_settings: Dict[str, Any]) -> str:
+    return f"{base_settings['meta_info']['experiment_name']} sweep"
+
+
+def build_runs(
+    base_settings: Dict[str, Any], sweep_settings: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    seeds = sweep_settings.get("seeds", [0])
+    experiment_name = get_sweep_experiment_name(base_settings)
+    runs = []
+    for overrides in expand_overrides(sweep_settings):
+        for seed in seeds:
+            settings = copy.deepcopy(base_settings)
+            for path, value in overrides.items():
+                set_by_path(settings, path, value)
+            run_id = len(runs)
+            settings["meta_info"]["experiment_name"] = experiment_name
+            settings["meta_info"]["experiment_id"] = run_id
+            runs.append(
+                {
+                    "run_id": run_id,
+                    "seed": seed,
+                    "overrides": overrides,
+                    "settings": settings,
+                }
+            )
+    return runs
+
+
+def summarize_simulation(simulation: Simulation) -> Dict[str, Any]:
+    """Reduce a finished run to flat summary columns.
+
+    Only live state is used, so this works for both metrics output modes.
+    """
+    summary = {}
+    for pool_id, pool in simulation.pools.items():
+        prefix = f"pool_{pool_id}"
+        summary[f"{prefix}/total_number_of_unique_orders"] = (
+            pool.total_number_of_unique_orders
+        )
+        for token, quantity in pool.tokens_info.items():
+            summary[f"{prefix}/reserve/{token}"] = quantity
+        summary[f"{prefix}/k"] = pool.amm_agent.k_series.last()
+        for token, (_, value) in pool.amm_agent.profit_from_fees_series.items():
+            summary[f"{prefix}/profit_from_fees/{token}"] = value.last()
+
+    balances_by_type: Dict[str, Dict[str, List[float]]] = {}
+    for agent in simulation.agents:
+        balances = balances_by_type.setdefault(agent.type, {})
+        for token, quantity in agent.portfolio.items():
+            balances.setdefault(token, []).append(quantity)
+    for agent_type, balances in balances_by_type.items():
+        for token, quantities in balances.items():
+            summary[f"{agent_type}/mean_portfolio/{token}"] = float(np.mean(quantities))
+    return summary
+
+
+def run_single(run: Dict[str, Any]) -> Dict[str, Any]:
+    random.seed(run["seed"])
+    np.random.seed(run["seed"])
+    simulation = Simulation(plots="none", progress=False, **run["settings"])
+    simulation.run()
+
+    summary = summarize_simulation(simulation)
+    with open(f"{simulation.experiment_logs_path}/summary.json", "w") as f:
+        json.dump({**run, "summary": summary}, f)
+    return {
+        "run_id": run["run_id"],
+        "seed": run["seed"],
+        **run["overrides"],
+        **summary,
+    }
+
+
+def run_sweep(
+    base_settings: Dict[str, Any],
+    sweep_settings: Dict[str, Any],
+    processes: Optional[int] = None,
+) -> "pd.DataFrame":
+    """Run every override set for every seed and collect one results table.
+
+    Run ``i`` is stored as experiment ``i`` of the ``<experiment_name> sweep``
+    experiment, the table is written next to the runs as ``sweep_results.csv``.
+    """
+    runs = build_runs(base_settings, sweep_settings)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1:
+        rows = [run_single(run) for run in progress_bar(runs)]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            rows = list(
+                progress_bar(executor.map(run_single, runs), total=len(runs))
+            )
+
+    # Imported here, sweep workers only need `run_single`.
+    import pandas as pd
+
+    results = pd.DataFrame(rows)
+    experiment_name = "_".join(get_sweep_experiment_name(base_settings).split())
+    results.to_csv(f"Experiments_logs/{experiment_name}/sweep_results.csv", index=False)
+    return results
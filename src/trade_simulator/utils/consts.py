@@ -1,5 +1,6 @@
 AMM_TYPES = [
     "UniswapV2",
+    "UniswapV2Ensemble",
     "Mariana",
 ]
 
@@ -18,3 +19,68 @@ ORDER_TYPES = [
     "Market",
     "Limit",
 ]
+
+METRICS_OUTPUT_MODES = [
+    "json",
+    "stream",
+    "store",
+]
+
+METRICS_CADENCE_MODES = [
+    "full",
+    "every",
+    "ohlc",
+    "welford",
+]
+
+DEFAULT_FLUSH_METRICS_EVERY_STEPS = 1_000
+
+PLOTS_MODES = [
+    "none",
+    "pools",
+    "sample",
+    "all",
+]
+
+DEFAULT_PLOTS_SAMPLE_SIZE = 10
+
+CHECKPOINT_VERSION = 13
+
+EXECUTION_MODES = [
+    "single",
+    "sharded",
+]
+
+DEFAULT_BARRIER_EVERY_STEPS = 1
+
+DEFAULT_PROFILE_SNAPSHOT_EVERY_STEPS = 1_000
+
+PROFILE_TOP_ALLOCATIONS = 10
+
+DEFAULT_TELEMETRY_EVERY_STEPS = 10
+
+DEFAULT_TELEMETRY_BUFFER_SIZE = 1_024
+
+SWEEP_MODES = [
+    "grid",
+    "random",
+]
+
+# Integer codes used by orders; a code is the index of the name above.
+ORDER_OPERATION_TYPE_CODES = {
+    name: code for code, name in enumerate(ORDER_OPERATION_TYPES)
+}
+ORDER_OPERATION_STATUS_CODES = {
+    name: code for code, name in enumerate(ORDER_OPERATION_STATUSES)
+}
+ORDER_TYPE_CODES = {name: code for code, name in enumerate(ORDER_TYPES)}
+
+BUY = ORDER_OPERATION_TYPE_CODES["BUY"]
+SELL = ORDER_OPERATION_TYPE_CODES["SELL"]
+
+AWAITING = ORDER_OPERATION_STATUS_CODES["Awaiting"]
+SUCCEED = ORDER_OPERATION_STATUS_CODES["Succeed"]
+CANCELED = ORDER_OPERATION_STATUS_CODES["Canceled"]
+
+MARKET = ORDER_TYPE_CODES["Market"]
+LIMIT = ORDER_TYPE_CODES["Limit"]
@@ -0,0 +1,370 @@
+import fnmatch
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional, Set, Tuple, Union
+
+import numpy as np
+
+DEFAULT_CAPACITY = 1024
+
+
+class MetricSeries:
+    """Append-only typed column backed by a preallocated NumPy array.
+
+    The array doubles when it runs out of space, so a wrong capacity
+    estimate costs a copy, not correctness. ``flushed`` counts leading
+    values already handed out by ``drain``.
+    """
+
+    __slots__ = ("values", "size", "flushed")
+
+    def __init__(self, capacity: int, dtype=np.float64, initial: Iterable = ()):
+        initial = list(initial)
+        self.values = np.empty(max(capacity, len(initial), 1), dtype=dtype)
+        self.size = len(initial)
+        self.flushed = 0
+        self.values[: self.size] = initial
+
+    def append(self, value):
+        if self.size == len(self.values):
+            self.values = np.resize(self.values, 2 * len(self.values))
+        self.values[self.size] = value
+        self.size += 1
+
+    def append_repeated(self, value, count: int):
+        if count <= 0:
+            return
+        size = self.size + count
+        if size > len(self.values):
+            self.values = np.resize(self.values, max(size, 2 * len(self.values)))
+        self.values[self.size : size] = value
+        self.size = size
+
+    def last(self):
+        return self.values[self.size - 1].item()
+
+    def set_last(self, value):
+        self.values[self.size - 1] = value
+
+    def view(self) -> np.ndarray:
+        return self.values[: self.size]
+
+    def drain(self) -> np.ndarray:
+        """Return the values not drained yet and free their space.
+
+        The last value is kept in the buffer so ``last`` keeps working.
+        """
+        drained = self.values[self.flushed : self.size].copy()
+        if self.size > 0:
+            self.values[0] = self.values[self.size - 1]
+            self.size = 1
+            self.flushed = 1
+        return drained
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getstate__(self):
+        # Only the filled part is pickled, the spare capacity is reallocated.
+        return self.values[: self.size].copy(), len(self.values), self.flushed
+
+    def __setstate__(self, state):
+        values, capacity, self.flushed = state
+        self.values = np.empty(capacity, dtype=values.dtype)
+        self.size = len(values)
+        self.values[: self.size] = values
+
+
+class WindowedSeries(ABC):
+    """Base of series that keep one row of statistics per window of
+    ``window`` appended values instead of the values themselves.
+
+    Rows are computed as values come, so a full resolution array is never
+    built. `view` adds the row of the window still open, `drain` only
+    hands out closed windows and `finish` closes the open one. `last` is
+    the last appended value, as for `MetricSeries`.
+    """
+
+    columns: Tuple[str, ...] = ()
+    # Column drawn when the series is plotted against steps.
+    plotted_column: str = ""
+
+    def __init__(self, window: int, capacity: int, initial: Iterable = ()):
+        self.window = window
+        self.rows = np.empty((capacity // window + 1, len(self.columns)))
+        self.size = 0
+        # Values in the open window.
+        self.in_window = 0
+        self.last_value = None
+        for value in initial:
+            self.append(value)
+
+    @abstractmethod
+    def add(self, value, count: int):
+        """Account for ``count`` values equal to ``value`` in the open window."""
+        pass
+
+    @abstractmethod
+    def get_open_row(self) -> Tuple[float, ...]:
+        pass
+
+    @abstractmethod
+    def get_constant_row(self, value) -> Tuple[float, ...]:
+        """Row of a whole window of values equal to ``value``."""
+        pass
+
+    def append_rows(self, row, count: int = 1):
+        size = self.size + count
+        if size > len(self.rows):
+            rows = np.empty((max(size, 2 * len(self.rows)), len(self.columns)))
+            rows[: self.size] = self.rows[: self.size]
+            self.rows = rows
+        self.rows[self.size : size] = row
+        self.size = size
+
+    def close_window(self):
+        self.append_rows(self.get_open_row())
+        self.in_window = 0
+
+    def append(self, value):
+        self.add(value, 1)
+        self.last_value = value
+        self.in_window += 1
+        if self.in_window == self.window:
+            self.close_window()
+
+    def append_repeated(self, value, count: int):
+        if count <= 0:
+            return
+        self.last_value = value
+        if self.in_window:
+            head = min(count, self.window - self.in_window)
+            self.add(value, head)
+            self.in_window += head
+            count -= head
+            if self.in_window == self.window:
+                self.close_window()
+        whole_windows, count = divmod(count, self.window)
+        self.append_rows(self.get_constant_row(value), whole_windows)
+        if count:
+            self.add(value, count)
+            self.in_window = count
+
+    def last(self):
+        return self.last_value
+
+    def set_last(self, value):
+        raise TypeError("Values of a windowed series can not be changed.")
+
+    def view(self) -> np.ndarray:
+        rows = self.rows[: self.size]
+        if self.in_window:
+            rows = np.vstack([rows, self.get_open_row()])
+        return rows[:, 0] if len(self.columns) == 1 else rows
+
+    def drain(self) -> np.ndarray:
+        rows = self.rows[: self.size].copy()
+        self.size = 0
+        return rows[:, 0] if len(self.columns) == 1 else rows
+
+    def finish(self) -> bool:
+        """Close the open window, True if there was one."""
+        if not self.in_window:
+            return False
+        self.close_window()
+        return True
+
+    def __len__(self) -> int:
+        return self.size + bool(self.in_window)
+
+
+class DownsampledSeries(WindowedSeries):
+    """Every ``window``-th value, starting with the first one."""
+
+    columns = ("value",)
+    plotted_column = "value"
+
+    def add(self, value, count: int):
+        if not self.in_window:
+            self.first_value = value
+
+    def get_open_row(self):
+        return (self.first_value,)
+
+    def get_constant_row(self, value):
+        return (value,)
+
+
+class OHLCSeries(WindowedSeries):
+    """Open, high, low and close of every window."""
+
+    columns = ("open", "high", "low", "close")
+    plotted_column = "close"
+
+    def add(self, value, count: int):
+        if not self.in_window:
+            self.open = self.high = self.low = value
+        else:
+            self.high = max(self.high, value)
+            self.low = min(self.low, value)
+        self.close = value
+
+    def get_open_row(self):
+        return (self.open, self.high, self.low, self.close)
+
+    def get_constant_row(self, value):
+        return (value, value, value, value)
+
+
+class WelfordSeries(WindowedSeries):
+    """Number of values, mean and population variance of every window,
+    updated with Welford's online algorithm."""
+
+    columns = ("count", "mean", "variance")
+    plotted_column = "mean"
+
+    def add(self, value, count: int):
+        if not self.in_window:
+            self.mean = 0.0
+            self.m2 = 0.0
+        # Chan et al. merge of ``count`` equal values, Welford's update for
+        # a single one.
+        total = self.in_window + count
+        delta = value - self.mean
+        self.mean += delta * count / total
+        self.m2 += delta * delta * self.in_window * count / total
+
+    def get_open_row(self):
+        return (self.in_window, self.mean, self.m2 / self.in_window)
+
+    def get_constant_row(self, value):
+        return (self.window, value, 0.0)
+
+
+WINDOWED_SERIES = {
+    "every": DownsampledSeries,
+    "ohlc": OHLCSeries,
+    "welford": WelfordSeries,
+}
+
+
+def export_series(series: Union[MetricSeries, WindowedSeries]):
+    if not isinstance(series, WindowedSeries):
+        return series.view().tolist()
+    return {
+        "steps": series.window,
+        "columns": list(series.columns),
+        "values": series.view().tolist(),
+    }
+
+
+class MetricsRecorder:
+    """Registry of preallocated metric columns.
+
+    Series are registered under a key path, e.g. ``("portfolio", "USDT")``
+    or ``("profit_from_fees", "DAI", "value")``. The path is turned back
+    into the nested JSON layout only when the metrics are exported.
+
+    ``cadence`` maps glob patterns over ``/`` joined paths to
+    ``{"mode": ..., "steps": ...}``. Series recorded once per step whose
+    path matches are kept as windowed statistics, see `WindowedSeries`.
+    The first matching pattern wins, mode ``full`` keeps every value.
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        cadence: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        self.capacity = DEFAULT_CAPACITY if capacity is None else capacity
+        self.cadence = {} if cadence is None else cadence
+        self.series: Dict[
+            Tuple[str, ...], Union[MetricSeries, WindowedSeries]
+        ] = {}
+        # Paths of series not recorded once per step.
+        self.sparse_paths: Set[Tuple[str, ...]] = set()
+        # Step of the first value of per-step series, -1 when they start
+        # with the value before step 0.
+        self.first_steps: Dict[Tuple[str, ...], int] = {}
+
+    def get_cadence(self, path: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        name = "/".join(path)
+        for pattern, cadence in self.cadence.items():
+            if fnmatch.fnmatchcase(name, pattern):
+                return cadence
+        return None
+
+    def register(
+        self,
+        *path: str,
+        dtype=np.float64,
+        initial: Iterable = (),
+        capacity: Optional[int] = None,
+        per_step: bool = True,
+    ) -> Union[MetricSeries, WindowedSeries]:
+        """Register a series. Only ``per_step`` series, with one value
+        appended per step and never changed, follow the cadence."""
+        if path in self.series:
+            raise ValueError(f"Metric {'/'.join(path)} is already registered.")
+        capacity = self.capacity if capacity is None else capacity
+        initial = list(initial)
+        if per_step:
+            self.first_steps[path] = -len(initial)
+        else:
+            self.sparse_paths.add(path)
+        cadence = self.get_cadence(path) if per_step else None
+        if cadence is not None and cadence["mode"] != "full":
+            series = WINDOWED_SERIES[cadence["mode"]](
+                cadence["steps"], capacity, initial
+            )
+        else:
+            series = MetricSeries(capacity, dtype, initial)
+        self.series[path] = series
+        return series
+
+    def get_steps_per_row(self, path: Tuple[str, ...]) -> Optional[int]:
+        """Steps one value of a series covers, None for sparse series."""
+        if path in self.sparse_paths:
+            return None
+        series = self.series[path]
+        return series.window if isinstance(series, WindowedSeries) else 1
+
+    def get_first_step(self, path: Tuple[str, ...]) -> Optional[int]:
+        """Step of the first value of a series, None for sparse series."""
+        return self.first_steps.get(path)
+
+    def finish(self) -> bool:
+        """Close the open windows of windowed series, True if there were any."""
+        finished = False
+        for series in self.series.values():
+            if isinstance(series, WindowedSeries):
+                finished = series.finish() or finished
+        return finished
+
+    def __getitem__(
+        self, path: Tuple[str, ...]
+    ) -> Union[MetricSeries, WindowedSeries]:
+        return self.series[path]
+
+    def drain(self) -> Dict[Tuple[str, ...], np.ndarray]:
+        return {path: series.drain() for path, series in self.series.items()}
+
+    def views(self) -> Dict[str, Any]:
+        """Nested dict of zero-copy array views over the filled part."""
+        return self._nest(lambda series: series.view())
+
+    def export(self) -> Dict[str, Any]:
+        """Nested dict of plain lists, ready for ``json.dump``.
+
+        Windowed series are exported as ``{"steps": ..., "columns": ...,
+        "values": ...}`` with one row of ``columns`` per ``steps`` steps.
+        """
+        return self._nest(export_series)
+
+    def _nest(self, convert) -> Dict[str, Any]:
+        nested = {}
+        for path, series in self.series.items():
+            node = nested
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = convert(series)
+        return nested
@@ -0,0 +1,161 @@
+import io
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+MAGIC = b"TSMSTRM1"
+CHUNK_MARKER = b"CHNK"
+FOOTER_MARKER = b"FOOT"
+END_MARKER = b"TSMSTEND"
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+
+class MetricsStreamWriter:
+    """Append-only writer of compressed metric chunks.
+
+    File layout::
+
+        MAGIC
+        (CHNK | u32 meta length | meta json | u64 payload length | npz payload)*
+        FOOT | footer json | u64 footer length | END_MARKER
+
+    Every chunk is self-describing and fsynced when written, so a file cut
+    short by a crash can still be read by scanning the chunks. The footer
+    only adds an index of chunk offsets and the run's scalar metrics.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.chunks: List[Dict[str, Any]] = []
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self._sync()
+
+    def write_chunk(
+        self, step_start: int, step_end: int, columns: Dict[str, np.ndarray]
+    ):
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **columns)
+        payload = buffer.getvalue()
+        meta = json.dumps({"step_start": step_start, "step_end": step_end}).encode()
+
+        offset = self.file.tell()
+        self.file.write(CHUNK_MARKER)
+        self.file.write(_U32.pack(len(meta)))
+        self.file.write(meta)
+        self.file.write(_U64.pack(len(payload)))
+        self.file.write(payload)
+        self._sync()
+        self.chunks.append(
+            {"offset": offset, "step_start": step_start, "step_end": step_end}
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["offset"] = self.file.tell()
+        del state["file"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.file = None
+
+    def reopen(self, path: str):
+        """Continue a writer restored from a checkpoint.
+
+        Whatever was written after the checkpoint is dropped. With a new
+        ``path`` the part written before the checkpoint is copied there.
+        """
+        if path != self.path:
+            with open(self.path, "rb") as source, open(path, "wb") as target:
+                target.write(source.read(self.offset))
+            self.path = path
+        self.file = open(path, "r+b")
+        self.file.truncate(self.offset)
+        self.file.seek(self.offset)
+        del self.offset
+
+    def close(self, scalars: Dict[str, Any]):
+        footer = json.dumps({"chunks": self.chunks, "scalars": scalars}).encode()
+        self.file.write(FOOTER_MARKER)
+        self.file.write(footer)
+        self.file.write(_U64.pack(len(footer)))
+        self.file.write(END_MARKER)
+        self._sync()
+        self.file.close()
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+
+def _read_footer(data: bytes):
+    if data[-len(END_MARKER) :] != END_MARKER:
+        return None
+    footer_end = len(data) - len(END_MARKER) - _U64.size
+    (footer_length,) = _U64.unpack_from(data, footer_end)
+    footer_start = footer_end - footer_length
+    if data[footer_start - len(FOOTER_MARKER) : footer_start] != FOOTER_MARKER:
+        return None
+    return json.loads(data[footer_start:footer_end])
+
+
+def _read_chunk(data: bytes, offset: int) -> Tuple[Dict[str, np.ndarray], int]:
+    position = offset + len(CHUNK_MARKER)
+    (meta_length,) = _U32.unpack_from(data, position)
+    position += _U32.size + meta_length
+    (payload_length,) = _U64.unpack_from(data, position)
+    position += _U64.size
+    payload_end = position + payload_length
+    if payload_end > len(data):
+        raise EOFError("Truncated metrics chunk.")
+    with np.load(io.BytesIO(data[position:payload_end])) as npz:
+        columns = {name: npz[name] for name in npz.files}
+    return columns, payload_end
+
+
+def _scan_chunk_offsets(data: bytes) -> List[int]:
+    offsets = []
+    position = len(MAGIC)
+    while data[position : position + len(CHUNK_MARKER)] == CHUNK_MARKER:
+        try:
+            _, chunk_end = _read_chunk(data, position)
+        except (EOFError, struct.error, ValueError):
+            break
+        offsets.append(position)
+        position = chunk_end
+    return offsets
+
+
+def read_metrics_stream(path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Read a metrics stream back into whole columns.
+
+    Columns are concatenated over chunks along the first axis. If the run
+    did not finish, the footer is missing: the complete chunks are still
+    returned and the scalars are empty.
+    """
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        if data[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a metrics stream file.")
+
+        footer = _read_footer(data)
+        if footer is None:
+            offsets, scalars = _scan_chunk_offsets(data), {}
+        else:
+            offsets = [chunk["offset"] for chunk in footer["chunks"]]
+            scalars = footer["scalars"]
+
+        parts: Dict[str, List[np.ndarray]] = {}
+        for offset in offsets:
+            columns, _ = _read_chunk(data, offset)
+            for name, values in columns.items():
+                parts.setdefault(name, []).append(values)
+    columns = {name: np.concatenate(values) for name, values in parts.items()}
+    return columns, scalars
@@ -1,93 +1,291 @@
-import matplotlib.pyplot as plt
+import hashlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
 import numpy as np
+
 from trade_simulator.pool.pool import Pool
+from trade_simulator.utils.metrics import WindowedSeries
+from trade_simulator.utils.progress import progress_bar
 
+# A plot job is a picklable description of one figure: its target path,
+# labels and the series to draw. Jobs are built on the main process and
+# rendered anywhere, see `render_plot_jobs`.
+PlotJob = Dict[str, Any]
 
-def plot_pool_balace(pool: Pool, folder_path: str):
+MIN_JOBS_FOR_PROCESS_POOL = 8
+# Cached plots kept per cache directory, the least recently used go first.
+MAX_CACHED_PLOTS = 1_000
+
+
+def step_series(pool: Pool, *path: str, **kwargs) -> Dict[str, Any]:
+    """Plot series of a per-step pool metric. A windowed metric is drawn
+    as its `plotted_column`, one point at the start of every window."""
+    series = pool.metrics_recorder[path]
+    if not isinstance(series, WindowedSeries):
+        return {"kind": "plot", "y": series.view(), **kwargs}
+    rows = series.view()
+    if rows.ndim == 2:
+        rows = rows[:, series.columns.index(series.plotted_column)]
+    x = np.arange(len(rows)) * series.window
+    return {"kind": "plot", "x": x, "y": rows, **kwargs}
+
+
+def pool_balance_job(pool: Pool, folder_path: str) -> PlotJob:
+    return {
+        "path": f"{folder_path}/{pool.name.replace(" ", "_")}_balance_over_time.png",
+        "title": f"Pool {pool.name} Balance Over Time",
+        "xlabel": "Time Step",
+        "ylabel": "Balance",
+        "series": [
+            step_series(pool, "portfolio", token, label=token)
+            for token in pool.metrics["portfolio"]
+        ],
+    }
+
+
+def k_job(pool: Pool, folder_path: str) -> PlotJob:
+    file_name = f"{pool.name.replace(' ', '_')}_uniswap_k_value_over_time.png"
+    return {
+        "path": f"{folder_path}/{file_name}",
+        "title": f"Uniswap k Value Over Time for Pool {pool.name}",
+        "xlabel": "Time Step",
+        "ylabel": "k Value",
+        "series": [step_series(pool, "k", label="k Value", color="orange")],
+    }
+
+
+def agent_balance_job(agent, folder_path: str) -> PlotJob:
+    return {
+        "path": f"{folder_path}/balance_over_time.png",
+        "title": f"Agent {agent.type}_{agent.id} Balance Over Time",
+        "xlabel": "Time Step",
+        "ylabel": "Balance",
+        "series": [
+            {"kind": "plot", "y": balance, "label": token}
+            for token, balance in agent.metrics["portfolio"].items()
+        ],
+    }
+
+
+def pair_balance_job(pool: Pool, folder_path: str) -> PlotJob:
+    token_a, token_b = pool.amm_agent.token_a, pool.amm_agent.token_b
+    file_name = f"{pool.name.replace(' ', '_')}_pair_balance_over_time.png"
+    return {
+        "path": f"{folder_path}/{file_name}",
+        "title": f"Pair Price Over Time for Pool {pool.name}",
+        "xlabel": "Time Step",
+        "ylabel": "Price",
+        "series": [
+            step_series(
+                pool,
+                f"price_of_{token_a}_{token_b}",
+                label=f"{token_a} Price in {token_b}",
+            ),
+            step_series(
+                pool,
+                f"price_of_{token_b}_{token_a}",
+                label=f"{token_b} Price in {token_a}",
+            ),
+        ],
+    }
+
+
+def profit_from_fees_jobs(pool: Pool, folder_path: str) -> List[PlotJob]:
+    jobs = []
+    for token, profit in pool.metrics["profit_from_fees"].items():
+        if len(profit["value"]) > 0:
+            jobs.append(
+                {
+                    "path": f"{folder_path}/profit_from_fees_{token}.png",
+                    "title": f"Pool_{pool.id} Profit from Fees in {token}",
+                    "xlabel": "Time Step",
+                    "ylabel": "Profit",
+                    "series": [
+                        {
+                            "kind": "plot",
+                            "x": profit["timestamp"],
+                            "y": profit["value"],
+                            "label": token,
+                        }
+                    ],
+                }
+            )
+    return jobs
+
+
+def agent_orders_job(agent, folder_path: str) -> PlotJob:
+    metrics = agent.metrics
+    x_buy = metrics["buy_orders"]
+    x_sell = metrics["sell_orders"]
+    return {
+        "path": f"{folder_path}/orders_over_time.png",
+        "title": f"Agent {agent.type}_{agent.id} Orders Over Time",
+        "xlabel": "Time Step",
+        "ylabel": "Total Orders",
+        "series": [
+            {
+                "kind": "scatter",
+                "x": x_buy,
+                "y": np.linspace(0, len(x_buy) - 1, len(x_buy)),
+                "label": "Buy Orders",
+                "color": "green",
+                "s": 10,
+            },
+            {
+                "kind": "scatter",
+                "x": x_sell,
+                "y": np.linspace(0, len(x_sell) - 1, len(x_sell)),
+                "label": "Sell Orders",
+                "color": "red",
+                "s": 10,
+            },
+        ],
+    }
+
+
+def get_pyplot():
+    # matplotlib is only imported once something is drawn, as importing it
+    # takes longer than a short simulation run.
+    import matplotlib
+
+    # Plots are only ever written to files, also from worker processes.
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def plot_job_hash(job: PlotJob) -> str:
+    digest = hashlib.sha1()
+    for key in ("title", "xlabel", "ylabel"):
+        digest.update(job[key].encode())
+    for series in job["series"]:
+        for key, value in sorted(series.items()):
+            digest.update(key.encode())
+            if key in ("x", "y"):
+                digest.update(np.ascontiguousarray(value, dtype=np.float64).tobytes())
+            else:
+                digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+
+def link_or_copy(source: str, target: str):
+    """Hard link ``target`` to ``source``, so the cache keeps no second copy
+    of a plot, or copy where links are not supported."""
+    if os.path.lexists(target):
+        # Never write through a link into a cached file.
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def render_plot_job(job: PlotJob, cache_dir: Optional[str] = None):
+    """Draw one job, reusing a cached PNG when the same content was drawn.
+
+    The cache is content-addressed by `plot_job_hash`, so unchanged plots
+    are linked instead of redrawn.
+    """
+    cached_path = None
+    if cache_dir is not None:
+        cached_path = os.path.join(cache_dir, f"{plot_job_hash(job)}.png")
+        if os.path.exists(cached_path):
+            # Marks the entry as recently used for `evict_plot_cache`.
+            os.utime(cached_path)
+            link_or_copy(cached_path, job["path"])
+            return
+
+    if os.path.lexists(job["path"]):
+        os.remove(job["path"])
+    plt = get_pyplot()
     plt.figure(figsize=(15, 6))
     plt.grid()
-    plt.title(f"Pool {pool.name} Balance Over Time")
-    plt.xlabel("Time Step")
-    plt.ylabel("Balance")
-    for key in pool.metrics["portfolio"].keys():
-        plt.plot(pool.metrics["portfolio"][key], label=key)
+    plt.title(job["title"])
+    plt.xlabel(job["xlabel"])
+    plt.ylabel(job["ylabel"])
+    for series in job["series"]:
+        kwargs = {
+            key: value for key, value in series.items() if key not in ("kind", "x", "y")
+        }
+        if series["kind"] == "scatter":
+            plt.scatter(series["x"], series["y"], **kwargs)
+        elif "x" in series:
+            plt.plot(series["x"], series["y"], **kwargs)
+        else:
+            plt.plot(series["y"], **kwargs)
     plt.legend()
-    plt.savefig(f"{folder_path}/{pool.name.replace(" ", "_")}_balance_over_time.png")
+    plt.savefig(job["path"])
     plt.close()
 
+    if cached_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        link_or_copy(job["path"], cached_path)
+
+
+def evict_plot_cache(cache_dir: str, max_plots: int = MAX_CACHED_PLOTS):
+    """Remove the least recently used plots beyond ``max_plots``."""
+    if not os.path.isdir(cache_dir):
+        return
+    paths = [
+        os.path.join(cache_dir, name)
+        for name in os.listdir(cache_dir)
+        if name.endswith(".png")
+    ]
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[max_plots:]:
+        os.remove(path)
+
+
+def _render_plot_job_in_worker(args):
+    render_plot_job(*args)
+
+
+def render_plot_jobs(
+    jobs: List[PlotJob],
+    cache_dir: Optional[str] = None,
+    processes: Optional[int] = None,
+):
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1 or len(jobs) < MIN_JOBS_FOR_PROCESS_POOL:
+        for job in progress_bar(jobs):
+            render_plot_job(job, cache_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            arguments = [(job, cache_dir) for job in jobs]
+            for _ in progress_bar(
+                executor.map(_render_plot_job_in_worker, arguments, chunksize=4),
+                total=len(jobs),
+            ):
+                pass
+    if cache_dir is not None:
+        evict_plot_cache(cache_dir)
+
+
+def plot_pool_balace(pool: Pool, folder_path: str):
+    render_plot_job(pool_balance_job(pool, folder_path))
+
 
 def plot_k(pool: Pool, folder_path: str):
-    plt.figure(figsize=(15, 6))
-    plt.grid()
-    plt.title(f"Uniswap k Value Over Time for Pool {pool.name}")
-    plt.xlabel("Time Step")
-    plt.ylabel("k Value")
-    plt.plot(pool.metrics["k"], label="k Value", color="orange")
-    plt.legend()
-    plt.savefig(
-        f"{folder_path}/{pool.name.replace(' ', '_')}_uniswap_k_value_over_time.png"
-    )
-    plt.close()
+    render_plot_job(k_job(pool, folder_path))
 
 
 def plot_agent_balance(agent, folder_path: str):
-    plt.figure(figsize=(15, 6))
-    plt.grid()
-    plt.title(f"Agent {agent.type}_{agent.id} Balance Over Time")
-    plt.xlabel("Time Step")
-    plt.ylabel("Balance")
-    for token, balance in agent.metrics["portfolio"].items():
-        plt.plot(balance, label=token)
-    plt.legend()
-    plt.savefig(f"{folder_path}/balance_over_time.png")
-    plt.close()
+    render_plot_job(agent_balance_job(agent, folder_path))
 
 
 def plot_pair_balance(pool: Pool, folder_path: str):
-    plt.figure(figsize=(15, 6))
-    plt.grid()
-    plt.title(f"Pair Price Over Time for Pool {pool.name}")
-    plt.xlabel("Time Step")
-    plt.ylabel("Price")
-    plt.plot(
-        pool.metrics[f"price_of_{pool.amm_agent.token_a}_{pool.amm_agent.token_b}"],
-        label=f"{pool.amm_agent.token_a} Price in {pool.amm_agent.token_b}",
-    )
-    plt.plot(
-        pool.metrics[f"price_of_{pool.amm_agent.token_b}_{pool.amm_agent.token_a}"],
-        label=f"{pool.amm_agent.token_b} Price in {pool.amm_agent.token_a}",
-    )
-    plt.legend()
-    plt.savefig(
-        f"{folder_path}/{pool.name.replace(' ', '_')}_pair_balance_over_time.png"
-    )
-    plt.close()
+    render_plot_job(pair_balance_job(pool, folder_path))
+
 
 def plot_profit_from_fees(pool: Pool, folder_path: str):
-    for token, profit in pool.metrics["profit_from_fees"].items():
-        if len(profit["value"]) > 0:
-            plt.figure(figsize=(15, 6))
-            plt.grid()
-            plt.title(f"Pool_{pool.id} Profit from Fees in {token}")
-            plt.xlabel("Time Step")
-            plt.ylabel("Profit")
-            plt.plot(profit["timestamp"], profit["value"], label=token)
-            plt.legend()
-            plt.savefig(f"{folder_path}/profit_from_fees_{token}.png")
-            plt.close()
+    for job in profit_from_fees_jobs(pool, folder_path):
+        render_plot_job(job)
+
 
 def plot_agent_orders(agent, folder_path: str):
-    plt.figure(figsize=(15, 6))
-    plt.grid()
-    plt.title(f"Agent {agent.type}_{agent.id} Orders Over Time")
-    plt.xlabel("Time Step")
-    plt.ylabel("Total Orders")
-    x_buy = agent.metrics["buy_orders"]
-    y_buy = np.linspace(0, len(x_buy) - 1, len(x_buy))
-    x_sell = agent.metrics["sell_orders"]
-    y_sell = np.linspace(0, len(x_sell) - 1, len(x_sell))
-    plt.scatter(x_buy, y_buy, label="Buy Orders", color="green", s=10)
-    plt.scatter(x_sell, y_sell, label="Sell Orders", color="red", s=10)
-    plt.legend()
-    plt.savefig(f"{folder_path}/orders_over_time.png")
-    plt.close()
+    render_plot_job(agent_orders_job(agent, folder_path))
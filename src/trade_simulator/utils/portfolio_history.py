@@ -0,0 +1,162 @@
+import bisect
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class PortfolioHistory:
+    """Change-only history of a token -> balance portfolio.
+
+    A balance is stored as (position, value) only when it changes, where
+    position 0 is the starting portfolio and position ``i + 1`` the
+    portfolio recorded after step ``i``. `dense` expands it back into the
+    per-step lists the metrics always had.
+    """
+
+    def __init__(self, portfolio: Dict[str, float]):
+        self.start = 0
+        self.positions: Dict[str, List[int]] = {token: [0] for token in portfolio}
+        self.values: Dict[str, List[float]] = {
+            token: [value] for token, value in portfolio.items()
+        }
+
+    def record(self, position: int, portfolio: Dict[str, float]):
+        for token, value in portfolio.items():
+            values = self.values[token]
+            if values[-1] != value:
+                self.positions[token].append(position)
+                values.append(value)
+
+    def dense(self, end: int) -> Dict[str, list]:
+        """Balances of every token for positions ``[start, end)``."""
+        dense = {}
+        for token, positions in self.positions.items():
+            series = []
+            values = self.values[token]
+            for i, value in enumerate(values):
+                next_position = positions[i + 1] if i + 1 < len(positions) else end
+                series.extend([value] * (next_position - positions[i]))
+            dense[token] = series
+        return dense
+
+    def drain(self, end: int) -> Dict[str, list]:
+        """`dense` up to ``end``, then forget everything before ``end``."""
+        dense = self.dense(end)
+        self.start = end
+        for token, positions in self.positions.items():
+            # Keep the balance at ``end`` and the changes after it.
+            kept = bisect.bisect_right(positions, end) - 1
+            self.positions[token] = [end] + positions[kept + 1 :]
+            self.values[token] = self.values[token][kept:]
+        return dense
+
+
+class PortfolioMatrixHistory:
+    """Change-only history of a (members, tokens) portfolio matrix.
+
+    Each `record` keeps the cells that changed since the previous one. The
+    dense (positions, members, tokens) history is rebuilt on demand, and
+    the history of a single member without building the whole matrix.
+    """
+
+    def __init__(self, portfolios: np.ndarray):
+        self.start = 0
+        self.base = portfolios.copy()
+        self.last = portfolios.copy()
+        self.changes: List[Tuple[int, np.ndarray, np.ndarray, np.ndarray]] = []
+        self._changes_by_row: Optional[Tuple[np.ndarray, ...]] = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_changes_by_row"] = None
+        return state
+
+    def record(self, position: int, portfolios: np.ndarray):
+        rows, columns = np.nonzero(portfolios != self.last)
+        if len(rows) == 0:
+            return
+        values = portfolios[rows, columns]
+        self.last[rows, columns] = values
+        self.changes.append((position, rows, columns, values))
+        self._changes_by_row = None
+
+    def dense(self, end: int) -> np.ndarray:
+        dense = np.empty((end - self.start,) + self.base.shape, dtype=self.base.dtype)
+        current = self.base.copy()
+        position = self.start
+        for change_position, rows, columns, values in self.changes:
+            dense[position - self.start : change_position - self.start] = current
+            current[rows, columns] = values
+            position = change_position
+        dense[position - self.start :] = current
+        return dense
+
+    def dense_blocks(self, end: int, max_rows: int) -> Iterator[np.ndarray]:
+        """`dense` in consecutive blocks of at most ``max_rows`` positions,
+        so the whole history is never built at once. A block is only valid
+        until the next one is taken."""
+        current = self.base.copy()
+        position = self.start
+        for change_position, rows, columns, values in self.changes + [
+            (end, None, None, None)
+        ]:
+            change_position = min(change_position, end)
+            while position < change_position:
+                count = min(max_rows, change_position - position)
+                yield np.broadcast_to(current, (count,) + current.shape)
+                position += count
+            if position == end:
+                return
+            current[rows, columns] = values
+
+    def drain(self, end: int) -> np.ndarray:
+        dense = self.dense(end)
+        self.start = end
+        self.base = dense[-1].copy() if len(dense) else self.base
+        self.changes = [change for change in self.changes if change[0] >= end]
+        self._changes_by_row = None
+        return dense
+
+    def dense_row(self, row: int, end: int) -> List[list]:
+        """Per token balance lists of member ``row`` for ``[start, end)``."""
+        if self._changes_by_row is None:
+            self._index_changes_by_row()
+        positions, rows, columns, values = self._changes_by_row
+        first, last = np.searchsorted(rows, [row, row + 1])
+        positions = positions[first:last].tolist()
+        columns = columns[first:last].tolist()
+        values = values[first:last].tolist()
+
+        series = []
+        for column, base in enumerate(self.base[row].tolist()):
+            balances = []
+            position, value = self.start, base
+            for change_position, change_column, change_value in zip(
+                positions, columns, values
+            ):
+                if change_column == column:
+                    balances.extend([value] * (change_position - position))
+                    position, value = change_position, change_value
+            balances.extend([value] * (end - position))
+            series.append(balances)
+        return series
+
+    def _index_changes_by_row(self):
+        if not self.changes:
+            empty = np.empty(0, dtype=np.int64)
+            self._changes_by_row = (empty, empty, empty, self.base[0, :0])
+            return
+        positions = np.concatenate(
+            [np.full(len(rows), position) for position, rows, _, _ in self.changes]
+        )
+        rows = np.concatenate([change[1] for change in self.changes])
+        columns = np.concatenate([change[2] for change in self.changes])
+        values = np.concatenate([change[3] for change in self.changes])
+        # Stable, so the changes of a row stay ordered by position.
+        order = np.argsort(rows, kind="stable")
+        self._changes_by_row = (
+            positions[order],
+            rows[order],
+            columns[order],
+            values[order],
+        )
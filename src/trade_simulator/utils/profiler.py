@@ -0,0 +1,199 @@
+import contextlib
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from trade_simulator.utils.consts import (
+    DEFAULT_PROFILE_SNAPSHOT_EVERY_STEPS,
+    ORDER_OPERATION_STATUSES,
+    PROFILE_TOP_ALLOCATIONS,
+)
+
+
+class SimulationProfiler:
+    """Wall-clock time per phase, order counters per pool and memory snapshots.
+
+    Phases are timed by wrapping the methods of pools, AMMs and actors on
+    the instances while attached, so a simulation without a profiler runs
+    the plain methods. Nested phases are reported with their total time and
+    their own time, the total minus the phases called from them.
+    """
+
+    def __init__(
+        self,
+        snapshot_every_steps: int = DEFAULT_PROFILE_SNAPSHOT_EVERY_STEPS,
+        top_allocations: int = PROFILE_TOP_ALLOCATIONS,
+    ):
+        self.snapshot_every_steps = snapshot_every_steps
+        self.top_allocations = top_allocations
+        # phase -> [calls, total seconds, seconds of nested phases]
+        self.phases: Dict[str, List[float]] = {}
+        self._stack: List[List[float]] = []
+        self.pools: Dict[int, Dict[str, int]] = {}
+        self.memory: List[Dict[str, Any]] = []
+        self.wall_time = 0.0
+        self.steps = 0
+        self._attached: List[Tuple[Any, str]] = []
+        self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        self._stack.append([time.perf_counter(), 0.0])
+        try:
+            yield
+        finally:
+            start, children = self._stack.pop()
+            elapsed = time.perf_counter() - start
+            if self._stack:
+                self._stack[-1][1] += elapsed
+            stats = self.phases.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] += children
+
+    def wrap(
+        self, obj, method_name: str, phase: str, before: Optional[Callable] = None
+    ):
+        method = getattr(obj, method_name)
+
+        def timed(*args, **kwargs):
+            if before is not None:
+                before()
+            with self.phase(phase):
+                return method(*args, **kwargs)
+
+        setattr(obj, method_name, timed)
+        self._attached.append((obj, method_name))
+
+    def attach(self, simulation):
+        for pool in simulation.pools.values():
+            counters = self.pools.setdefault(
+                pool.id,
+                {"submitted": 0, **{status: 0 for status in ORDER_OPERATION_STATUSES}},
+            )
+            counters["_unique_orders_at_attach"] = pool.total_number_of_unique_orders
+            self.wrap(pool, "execute_orders", "execute_orders")
+            self.wrap(pool, "fill_idle_steps", "fill_idle_steps")
+            self.wrap(
+                pool.amm_agent,
+                "clean_order_book",
+                "clean_order_book",
+                before=self._order_counter(pool, counters),
+            )
+            self.wrap(pool.amm_agent, "write_metrics", "write_metrics")
+        for actor in simulation.actors:
+            self.wrap(actor, "complete_agent_action", f"agent_action/{actor.type}")
+            self.wrap(actor, "pad_metrics", "pad_metrics")
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def _order_counter(self, pool, counters: Dict[str, int]) -> Callable:
+        def count():
+            # Settled orders are forgotten when the order book is cleaned, so
+            # every order is counted once with the status it finished with.
+            for status, count in zip(
+                ORDER_OPERATION_STATUSES, pool.order_book.status_counts
+            ):
+                counters[status] += count
+
+        return count
+
+    def detach(self, simulation):
+        for obj, method_name in self._attached:
+            delattr(obj, method_name)
+        self._attached = []
+        for pool in simulation.pools.values():
+            counters = self.pools[pool.id]
+            counters["submitted"] += pool.total_number_of_unique_orders - counters.pop(
+                "_unique_orders_at_attach"
+            )
+
+    @contextlib.contextmanager
+    def detached(self, simulation):
+        """Remove the wrappers for a while, e.g. to pickle the simulation."""
+        self.detach(simulation)
+        try:
+            yield
+        finally:
+            self.attach(simulation)
+
+    def on_step(self, previous_step: int, step: int):
+        """Take a memory snapshot if ``step`` passed a snapshot boundary."""
+        every = self.snapshot_every_steps
+        if step // every > previous_step // every:
+            self.take_memory_snapshot(step)
+
+    def take_memory_snapshot(self, step: int):
+        if not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        self.memory.append(
+            {
+                "step": step,
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top": [
+                    {
+                        "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                        "size_bytes": stat.size,
+                        "count": stat.count,
+                    }
+                    for stat in snapshot.statistics("lineno")[: self.top_allocations]
+                ],
+            }
+        )
+
+    def finish(self, step: int, wall_time: float):
+        self.steps = step
+        self.wall_time += wall_time
+        self.take_memory_snapshot(step)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def report(self) -> Dict[str, Any]:
+        phases = {
+            name: {
+                "calls": calls,
+                "total_seconds": total,
+                "self_seconds": total - children,
+            }
+            for name, (calls, total, children) in sorted(
+                self.phases.items(), key=lambda item: -item[1][1]
+            )
+        }
+        agent_types = {
+            name.split("/", 1)[1]: {
+                "calls": stats["calls"],
+                "seconds": stats["total_seconds"],
+            }
+            for name, stats in phases.items()
+            if name.startswith("agent_action/")
+        }
+        profiled = sum(stats["self_seconds"] for stats in phases.values())
+        return {
+            "steps": self.steps,
+            "wall_time_seconds": self.wall_time,
+            "unprofiled_seconds": self.wall_time - profiled,
+            "phases": phases,
+            "agent_types": agent_types,
+            "pools": {
+                str(pool_id): {
+                    "submitted_orders": counters["submitted"],
+                    "filled_orders": counters["Succeed"],
+                    "canceled_orders": counters["Canceled"],
+                }
+                for pool_id, counters in self.pools.items()
+            },
+            "memory": self.memory,
+        }
+
+    def write_report(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
@@ -0,0 +1,32 @@
+from typing import Any, Iterable, Optional
+
+
+class NullProgressBar:
+    """Stand-in for a disabled `tqdm` bar."""
+
+    def __init__(self, iterable: Optional[Iterable[Any]] = None):
+        self.iterable = iterable
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def update(self, n: int = 1):
+        pass
+
+
+def progress_bar(
+    iterable: Optional[Iterable[Any]] = None, disable: bool = False, **kwargs
+):
+    """`tqdm` bar, imported only when it is shown so headless runs and
+    worker processes do not pay for the import."""
+    if disable:
+        return NullProgressBar(iterable)
+    from tqdm import tqdm
+
+    return tqdm(iterable, **kwargs)
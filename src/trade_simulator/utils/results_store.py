@@ -0,0 +1,196 @@
+import json
+import os
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"TSRSLTS1"
+FOOTER_MARKER = b"FOOT"
+END_MARKER = b"TSRSLEND"
+_U64 = struct.Struct("<Q")
+# Columns start at multiples of 64 bytes, the alignment Arrow buffers use.
+ALIGNMENT = 64
+BLOCK_BYTES = 1 << 24
+
+
+class ResultsStoreWriter:
+    """Writer of a consolidated experiment file of uncompressed columns.
+
+    File layout::
+
+        MAGIC | (padding | raw little-endian column)*
+        FOOT | footer json | u64 footer length | END_MARKER
+
+    The footer indexes every column by name with its offset, dtype and
+    shape and the owner fields `ResultsStore.find` filters on: ``kind``
+    (pool or agent), ``metric``, ``pool_ids``, ``agent_type`` and, for
+    agent columns, ``agent_ids`` along the member axis. Per-step columns
+    also hold ``steps_per_row`` and the ``first_step`` of their first row.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.columns: Dict[str, Dict[str, Any]] = {}
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+
+    def _start_column(self, name: str, dtype: np.dtype, shape, info):
+        if name in self.columns:
+            raise ValueError(f"Column {name} is already written.")
+        padding = -self.file.tell() % ALIGNMENT
+        self.file.write(b"\0" * padding)
+        self.columns[name] = {
+            "offset": self.file.tell(),
+            "dtype": np.dtype(dtype).newbyteorder("<").str,
+            "shape": list(shape),
+            **info,
+        }
+
+    def add_column(self, name: str, values, **info):
+        values = np.asarray(values)
+        self._start_column(name, values.dtype, values.shape, info)
+        self.file.write(values.astype(values.dtype.newbyteorder("<")).tobytes())
+
+    def add_column_blocks(
+        self,
+        name: str,
+        blocks: Iterable[np.ndarray],
+        dtype,
+        shape: Tuple[int, ...],
+        **info,
+    ):
+        """Write a column of ``shape`` from consecutive blocks along its
+        first axis, so it never has to be held in memory at once."""
+        self._start_column(name, dtype, shape, info)
+        dtype = np.dtype(dtype).newbyteorder("<")
+        rows = 0
+        for block in blocks:
+            self.file.write(np.ascontiguousarray(block, dtype=dtype).tobytes())
+            rows += len(block)
+        if rows != shape[0]:
+            raise ValueError(f"Column {name} expected {shape[0]} rows, got {rows}.")
+
+    def close(self, scalars: Dict[str, Any]):
+        footer = json.dumps({"columns": self.columns, "scalars": scalars}).encode()
+        self.file.write(FOOTER_MARKER)
+        self.file.write(footer)
+        self.file.write(_U64.pack(len(footer)))
+        self.file.write(END_MARKER)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+
+def get_block_rows(row_shape: Tuple[int, ...], dtype) -> int:
+    """Rows of a block of about `BLOCK_BYTES` for `add_column_blocks`."""
+    row_bytes = int(np.prod(row_shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+    return max(1, BLOCK_BYTES // max(row_bytes, 1))
+
+
+class ResultsStore:
+    """Memory-mapped reader of a file written by `ResultsStoreWriter`.
+
+    Columns are zero-copy, read-only NumPy views into the mapped file, so
+    only the pages of the rows that are actually used are read from disk.
+    Rows of per-step columns are positions as in the JSON metrics: agent
+    portfolios and ``k`` start with the value before step 0, which their
+    ``first_step`` of -1 accounts for when reading a step range.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self.data[: len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a results store file.")
+        if bytes(self.data[-len(END_MARKER) :]) != END_MARKER:
+            raise ValueError(f"{path} is incomplete, the run did not finish.")
+        footer_end = len(self.data) - len(END_MARKER) - _U64.size
+        (footer_length,) = _U64.unpack(
+            bytes(self.data[footer_end : footer_end + _U64.size])
+        )
+        footer = json.loads(bytes(self.data[footer_end - footer_length : footer_end]))
+        self.columns: Dict[str, Dict[str, Any]] = footer["columns"]
+        self.scalars: Dict[str, Any] = footer["scalars"]
+
+    def find(
+        self,
+        metric: Optional[str] = None,
+        kind: Optional[str] = None,
+        agent_type: Optional[str] = None,
+        agent_id: Optional[int] = None,
+        pool_id: Optional[int] = None,
+    ) -> List[str]:
+        """Names of the columns matching every given field."""
+        names = []
+        for name, info in self.columns.items():
+            if metric is not None and info.get("metric") != metric:
+                continue
+            if kind is not None and info.get("kind") != kind:
+                continue
+            if agent_type is not None and info.get("agent_type") != agent_type:
+                continue
+            if agent_id is not None and agent_id not in info.get("agent_ids", []):
+                continue
+            if pool_id is not None and pool_id not in info.get("pool_ids", []):
+                continue
+            names.append(name)
+        return names
+
+    def read(self, name: str, steps: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Column ``name``, rows ``[start, stop)`` of ``steps`` only.
+
+        Rows of a windowed column, see `MetricsRecorder`, cover
+        ``steps_per_row`` steps each, the first one starting at
+        ``first_step``. Columns without ``steps_per_row`` are not per step
+        and are always read whole.
+        """
+        info = self.columns[name]
+        dtype = np.dtype(info["dtype"])
+        shape = tuple(info["shape"])
+        size = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        column = (
+            self.data[info["offset"] : info["offset"] + size].view(dtype).reshape(shape)
+        )
+        steps_per_row = info.get("steps_per_row")
+        if steps is None or steps_per_row is None:
+            return column
+        first_step = info.get("first_step", 0)
+        start, stop = (max(step - first_step, 0) for step in steps)
+        return column[start // steps_per_row : -(-stop // steps_per_row)]
+
+    def get_buffer(
+        self, name: str, steps: Optional[Tuple[int, int]] = None
+    ) -> memoryview:
+        """Zero-copy buffer of a column, e.g. for ``pyarrow.py_buffer``."""
+        return memoryview(self.read(name, steps))
+
+    def get_agent_metric(
+        self,
+        metric: str,
+        agent_type: Optional[str] = None,
+        agent_ids: Optional[Iterable[int]] = None,
+        pool_id: Optional[int] = None,
+        steps: Optional[Tuple[int, int]] = None,
+    ) -> Dict[int, np.ndarray]:
+        """Per agent views of an agent metric such as ``portfolio/USDT``.
+
+        Agent columns hold every member of a population along the second
+        axis, so selecting agents and steps stays a view of the file.
+        """
+        column_metric, _, token = metric.partition("/")
+        agent_ids = None if agent_ids is None else set(agent_ids)
+        selected = {}
+        for name in self.find(
+            metric=column_metric, kind="agent", agent_type=agent_type, pool_id=pool_id
+        ):
+            info = self.columns[name]
+            column = self.read(name, steps)
+            if token:
+                if token not in info["tokens"]:
+                    continue
+                column = column[..., info["tokens"].index(token)]
+            for member, agent_id in enumerate(info["agent_ids"]):
+                if agent_ids is None or agent_id in agent_ids:
+                    selected[agent_id] = column[:, member]
+        return selected
@@ -0,0 +1,221 @@
+import asyncio
+import collections
+import itertools
+import json
+import threading
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from trade_simulator.utils.consts import DEFAULT_TELEMETRY_BUFFER_SIZE
+
+
+class RingBuffer:
+    """The last ``capacity`` rows of a fixed set of named columns."""
+
+    def __init__(self, columns: Sequence[str], capacity: int):
+        self.columns = list(columns)
+        self.capacity = capacity
+        self.steps = np.zeros(capacity, dtype=np.int64)
+        self.values = np.full((capacity, len(self.columns)), np.nan)
+        # Rows appended so far, the ring holds the last `capacity` of them.
+        self.count = 0
+
+    def append(self, step: int, row: Sequence[float]):
+        index = self.count % self.capacity
+        self.steps[index] = step
+        self.values[index] = row
+        self.count += 1
+
+    def get_rows(self, first: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Steps and values of the rows from row number ``first`` on, oldest
+        first, as far as they are still held."""
+        first = max(first, self.count - self.capacity)
+        if first >= self.count:
+            return self.steps[:0].copy(), self.values[:0].copy()
+        indexes = np.arange(first, self.count) % self.capacity
+        return self.steps[indexes], self.values[indexes]
+
+
+class TelemetryServer:
+    """Serves the latest sampled metrics over HTTP while a simulation runs.
+
+    ``GET /`` returns every ring buffer as JSON, ``GET /stream`` is a
+    Server-Sent Events stream with one event per published step. The
+    server runs an asyncio loop in a daemon thread. `publish` only appends
+    to the ring buffers and wakes that loop, every event is encoded once
+    there and shared by all clients, and a client that falls more than
+    ``buffer_size`` events behind skips the events it missed. So neither
+    the number of clients nor a slow one changes the cost of a step.
+    """
+
+    def __init__(
+        self,
+        sources: Dict[str, Sequence[str]],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        unix_socket: Optional[str] = None,
+        buffer_size: int = DEFAULT_TELEMETRY_BUFFER_SIZE,
+    ):
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.buffers = {
+            name: RingBuffer(columns, buffer_size) for name, columns in sources.items()
+        }
+        # Guards the ring buffers, held for copies of bounded size only.
+        self.lock = threading.Lock()
+        self.published = 0
+        # (event number, encoded event) of the last `buffer_size` events,
+        # only touched from the server thread.
+        self.events: Deque[Tuple[int, bytes]] = collections.deque(maxlen=buffer_size)
+        self.encoded = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.server = None
+        self.thread: Optional[threading.Thread] = None
+        self.new_events: Optional[asyncio.Event] = None
+
+    @property
+    def address(self) -> str:
+        if self.unix_socket is not None:
+            return f"unix:{self.unix_socket}"
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        started = threading.Event()
+        errors: List[BaseException] = []
+
+        def serve():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.loop.run_until_complete(self._start_server())
+            except BaseException as error:
+                errors.append(error)
+                started.set()
+                return
+            started.set()
+            self.loop.run_forever()
+            self.loop.close()
+
+        self.thread = threading.Thread(target=serve, name="telemetry", daemon=True)
+        self.thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    async def _start_server(self):
+        self.new_events = asyncio.Event()
+        if self.unix_socket is not None:
+            self.server = await asyncio.start_unix_server(
+                self._handle_client, path=self.unix_socket
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self._handle_client, self.host, self.port
+            )
+            self.port = self.server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        if self.loop is None:
+            return
+
+        async def shutdown():
+            self.server.close()
+            current = asyncio.current_task()
+            tasks = [task for task in asyncio.all_tasks() if task is not current]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+        self.thread.join()
+        self.loop = None
+
+    def publish(self, step: int, rows: Dict[str, Sequence[float]]):
+        """Append one sampled row per source. Called from the simulation."""
+        with self.lock:
+            for name, row in rows.items():
+                self.buffers[name].append(step, row)
+            self.published += 1
+        self.loop.call_soon_threadsafe(self._encode_events)
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            rows = {name: buffer.get_rows() for name, buffer in self.buffers.items()}
+        return {
+            name: {
+                "columns": self.buffers[name].columns,
+                "steps": steps.tolist(),
+                "values": np.where(np.isnan(values), None, values).tolist(),
+            }
+            for name, (steps, values) in rows.items()
+        }
+
+    def _encode_events(self):
+        # Every source gets a row per publish, so row and event numbers match.
+        with self.lock:
+            published = self.published
+            rows = {
+                name: buffer.get_rows(self.encoded)
+                for name, buffer in self.buffers.items()
+            }
+        number_of_events = min(published - self.encoded, self.events.maxlen)
+        for i in range(number_of_events):
+            event = {}
+            for name, (steps, values) in rows.items():
+                event["step"] = int(steps[i])
+                # NaN, a column without values yet, is not valid JSON.
+                event[name] = {
+                    column: None if value != value else value
+                    for column, value in zip(
+                        self.buffers[name].columns, values[i].tolist()
+                    )
+                }
+            number = published - number_of_events + i + 1
+            self.events.append((number, f"data: {json.dumps(event)}\n\n".encode()))
+        self.encoded = published
+        self.new_events.set()
+        self.new_events = asyncio.Event()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            path = request.split(b" ", 2)[1].decode()
+            if path == "/stream":
+                await self._stream(writer)
+            elif path == "/":
+                body = json.dumps(self.get_snapshot()).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n\r\n"
+        )
+        last_sent = self.encoded
+        while True:
+            new_events = self.new_events
+            missed = self.encoded - last_sent
+            for _, event in itertools.islice(
+                self.events, max(len(self.events) - missed, 0), None
+            ):
+                writer.write(event)
+            last_sent = self.encoded
+            # Events published while waiting here are picked up in one go.
+            await writer.drain()
+            if last_sent == self.encoded:
+                await new_events.wait()
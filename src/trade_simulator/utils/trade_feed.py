@@ -0,0 +1,185 @@
+import csv
+import json
+import struct
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from trade_simulator.utils.consts import ORDER_OPERATION_TYPE_CODES
+
+MAGIC = b"TSFEED01"
+FOOTER_MARKER = b"FOOT"
+END_MARKER = b"TSFEDEND"
+_U64 = struct.Struct("<Q")
+
+# Fixed-width trades sorted by step. Tokens are codes into the token list
+# of the feed, -1 for a missing second token.
+TRADE_FEED_DTYPE = np.dtype(
+    [
+        ("step", "<i8"),
+        ("volume", "<f8"),
+        ("token", "<i4"),
+        ("second_token", "<i4"),
+        ("operation_type", "u1"),
+    ],
+    align=True,
+)
+
+ROWS_PER_WRITE = 65_536
+
+
+def convert_csv_to_trade_feed(csv_path: str, feed_path: str):
+    """Convert a CSV trade tape to a trade feed file.
+
+    The CSV needs the columns ``step``, ``operation_type`` (BUY or SELL),
+    ``token`` and ``volume``. ``second_token`` is optional, trades without
+    it are made against the other token of a two token pool. Rows have to be
+    sorted by step. They are streamed, so the tape is never held in memory
+    at once, and the step -> first record index is built on the way.
+
+    File layout::
+
+        MAGIC | records of TRADE_FEED_DTYPE* | index of u64[number_of_steps + 1]
+        FOOT | footer json | u64 footer length | END_MARKER
+    """
+    tokens: List[str] = []
+    token_codes: Dict[str, int] = {}
+
+    def get_token_code(token: Optional[str]) -> int:
+        if not token:
+            return -1
+        code = token_codes.get(token)
+        if code is None:
+            code = token_codes[token] = len(tokens)
+            tokens.append(token)
+        return code
+
+    # Trades per step, grown as steps come.
+    counts = np.zeros(1_024, dtype=np.int64)
+    number_of_records = 0
+    last_step = -1
+    with open(csv_path, newline="") as source, open(feed_path, "wb") as target:
+        target.write(MAGIC)
+        rows = []
+        for row in csv.DictReader(source):
+            step = int(row["step"])
+            if step < last_step:
+                raise ValueError(
+                    f"Trades have to be sorted by step, got step {step} after {last_step}."
+                )
+            if step < 0:
+                raise ValueError(f"Trade step has to be more or equal to 0, got {step}.")
+            operation_type_code = ORDER_OPERATION_TYPE_CODES.get(row["operation_type"])
+            if operation_type_code is None:
+                raise ValueError(
+                    f"Unsupported order operation type {row['operation_type']}."
+                )
+            last_step = step
+            if step >= len(counts):
+                grown = np.zeros(max(step + 1, 2 * len(counts)), dtype=np.int64)
+                grown[: len(counts)] = counts
+                counts = grown
+            counts[step] += 1
+            rows.append(
+                (
+                    step,
+                    float(row["volume"]),
+                    get_token_code(row["token"]),
+                    get_token_code(row.get("second_token")),
+                    operation_type_code,
+                )
+            )
+            if len(rows) == ROWS_PER_WRITE:
+                target.write(np.array(rows, dtype=TRADE_FEED_DTYPE).tobytes())
+                number_of_records += len(rows)
+                rows = []
+        if rows:
+            target.write(np.array(rows, dtype=TRADE_FEED_DTYPE).tobytes())
+            number_of_records += len(rows)
+
+        number_of_steps = last_step + 1
+        index = np.zeros(number_of_steps + 1, dtype="<u8")
+        np.cumsum(counts[:number_of_steps], out=index[1:])
+        target.write(index.tobytes())
+        footer = json.dumps(
+            {
+                "tokens": tokens,
+                "number_of_records": number_of_records,
+                "number_of_steps": number_of_steps,
+            }
+        ).encode()
+        target.write(FOOTER_MARKER)
+        target.write(footer)
+        target.write(_U64.pack(len(footer)))
+        target.write(END_MARKER)
+
+
+class TradeFeed:
+    """Memory-mapped reader of a trade feed file.
+
+    Only the records of the steps asked for are ever read from disk.
+    Pickled by path, so agents holding a feed can be checkpointed and sent
+    to shard workers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.open()
+
+    def open(self):
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a trade feed file.")
+            f.seek(-len(END_MARKER), 2)
+            if f.read() != END_MARKER:
+                raise ValueError(f"{self.path} is incomplete.")
+            f.seek(-len(END_MARKER) - _U64.size, 2)
+            (footer_length,) = _U64.unpack(f.read(_U64.size))
+            f.seek(-len(END_MARKER) - _U64.size - footer_length, 2)
+            footer = json.loads(f.read(footer_length))
+        self.tokens: List[str] = footer["tokens"]
+        self.number_of_steps: int = footer["number_of_steps"]
+        number_of_records = footer["number_of_records"]
+        self.records = np.memmap(
+            self.path,
+            dtype=TRADE_FEED_DTYPE,
+            mode="r",
+            offset=len(MAGIC),
+            shape=(number_of_records,),
+        )
+        self.index = np.memmap(
+            self.path,
+            dtype="<u8",
+            mode="r",
+            offset=len(MAGIC) + number_of_records * TRADE_FEED_DTYPE.itemsize,
+            shape=(self.number_of_steps + 1,),
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"path": self.path}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.path = state["path"]
+        self.open()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get_step(self, step: int) -> np.ndarray:
+        """Records of the trades at ``step``, a view into the mapped file."""
+        if not 0 <= step < self.number_of_steps:
+            return self.records[:0]
+        return self.records[int(self.index[step]) : int(self.index[step + 1])]
+
+    def get_next_step(self, step: int) -> Optional[int]:
+        """First step after ``step`` with trades, None if there is none."""
+        if step + 1 >= self.number_of_steps:
+            return None
+        first = max(step + 1, 0)
+        # Steps with trades are the ones the index grows after.
+        next_step = (
+            int(np.searchsorted(self.index, self.index[first], side="right")) - 1
+        )
+        if next_step >= self.number_of_steps:
+            return None
+        return next_step
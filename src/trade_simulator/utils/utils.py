@@ -2,13 +2,17 @@ from typing import Any, Dict, Optional
 
 import yaml
 
-from trade_simulator.utils.consts import AMM_TYPES
+from trade_simulator.utils.consts import AMM_TYPES, METRICS_CADENCE_MODES
+
+# The libyaml loader parses several times faster, PyYAML may be built
+# without it.
+SettingsLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 def read_settings(path: str) -> Optional[Dict[str, Any]]:
     data = None
     with open(path, "r") as stream:
-        data = yaml.safe_load(stream)
+        data = yaml.load(stream, Loader=SettingsLoader)
     return data
 
 
@@ -20,9 +24,31 @@ def check_amm_settings(amm_settings: Dict[str, Any], pool_settings: Dict[str, An
     if amm_type not in AMM_TYPES:
         raise ValueError(f"Amm type '{amm_type}' is not supported.")
 
-    if amm_type == "UniswapV2" and len(pool_settings["tokens"]) != 2:
+    if (
+        amm_type in ("UniswapV2", "UniswapV2Ensemble")
+        and len(pool_settings["tokens"]) != 2
+    ):
         raise ValueError(f"For {amm_type} type 2 tokens only required.")
 
+    if amm_type == "UniswapV2Ensemble":
+        variants = amm_settings.get("variants")
+        if not variants:
+            raise ValueError(f"For {amm_type} type at least 1 variant is required.")
+        primary_variant = amm_settings.get("primary_variant", 0)
+        if not 0 <= primary_variant < len(variants):
+            raise ValueError(
+                f"Parameter 'primary_variant' has to be in [0, {len(variants)}), got {primary_variant}."
+            )
+        tokens = {token["name"] for token in pool_settings["tokens"]}
+        for variant in variants:
+            if "fee" not in variant:
+                raise ValueError("Expecting parameter 'fee' in every ensemble variant.")
+            start_quantities = variant.get("start_quantities")
+            if start_quantities is not None and set(start_quantities) != tokens:
+                raise ValueError(
+                    f"Ensemble variant start quantities have to cover tokens {sorted(tokens)}."
+                )
+
 
 def check_pool_tokens_settings(tokens_settings: Dict[str, Any], pool_id: int):
     if len(tokens_settings) < 2:
@@ -77,3 +103,15 @@ def check_pools_settings(pools_settings: Dict[str, Any]):
             raise ValueError(f"Pool with id: {pool_id} require 'tokens' field.")
         check_pool_tokens_settings(settings["tokens"], pool_id)
         check_amm_settings(settings["amm_settings"], settings)
+        check_metrics_cadence(settings.get("metrics_cadence", {}))
+
+
+def check_metrics_cadence(cadence: Dict[str, Dict[str, Any]]):
+    for pattern, settings in cadence.items():
+        mode = settings.get("mode")
+        if mode not in METRICS_CADENCE_MODES:
+            raise ValueError(f"Unsupported metrics cadence mode {mode} for '{pattern}'.")
+        if mode != "full" and settings.get("steps", 0) < 1:
+            raise ValueError(
+                f"Parameter 'steps' of metrics cadence '{pattern}' has to be more or equal to 1, got {settings.get('steps')}."
+            )
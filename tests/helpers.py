@@ -0,0 +1,132 @@
+"""Builders of settings, pools and orders shared by the tests."""
+import random
+from types import SimpleNamespace
+
+import numpy as np
+
+from trade_simulator.order.order import Order
+from trade_simulator.pool.pool import Pool
+from trade_simulator.simulation.simulation import Simulation
+
+
+def make_settings(metrics_output_mode="json"):
+    portfolio = [
+        {"name": "USDT", "quantity": 1000},
+        {"name": "DAI", "quantity": 1000},
+    ]
+    return {
+        "meta_info": {"experiment_id": 1, "experiment_name": "checkpoint test"},
+        "simulation": {
+            "steps_of_simulation": 60,
+            "metrics_output": {"mode": metrics_output_mode, "flush_every_steps": 7},
+            "checkpoints": {"at_steps": [25]},
+            "pools_settings": {
+                "pools": [
+                    {
+                        "id": 1,
+                        "name": "pool",
+                        "steps_to_check_orderbook": 1,
+                        "step_to_start_simulation": 0,
+                        "amm_settings": {"type": "UniswapV2", "fee": 0.001},
+                        "tokens": [
+                            {"name": "USDT", "start_quantity": 10_000},
+                            {"name": "DAI", "start_quantity": 10_000},
+                        ],
+                    }
+                ]
+            },
+            "agents_settings": {
+                "agents": [
+                    {
+                        "agent_type": "SimpleMarketMaker",
+                        "agent_settings": {
+                            "rules": [
+                                {
+                                    "pool_id": 1,
+                                    "token_as_asset": "DAI",
+                                    "token_as_currency": "USDT",
+                                    "lower_bound_of_asset_price_in_currency": 0.999,
+                                    "upper_bound_of_asset_price_in_currency": 1.001,
+                                    "middle_price": 1.0,
+                                    "steps_to_make_action_in_case_passivity": 5,
+                                    "max_assets_to_buy": 100,
+                                    "max_assets_to_sell": 100,
+                                }
+                            ],
+                            "portfolio": portfolio,
+                        },
+                    }
+                ],
+                "agents_batches": [
+                    {
+                        "number_of_agents": 10,
+                        "agent_type": "SinglePoolFoolishRandomTrader",
+                        "agent_settings": {
+                            "token_as_currency": "USDT",
+                            "pool_id": 1,
+                            "steps_to_make_new_transaction": 2,
+                            "probability_to_make_order": 0.5,
+                            "portfolio": portfolio,
+                        },
+                    }
+                ],
+            },
+        },
+    }
+
+
+def run(settings):
+    random.seed(3)
+    np.random.seed(3)
+    simulation = Simulation(plots="none", progress=False, **settings)
+    simulation.run()
+    return simulation
+
+
+def make_pool(amm_type="UniswapV2", tokens=("USDT", "DAI"), fee=0.0):
+    return Pool(
+        id=1,
+        name="pool",
+        steps_to_check_orderbook=1,
+        step_to_start_simulation=0,
+        amm_settings={"type": amm_type, "fee": fee},
+        tokens=[{"name": token, "start_quantity": 1_000} for token in tokens],
+    )
+
+
+def make_order(operation_type, limit_price, order_type="Limit", lifetime=None, volume=10):
+    trader = SimpleNamespace(id=0, portfolio={"USDT": 1_000, "DAI": 1_000})
+    return Order(
+        trader=trader,
+        creation_timestamp=0,
+        operation_type=operation_type,
+        token="DAI",
+        token_volume=volume,
+        order_type=order_type,
+        limit_price=limit_price,
+        second_token="USDT",
+        lifetime=lifetime,
+    )
+
+
+def make_orders(tokens, seed):
+    rng = random.Random(seed)
+    traders = [
+        SimpleNamespace(portfolio={token: rng.choice([5, 50, 500]) for token in tokens})
+        for _ in range(10)
+    ]
+    orders = []
+    for timestamp in range(20):
+        for _ in range(30):
+            token, second_token = rng.sample(tokens, 2)
+            orders.append(
+                Order(
+                    trader=rng.choice(traders),
+                    creation_timestamp=timestamp,
+                    operation_type=rng.choice(["BUY", "SELL"]),
+                    token=token,
+                    token_volume=rng.choice([1, 2.5, 40, 2_000]),
+                    second_token=second_token,
+                )
+            )
+    return traders, orders
@@ -0,0 +1,37 @@
+from benchmarks.run_benchmarks import compare_to_baseline
+from benchmarks.scenarios import make_settings, run_scenario
+
+
+def test_make_settings_spreads_agents_over_pools():
+    settings = make_settings(agents=5, pools=3, steps=10)["simulation"]
+    assert len(settings["pools_settings"]["pools"]) == 3
+    assert [
+        batch["number_of_agents"]
+        for batch in settings["agents_settings"]["agents_batches"]
+    ] == [2, 2, 1]
+
+
+def test_run_scenario_with_resting_limit_orders():
+    result = run_scenario(
+        {"name": "tiny", "agents": 10, "pools": 2, "steps": 20, "limit_orders": 10}
+    )
+    assert result["steps_per_second"] > 0 and result["orders_per_second"] > 0
+    assert result["peak_rss_mib"] > 0
+
+
+def test_compare_to_baseline():
+    baseline = {
+        "scenarios": {"a": {"steps_per_second": 100.0, "peak_rss_mib": 100.0}},
+        "micro": {"b": {"ns_per_order": 100.0}},
+    }
+    results = {
+        "scenarios": {
+            "a": {"steps_per_second": 80.0, "peak_rss_mib": 130.0},
+            "new": {"steps_per_second": 1.0},
+        },
+        "micro": {"b": {"ns_per_order": 130.0}},
+    }
+    regressions = compare_to_baseline(results, baseline, tolerance=0.25)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("scenarios/a peak_rss_mib")
+    assert regressions[1].startswith("micro/b ns_per_order")
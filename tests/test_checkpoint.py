@@ -0,0 +1,87 @@
+import copy
+import gzip
+import struct
+
+import numpy as np
+import pytest
+
+from tests.helpers import make_settings, run
+from trade_simulator.simulation.simulation import CHECKPOINT_MAGIC, Simulation
+from trade_simulator.utils.consts import CHECKPOINT_VERSION
+from trade_simulator.utils.metrics_stream import read_metrics_stream
+
+
+def get_state(simulation):
+    return (
+        simulation.pools[1].export_metrics(),
+        [agent.metrics for agent in simulation.agents],
+    )
+
+
+def test_resume_matches_uninterrupted_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simulation = run(make_settings())
+    expected = get_state(simulation)
+
+    checkpoint = simulation.get_checkpoint_path(25)
+    resumed = Simulation.from_checkpoint(checkpoint)
+    assert resumed.current_step == 25
+    resumed.run()
+    assert get_state(resumed) == expected
+
+
+def test_resume_stream_into_new_experiment(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simulation = run(make_settings("stream"))
+    expected = read_metrics_stream(simulation.metrics_stream.path)
+
+    settings = make_settings("stream")
+    settings["meta_info"]["experiment_id"] = 2
+    resumed = Simulation.from_checkpoint(
+        simulation.get_checkpoint_path(25), settings=settings
+    )
+    resumed.run()
+    assert resumed.metrics_stream.path.endswith("Experiment_2/metrics.stream")
+    columns, scalars = read_metrics_stream(resumed.metrics_stream.path)
+    assert scalars == expected[1]
+    assert columns.keys() == expected[0].keys()
+    for name, values in columns.items():
+        assert np.array_equal(values, expected[0][name])
+
+
+def test_resume_with_new_settings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simulation = run(make_settings())
+    checkpoint = simulation.get_checkpoint_path(25)
+
+    settings = make_settings()
+    settings["simulation"]["steps_of_simulation"] = 80
+    settings["simulation"]["pools_settings"]["pools"][0]["amm_settings"]["fee"] = 0.01
+    resumed = Simulation.from_checkpoint(checkpoint, settings=copy.deepcopy(settings))
+    assert resumed.pools[1].amm_agent.fee == 0.01
+    resumed.run()
+    assert len(resumed.pools[1].metrics["k"]) == 81
+
+    settings["simulation"]["agents_settings"]["agents_batches"][0][
+        "number_of_agents"
+    ] = 11
+    with pytest.raises(ValueError, match="Checkpoint has 11 agents, got 12."):
+        Simulation.from_checkpoint(checkpoint, settings=settings)
+
+
+def test_checkpoint_of_other_version_is_rejected_before_unpickling(tmp_path):
+    # Neither file holds a pickle, so only the header may be read.
+    legacy = tmp_path / "legacy.ckpt"
+    legacy.write_bytes(gzip.compress(b"not a pickle"))
+    with pytest.raises(ValueError, match="was written before version"):
+        Simulation.from_checkpoint(str(legacy))
+
+    older = tmp_path / "older.ckpt"
+    older.write_bytes(
+        CHECKPOINT_MAGIC
+        + struct.pack("<I", CHECKPOINT_VERSION - 1)
+        + gzip.compress(b"not a pickle")
+    )
+    with pytest.raises(ValueError, match="Unsupported checkpoint version"):
+        Simulation.from_checkpoint(str(older))
+
@@ -0,0 +1,105 @@
+import random
+
+import numpy as np
+
+from tests.helpers import make_pool
+from trade_simulator.agents.cross_pool_arbitrageur import (
+    get_optimal_cycle_volume,
+    get_swap_output,
+)
+from trade_simulator.pool.pair_index import TokenPairIndex
+from trade_simulator.simulation.simulation import Simulation
+
+
+def test_optimal_cycle_volume_matches_brute_force():
+    reserves = (1_000.0, 1_100.0, 0.997, 900.0, 1_000.0, 0.999)
+
+    def profit(volume):
+        volume_b = get_swap_output(*reserves[:3], volume)
+        return get_swap_output(*reserves[3:], volume_b) - volume
+
+    volume = get_optimal_cycle_volume(*reserves)
+    grid = np.linspace(0, 200, 200_001)
+    best = grid[np.argmax([profit(v) for v in grid])]
+    assert abs(volume - best) < 1e-2
+    assert profit(volume) > 0
+    assert get_optimal_cycle_volume(1_000, 1_000, 0.997, 1_000, 1_000, 0.997) < 0
+
+
+def test_pair_index_reports_changed_pairs_only():
+    pools = {
+        1: make_pool("UniswapV2", ["USDT", "DAI"], fee=0.003),
+        2: make_pool("Mariana", ["DAI", "USDT", "USDC", "WETH"], fee=0.003),
+        3: make_pool("Mariana", ["USDC", "WETH", "USDT"], fee=0.003),
+    }
+    index = TokenPairIndex(pools)
+    assert index.get_pairs() == [
+        ("DAI", "USDT"),
+        ("USDC", "USDT"),
+        ("USDC", "WETH"),
+        ("USDT", "WETH"),
+    ]
+    assert index.get_pool_ids("USDT", "DAI") == [1, 2]
+    assert index.get_pool_ids("DAI", "WETH") == []
+    assert index.pop_changed_pairs(pools) == set(index.get_pairs())
+    assert index.pop_changed_pairs(pools) == set()
+
+    pools[3].set_reserves({"WETH": pools[3].tokens_info["WETH"] + 10})
+    assert index.pop_changed_pairs(pools) == {("USDC", "WETH"), ("USDT", "WETH")}
+    # A new version with the same reserves changes nothing.
+    pools[1].set_reserves({})
+    assert index.pop_changed_pairs(pools) == set()
+
+
+def make_settings():
+    portfolio = [
+        {"name": "USDT", "quantity": 10_000},
+        {"name": "DAI", "quantity": 10_000},
+    ]
+    pools = [
+        {
+            "id": pool_id,
+            "name": f"pool {pool_id}",
+            "steps_to_check_orderbook": 1,
+            "step_to_start_simulation": 0,
+            "amm_settings": {"type": "UniswapV2", "fee": 0.001},
+            "tokens": [
+                {"name": "USDT", "start_quantity": 100_000},
+                {"name": "DAI", "start_quantity": 100_000},
+            ],
+        }
+        for pool_id in (1, 2)
+    ]
+    return {
+        "meta_info": {"experiment_id": 1, "experiment_name": "arbitrage test"},
+        "simulation": {
+            "steps_of_simulation": 50,
+            "pools_settings": {"pools": pools},
+            "agents_settings": {
+                "agents": [
+                    {
+                        "agent_type": "CrossPoolArbitrageur",
+                        "agent_settings": {"portfolio": portfolio},
+                    }
+                ],
+            },
+        },
+    }
+
+
+def test_arbitrageur_closes_price_gap_with_profit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    random.seed(3)
+    simulation = Simulation(plots="none", progress=False, **make_settings())
+    pool = simulation.pools[1]
+    pool.set_reserves({"USDT": 110_000})
+
+    def get_price(pool_id):
+        return simulation.pools[pool_id].amm_agent.get_price("DAI", "USDT")
+
+    simulation.run()
+    arbitrageur = simulation.agents[0]
+    assert arbitrageur.agent_metrics["sell_orders"]
+    assert abs(get_price(1) / get_price(2) - 1) < 0.003
+    assert arbitrageur.portfolio["DAI"] > 10_000
+    assert abs(arbitrageur.portfolio["USDT"] - 10_000) < 1e-6
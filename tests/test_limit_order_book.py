@@ -0,0 +1,43 @@
+from tests.helpers import make_order, make_pool
+from trade_simulator.order.limit_order_book import LimitOrderBook
+
+
+def test_pop_crossing_returns_best_limit_first():
+    book = LimitOrderBook()
+    low, high = make_order("BUY", 0.9), make_order("BUY", 1.1)
+    book.add(low)
+    book.add(high)
+
+    prices = {("USDT", "DAI"): 1.0}
+    get_price = lambda token_in, token_out: prices[(token_in, token_out)]
+    assert book.pop_crossing(get_price) is high
+    assert book.pop_crossing(get_price) is None
+    prices[("USDT", "DAI")] = 0.8
+    assert book.pop_crossing(get_price) is low
+    assert book.is_empty()
+
+
+def test_pop_expired_uses_lifetime():
+    book = LimitOrderBook()
+    order = make_order("SELL", 2.0, lifetime=5)
+    book.add(order)
+    assert book.pop_expired(5) == []
+    assert book.pop_expired(6) == [order]
+
+
+def test_market_order_triggers_only_crossed_limit_orders():
+    pool = make_pool()
+    crossed = make_order("SELL", 1.01)
+    not_crossed = make_order("SELL", 1.5)
+    expiring = make_order("SELL", 1.5, lifetime=0)
+    market = make_order("BUY", None, order_type="Market", volume=50)
+    for order in (crossed, not_crossed, expiring, market):
+        pool.add_order(order)
+
+    pool.execute_orders(1)
+
+    assert market.status == "Succeed"
+    assert crossed.status == "Succeed"
+    assert not_crossed.status == "Awaiting"
+    assert expiring.status == "Canceled"
+    assert list(pool.order_book) == [not_crossed]
@@ -0,0 +1,26 @@
+import math
+
+from tests.helpers import make_orders, make_pool
+
+TOKENS = ["USDT", "DAI", "USDC", "WETH"]
+
+
+def test_prices_and_k_follow_swaps():
+    pool = make_pool("Mariana", TOKENS, fee=0.003)
+    amm = pool.amm_agent
+    pool.set_reserves({"WETH": 0})
+    _, orders = make_orders(TOKENS, seed=2)
+    for timestamp in range(20):
+        step_orders = [o for o in orders if o.creation_timestamp == timestamp]
+        for order in step_orders:
+            amm.execute_order(order, timestamp)
+        amm.write_metrics()
+        amm.write_metrics()
+
+        reserves = pool.tokens_info
+        for a in TOKENS:
+            for b in TOKENS:
+                expected = reserves[b] / reserves[a] if reserves[a] else float("inf")
+                assert amm.get_price(a, b) == expected
+        k = math.prod(pool.tokens_info.values())
+        assert pool.metrics["k"][-2:].tolist() == [k, k]
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from trade_simulator.utils.metrics import MetricsRecorder
+
+
+def test_series_grow_past_capacity():
+    recorder = MetricsRecorder(capacity=2)
+    series = recorder.register("k")
+    for value in range(5):
+        series.append(value)
+    assert series.view().tolist() == [0, 1, 2, 3, 4]
+    assert series.last() == 4
+    series.set_last(10)
+    assert series.last() == 10
+
+
+def test_export_restores_nested_layout():
+    recorder = MetricsRecorder(capacity=4)
+    recorder.register("portfolio", "USDT").append(1.5)
+    recorder.register(
+        "profit_from_fees", "DAI", "timestamp", dtype=np.int64, initial=[0]
+    )
+    recorder.register("profit_from_fees", "DAI", "value", initial=[0])
+
+    assert recorder.export() == {
+        "portfolio": {"USDT": [1.5]},
+        "profit_from_fees": {"DAI": {"timestamp": [0], "value": [0.0]}},
+    }
+    assert isinstance(recorder.views()["portfolio"]["USDT"], np.ndarray)
+
+    with pytest.raises(ValueError, match="Metric portfolio/USDT is already registered."):
+        recorder.register("portfolio", "USDT")
+
+
+@pytest.mark.parametrize("mode", ["every", "ohlc", "welford"])
+def test_windowed_series_repeated_values_match_single_appends(mode):
+    values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0, 5.0, 3.0, 5.0]
+    one_by_one = MetricsRecorder(cadence={"*": {"mode": mode, "steps": 4}})
+    batched = MetricsRecorder(cadence={"*": {"mode": mode, "steps": 4}})
+    single = one_by_one.register("price")
+    repeated = batched.register("price")
+    for value, count in zip(values, [1, 2, 7, 1, 3, 9, 1, 1, 4, 2, 5]):
+        for _ in range(count):
+            single.append(value)
+        repeated.append_repeated(value, count)
+    assert np.allclose(repeated.view(), single.view())
+    assert len(repeated) == len(single) == 9
+    assert repeated.last() == single.last() == 5.0
+
+
+def test_windowed_series_statistics():
+    recorder = MetricsRecorder(
+        cadence={
+            "k": {"mode": "every", "steps": 3},
+            "price_*": {"mode": "ohlc", "steps": 3},
+            "portfolio/*": {"mode": "welford", "steps": 3},
+            "*": {"mode": "full"},
+        }
+    )
+    values = [2.0, 5.0, 1.0, 4.0, 3.0]
+    series = [
+        recorder.register("k", initial=values[:1]),
+        recorder.register("price_of_USDT_DAI"),
+        recorder.register("portfolio", "USDT"),
+        recorder.register("number_of_orders"),
+        recorder.register("profit_from_fees", "DAI", "value", per_step=False),
+    ]
+    for value in values[1:]:
+        series[0].append(value)
+    for one_series in series[1:]:
+        for value in values:
+            one_series.append(value)
+
+    assert series[0].view().tolist() == [2.0, 4.0]
+    assert series[1].view().tolist() == [[2.0, 5.0, 1.0, 1.0], [4.0, 4.0, 3.0, 3.0]]
+    welford = series[2].view()
+    assert welford[:, 0].tolist() == [3, 2]
+    assert np.allclose(welford[:, 1], [np.mean(values[:3]), np.mean(values[3:])])
+    assert np.allclose(welford[:, 2], [np.var(values[:3]), np.var(values[3:])])
+    assert series[3].view().tolist() == values
+    assert series[4].view().tolist() == values
+    with pytest.raises(TypeError):
+        series[1].set_last(1.0)
+
+    # Only closed windows are drained, `finish` closes the open one.
+    assert series[1].drain().tolist() == [[2.0, 5.0, 1.0, 1.0]]
+    assert recorder.finish()
+    assert series[1].drain().tolist() == [[4.0, 4.0, 3.0, 3.0]]
+    assert not recorder.finish()
+
+
+def test_windowed_series_export_their_layout():
+    recorder = MetricsRecorder(cadence={"price_*": {"mode": "ohlc", "steps": 2}})
+    series = recorder.register("price_of_USDT_DAI")
+    for value in [1.0, 3.0, 2.0]:
+        series.append(value)
+    assert recorder.export() == {
+        "price_of_USDT_DAI": {
+            "steps": 2,
+            "columns": ["open", "high", "low", "close"],
+            "values": [[1.0, 3.0, 1.0, 3.0], [2.0, 2.0, 2.0, 2.0]],
+        }
+    }
@@ -0,0 +1,64 @@
+import numpy as np
+
+from tests.helpers import make_settings, run
+from trade_simulator.simulation.simulation import Simulation
+from trade_simulator.utils.metrics_stream import MetricsStreamWriter, read_metrics_stream
+
+
+def write_stream(path, close=True):
+    writer = MetricsStreamWriter(path)
+    writer.write_chunk(0, 1, {"pool_1/k": np.array([1.0, 2.0])})
+    writer.write_chunk(2, 3, {"pool_1/k": np.array([3.0, 4.0])})
+    if close:
+        writer.close({"pool_1": {"total_number_of_unique_orders": 5}})
+    else:
+        writer.file.close()
+
+
+def test_stream_round_trip(tmp_path):
+    path = str(tmp_path / "metrics.stream")
+    write_stream(path)
+    columns, scalars = read_metrics_stream(path)
+    assert columns["pool_1/k"].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert scalars == {"pool_1": {"total_number_of_unique_orders": 5}}
+
+
+def test_finished_chunks_survive_a_crash(tmp_path):
+    path = tmp_path / "metrics.stream"
+    write_stream(str(path), close=False)
+    data = path.read_bytes()
+    path.write_bytes(data[:-10])
+
+    columns, scalars = read_metrics_stream(str(path))
+    assert columns["pool_1/k"].tolist() == [1.0, 2.0]
+    assert scalars == {}
+
+
+def test_stream_matches_json_with_metrics_cadence(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cadence = {
+        "k": {"mode": "every", "steps": 10},
+        "price_of_*": {"mode": "ohlc", "steps": 10},
+        "portfolio/*": {"mode": "welford", "steps": 10},
+    }
+    settings = make_settings()
+    settings["simulation"]["metrics_cadence"] = cadence
+    expected = run(settings).pools[1].metrics
+    assert expected["k"].shape == (7,)
+    assert expected["price_of_USDT_DAI"].shape == (6, 4)
+    assert expected["portfolio"]["DAI"].shape == (6, 3)
+
+    settings = make_settings("stream")
+    settings["simulation"]["metrics_cadence"] = cadence
+    simulation = run(settings)
+    resumed = Simulation.from_checkpoint(simulation.get_checkpoint_path(25))
+    resumed.run()
+    for stream in (simulation, resumed):
+        columns, _ = read_metrics_stream(stream.metrics_stream.path)
+        assert np.array_equal(columns["pool_1/k"], expected["k"])
+        assert np.array_equal(
+            columns["pool_1/price_of_USDT_DAI"], expected["price_of_USDT_DAI"]
+        )
+        assert np.allclose(
+            columns["pool_1/portfolio/DAI"], expected["portfolio"]["DAI"]
+        )
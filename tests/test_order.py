@@ -0,0 +1,51 @@
+import pickle
+
+import pytest
+
+from trade_simulator.order.order import Order
+from trade_simulator.utils.consts import AWAITING, BUY, CANCELED, LIMIT
+
+
+def make_order(**kwargs):
+    settings = {
+        "trader": None,
+        "creation_timestamp": 0,
+        "operation_type": "BUY",
+        "token": "DAI",
+        "token_volume": 1,
+        "second_token": "USDT",
+    }
+    settings.update(kwargs)
+    return Order(**settings)
+
+
+def test_order_keeps_codes_behind_string_view():
+    order = make_order(order_type="Limit", limit_price=1.0)
+    assert order.operation_type_code == BUY
+    assert order.order_type_code == LIMIT
+    assert order.status_code == AWAITING
+    assert (order.operation_type, order.order_type, order.status) == (
+        "BUY",
+        "Limit",
+        "Awaiting",
+    )
+    assert (order.token, order.second_token) == ("DAI", "USDT")
+
+    order.status = "Canceled"
+    assert order.status_code == CANCELED
+    assert not hasattr(order, "__dict__")
+
+
+def test_order_fields_are_checked():
+    with pytest.raises(ValueError, match="Unsupported order operation type HOLD."):
+        make_order(operation_type="HOLD")
+    with pytest.raises(ValueError, match="Unsupported order type Stop."):
+        make_order(order_type="Stop")
+    with pytest.raises(ValueError, match="Order priority has to be more or equal to 1"):
+        make_order(priority=0)
+
+
+def test_order_pickle_round_trip():
+    order = pickle.loads(pickle.dumps(make_order()))
+    assert (order.token, order.second_token) == ("DAI", "USDT")
+    assert order.operation_type == "BUY"
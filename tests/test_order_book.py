@@ -0,0 +1,62 @@
+from tests.helpers import make_order, make_pool
+from trade_simulator.order.order_book import OrderBook
+from trade_simulator.utils.consts import CANCELED, SUCCEED
+
+
+def make_market_order(trader_id, creation_timestamp=0, priority=1):
+    order = make_order("BUY", None, order_type="Market")
+    order.trader.id = trader_id
+    order.creation_timestamp = creation_timestamp
+    order.priority = priority
+    return order
+
+
+def test_market_orders_are_bucketed_independently_of_arrival_order():
+    orders = [
+        make_market_order(trader_id, creation_timestamp, priority)
+        for creation_timestamp in (1, 0)
+        for priority in (2, 1)
+        for trader_id in range(20)
+    ]
+    book = OrderBook(seed=5)
+    for order in orders:
+        book.add(order)
+    popped = book.pop_market_orders()
+    assert [(o.creation_timestamp, o.priority) for o in popped] == sorted(
+        (o.creation_timestamp, o.priority) for o in orders
+    )
+    assert [o.trader.id for o in popped[:20]] != list(range(20))
+
+    reversed_book = OrderBook(seed=5)
+    for order in reversed(orders):
+        reversed_book.add(order)
+    assert reversed_book.pop_market_orders() == popped
+    assert book.pop_market_orders() == []
+
+
+def test_status_counts_follow_settled_orders():
+    book = OrderBook(seed=0)
+    market = [make_market_order(trader_id) for trader_id in range(3)]
+    limit = make_order("SELL", 2.0)
+    for order in market + [limit]:
+        book.add(order)
+    assert len(book) == 4
+    assert len(book.get_traders()) == 4
+
+    book.pop_market_orders()
+    market[0].status_code = SUCCEED
+    market[1].status_code = CANCELED
+    market[2].status_code = SUCCEED
+    book.settle(market)
+    assert book.status_counts == [1, 2, 1]
+    assert book.get_traders() == [limit.trader]
+    assert list(book) == [limit]
+
+    pool = make_pool()
+    book.record_status_counts(pool.status_count_series)
+    assert book.status_counts == [1, 0, 0]
+    assert [series.last() for series in pool.status_count_series] == [1, 2, 1]
+
+    limit.status_code = CANCELED
+    book.settle([limit])
+    assert book.is_empty() and book.limit_orders == []
@@ -0,0 +1,126 @@
+import copy
+import random
+
+import numpy as np
+import pytest
+
+from trade_simulator.order.order_flow import read_order_flow
+from trade_simulator.simulation.replay import replay_order_flow
+from trade_simulator.simulation.simulation import Simulation
+
+
+def make_settings():
+    portfolio = [
+        {"name": "USDT", "quantity": 1000},
+        {"name": "DAI", "quantity": 1000},
+    ]
+    return {
+        "meta_info": {"experiment_id": 1, "experiment_name": "order flow test"},
+        "simulation": {
+            "steps_of_simulation": 60,
+            "order_flow": {"record": True},
+            "checkpoints": {"at_steps": [25]},
+            "pools_settings": {
+                "pools": [
+                    {
+                        "id": 1,
+                        "name": "pool",
+                        "steps_to_check_orderbook": 1,
+                        "step_to_start_simulation": 0,
+                        "amm_settings": {"type": "UniswapV2", "fee": 0.001},
+                        "tokens": [
+                            {"name": "USDT", "start_quantity": 10_000},
+                            {"name": "DAI", "start_quantity": 10_000},
+                        ],
+                    }
+                ]
+            },
+            "agents_settings": {
+                "agents": [
+                    {
+                        "agent_type": "SimpleMarketMaker",
+                        "agent_settings": {
+                            "rules": [
+                                {
+                                    "pool_id": 1,
+                                    "token_as_asset": "DAI",
+                                    "token_as_currency": "USDT",
+                                    "lower_bound_of_asset_price_in_currency": 0.999,
+                                    "upper_bound_of_asset_price_in_currency": 1.001,
+                                    "middle_price": 1.0,
+                                    "steps_to_make_action_in_case_passivity": 5,
+                                    "max_assets_to_buy": 100,
+                                    "max_assets_to_sell": 100,
+                                }
+                            ],
+                            "portfolio": portfolio,
+                        },
+                    }
+                ],
+                "agents_batches": [
+                    {
+                        "number_of_agents": 10,
+                        "agent_type": "SinglePoolFoolishRandomTrader",
+                        "agent_settings": {
+                            "token_as_currency": "USDT",
+                            "pool_id": 1,
+                            "steps_to_make_new_transaction": 2,
+                            "probability_to_make_order": 0.5,
+                            "portfolio": portfolio,
+                        },
+                    }
+                ],
+            },
+        },
+    }
+
+
+def run(settings):
+    random.seed(3)
+    np.random.seed(3)
+    simulation = Simulation(plots="none", progress=False, **settings)
+    simulation.run()
+    return simulation
+
+
+def test_replay_reproduces_recorded_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    settings = make_settings()
+    simulation = run(copy.deepcopy(settings))
+    order_flow = read_order_flow(simulation.order_flow_recorder.path)
+    assert len(order_flow.records) == simulation.pools[1].total_number_of_unique_orders
+    assert order_flow.steps == 60
+    assert sorted(order_flow.portfolios) == [agent.id for agent in simulation.agents]
+
+    pools_settings = settings["simulation"]["pools_settings"]
+    pools = replay_order_flow(order_flow, copy.deepcopy(pools_settings))
+    assert pools[1].export_metrics() == simulation.pools[1].export_metrics()
+
+    pools_settings["pools"][0]["amm_settings"]["fee"] = 0.01
+    pools = replay_order_flow(order_flow, pools_settings)
+    assert pools[1].metrics["k"][-1] != simulation.pools[1].metrics["k"][-1]
+
+
+def test_resumed_run_continues_order_flow(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simulation = run(make_settings())
+    expected = read_order_flow(simulation.order_flow_recorder.path)
+
+    settings = make_settings()
+    settings["meta_info"]["experiment_id"] = 2
+    resumed = Simulation.from_checkpoint(
+        simulation.get_checkpoint_path(25), settings=settings
+    )
+    resumed.run()
+    assert resumed.order_flow_recorder.path.endswith("Experiment_2/order_flow.bin")
+    order_flow = read_order_flow(resumed.order_flow_recorder.path)
+    # Byte comparison, missing limit prices are NaN.
+    assert order_flow.records.tobytes() == expected.records.tobytes()
+    assert order_flow.tokens == expected.tokens
+
+
+def test_incomplete_order_flow_is_rejected(tmp_path):
+    path = tmp_path / "order_flow.bin"
+    path.write_bytes(b"TSOFLOW1" + b"\0" * 16)
+    with pytest.raises(ValueError, match="is incomplete"):
+        read_order_flow(str(path))
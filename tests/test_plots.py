@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from tests.helpers import make_settings, run
+from trade_simulator.utils import plots
+from trade_simulator.utils.plots import (
+    evict_plot_cache,
+    render_plot_job,
+    render_plot_jobs,
+)
+
+
+def make_job(path, values):
+    return {
+        "path": str(path),
+        "title": "title",
+        "xlabel": "Time Step",
+        "ylabel": "Value",
+        "series": [{"kind": "plot", "y": values, "label": "value"}],
+    }
+
+
+def forbid_drawing(monkeypatch):
+    def get_pyplot():
+        raise AssertionError("A cached plot was drawn again.")
+
+    monkeypatch.setattr(plots, "get_pyplot", get_pyplot)
+
+
+def test_cache_hit_and_miss(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    render_plot_job(make_job(tmp_path / "a.png", [1, 2, 3]), str(cache_dir))
+    assert len(os.listdir(cache_dir)) == 1
+
+    render_plot_job(make_job(tmp_path / "b.png", [1, 2, 4]), str(cache_dir))
+    assert len(os.listdir(cache_dir)) == 2
+
+    forbid_drawing(monkeypatch)
+    render_plot_job(make_job(tmp_path / "c.png", [1, 2, 3]), str(cache_dir))
+    assert (tmp_path / "c.png").read_bytes() == (tmp_path / "a.png").read_bytes()
+    # Plots sharing the cached file are replaced, never written through.
+    render_plot_job(make_job(tmp_path / "a.png", [1, 2, 4]), str(cache_dir))
+    assert (tmp_path / "a.png").read_bytes() == (tmp_path / "b.png").read_bytes()
+    assert (tmp_path / "c.png").read_bytes() != (tmp_path / "b.png").read_bytes()
+    with pytest.raises(AssertionError, match="drawn again"):
+        render_plot_job(make_job(tmp_path / "d.png", [5]), str(cache_dir))
+
+
+def test_cache_keeps_the_most_recently_used_plots(tmp_path):
+    for i in range(5):
+        path = tmp_path / f"{i}.png"
+        path.write_bytes(b"png")
+        os.utime(path, (i, i))
+    (tmp_path / "other.txt").write_text("kept")
+    evict_plot_cache(str(tmp_path), max_plots=3)
+    assert sorted(os.listdir(tmp_path)) == ["2.png", "3.png", "4.png", "other.txt"]
+
+
+def test_process_pool_renders_every_job(tmp_path):
+    jobs = [
+        make_job(tmp_path / f"{i}.png", [i, i + 1])
+        for i in range(plots.MIN_JOBS_FOR_PROCESS_POOL)
+    ]
+    render_plot_jobs(jobs, cache_dir=str(tmp_path / "cache"), processes=2)
+    for job in jobs:
+        assert os.path.getsize(job["path"]) > 0
+    assert len(os.listdir(tmp_path / "cache")) == len(jobs)
+
+
+@pytest.mark.parametrize("mode, agents", [("pools", 0), ("sample", 3), ("all", 11)])
+def test_plot_modes_select_agents(tmp_path, monkeypatch, mode, agents):
+    monkeypatch.chdir(tmp_path)
+    simulation = run(make_settings())
+    rendered, cache_dirs = [], []
+
+    def render_plot_jobs(jobs, cache_dir, processes):
+        rendered.extend(jobs)
+        cache_dirs.append(cache_dir)
+
+    monkeypatch.setattr(
+        "trade_simulator.simulation.simulation.render_plot_jobs", render_plot_jobs
+    )
+    simulation.plots = mode
+    simulation.plots_sample_size = 3
+    simulation.generate_plots()
+    agent_jobs = [job for job in rendered if "/agents_metrics/" in job["path"]]
+    assert len(agent_jobs) == 2 * agents
+    assert len(rendered) - len(agent_jobs) == 5
+    assert cache_dirs == ["Experiments_logs/checkpoint_test/.plots_cache"]
+
+
+def test_windowed_metrics_are_plotted_against_steps(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    settings = make_settings()
+    settings["simulation"]["metrics_cadence"] = {
+        "k": {"mode": "every", "steps": 5},
+        "price_*": {"mode": "ohlc", "steps": 5},
+        "portfolio/*": {"mode": "welford", "steps": 5},
+    }
+    pool = run(settings).pools[1]
+    recorder = pool.metrics_recorder
+
+    (k,) = plots.k_job(pool, "plots")["series"]
+    assert k["x"].tolist() == list(range(0, 61, 5))
+    assert k["y"].tolist() == recorder["k",].view().tolist()
+    price = plots.pair_balance_job(pool, "plots")["series"][0]
+    rows = recorder["price_of_USDT_DAI",].view()
+    assert price["x"].tolist() == list(range(0, 60, 5))
+    assert price["y"].tolist() == rows[:, 3].tolist()
+    for balance in plots.pool_balance_job(pool, "plots")["series"]:
+        rows = recorder["portfolio", balance["label"]].view()
+        assert balance["y"].tolist() == rows[:, 1].tolist()
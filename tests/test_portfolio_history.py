@@ -0,0 +1,51 @@
+import numpy as np
+
+from trade_simulator.utils.portfolio_history import (
+    PortfolioHistory,
+    PortfolioMatrixHistory,
+)
+
+
+def test_portfolio_history_stores_changes_only():
+    portfolio = {"USDT": 100.0, "DAI": 50.0}
+    history = PortfolioHistory(portfolio)
+    for position in range(1, 5):
+        if position == 3:
+            portfolio["USDT"] = 90.0
+        history.record(position, portfolio)
+
+    assert history.positions == {"USDT": [0, 3], "DAI": [0]}
+    assert history.dense(6) == {
+        "USDT": [100.0, 100.0, 100.0, 90.0, 90.0, 90.0],
+        "DAI": [50.0] * 6,
+    }
+    assert history.drain(4) == {
+        "USDT": [100.0, 100.0, 100.0, 90.0],
+        "DAI": [50.0] * 4,
+    }
+    assert history.dense(6) == {"USDT": [90.0, 90.0], "DAI": [50.0, 50.0]}
+
+
+def test_portfolio_matrix_history_matches_snapshots():
+    rng = np.random.default_rng(0)
+    portfolios = np.ones((4, 3))
+    history = PortfolioMatrixHistory(portfolios)
+    snapshots = [portfolios.copy()]
+    for position in range(1, 20):
+        if position % 3 == 0:
+            portfolios[rng.integers(4), rng.integers(3)] = rng.random()
+        history.record(position, portfolios)
+        snapshots.append(portfolios.copy())
+
+    expected = np.stack(snapshots)
+    assert len(history.changes) == 6
+    assert np.array_equal(history.dense(20), expected)
+    blocks = [block.copy() for block in history.dense_blocks(20, max_rows=2)]
+    assert max(len(block) for block in blocks) == 2
+    assert np.array_equal(np.concatenate(blocks), expected)
+    for row in range(4):
+        assert history.dense_row(row, 20) == expected[:, row].T.tolist()
+
+    assert np.array_equal(history.drain(10), expected[:10])
+    assert np.array_equal(history.dense(20), expected[10:])
+    assert history.dense_row(1, 20) == expected[10:, 1].T.tolist()
@@ -0,0 +1,34 @@
+import pytest
+
+from tests.helpers import make_order, make_pool
+
+
+def test_prices_are_cached_until_the_next_swap(monkeypatch):
+    pool = make_pool()
+    amm = pool.amm_agent
+    price = amm.get_asset_price_in_currency("DAI", "USDT")
+    assert amm.price_cache == {("DAI", "USDT", 1.0): price}
+    with monkeypatch.context() as context:
+        context.setattr(amm, "_get_asset_price_in_currency", None)
+        assert amm.get_asset_price_in_currency("DAI", "USDT") == price
+
+    amm.execute_order(make_order("BUY", None, order_type="Market"), 0)
+    assert amm.get_asset_price_in_currency("DAI", "USDT") > price
+    assert amm.get_price("USDT", "DAI") == (
+        pool.tokens_info["DAI"] / pool.tokens_info["USDT"]
+    )
+
+    quote = amm.get_asset_price_in_currency("DAI", "USDT", 10)
+    amm.update_settings(type="UniswapV2", fee=0.01)
+    assert amm.get_asset_price_in_currency("DAI", "USDT", 10) > quote
+
+
+def test_reserves_change_only_through_the_pool():
+    pool = make_pool()
+    with pytest.raises(TypeError):
+        pool.tokens_info["DAI"] = 0
+    version = pool.tokens_info_version
+    pool.swap_reserves("DAI", 10, "USDT", 5)
+    pool.set_reserves({"USDT": 2_000})
+    assert dict(pool.tokens_info) == {"USDT": 2_000, "DAI": 1_010}
+    assert pool.tokens_info_version == version + 2
@@ -0,0 +1,42 @@
+import json
+import random
+
+import numpy as np
+
+from tests.helpers import make_settings
+from trade_simulator.simulation.simulation import Simulation
+
+
+def test_profile_report(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    random.seed(3)
+    np.random.seed(3)
+    simulation = Simulation(
+        plots="none", progress=False, profile=True, **make_settings()
+    )
+    simulation.run()
+
+    with open(f"{simulation.experiment_logs_path}/profile.json") as f:
+        report = json.load(f)
+    assert report["steps"] == 60
+    assert {"execute_orders", "clean_order_book", "write_metrics"} <= set(
+        report["phases"]
+    )
+    assert set(report["agent_types"]) == {
+        "SinglePoolFoolishRandomTrader",
+        "SimpleMarketMaker",
+    }
+    pool = simulation.pools[1]
+    assert report["pools"]["1"]["submitted_orders"] == (
+        pool.total_number_of_unique_orders
+    )
+    assert report["pools"]["1"]["filled_orders"] == sum(
+        pool.metrics["number_of_Succeed_orders_in_order_book"]
+    )
+    assert report["memory"][-1]["step"] == 60
+
+    # Wrappers are gone after the run and did not end up in the checkpoint.
+    assert "execute_orders" not in vars(pool)
+    resumed = Simulation.from_checkpoint(simulation.get_checkpoint_path(25))
+    assert resumed.profiler is None
+    assert "execute_orders" not in vars(resumed.pools[1])
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from tests.helpers import make_settings, run
+from trade_simulator.utils.results_store import ResultsStore, ResultsStoreWriter
+
+
+def test_store_matches_json_metrics(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    expected = run(make_settings())
+    simulation = run(make_settings("store"))
+    store = ResultsStore(f"{simulation.experiment_logs_path}/results.store")
+
+    assert np.array_equal(store.read("pool_1/k"), expected.pools[1].metrics["k"])
+    assert store.find(metric="k", pool_id=1) == ["pool_1/k"]
+    assert store.scalars["pool_1"]["total_number_of_unique_orders"] == (
+        expected.pools[1].total_number_of_unique_orders
+    )
+    for agent_type in ("SimpleMarketMaker", "SinglePoolFoolishRandomTrader"):
+        agents = [agent for agent in expected.agents if agent.type == agent_type]
+        balances = store.get_agent_metric("portfolio/USDT", agent_type=agent_type)
+        assert sorted(balances) == [agent.id for agent in agents]
+        for agent in agents:
+            assert balances[agent.id].tolist() == agent.metrics["portfolio"]["USDT"]
+
+
+def test_step_range_is_a_view_of_the_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simulation = run(make_settings("store"))
+    store = ResultsStore(f"{simulation.experiment_logs_path}/results.store")
+
+    member = simulation.agents[3]
+    balances = store.get_agent_metric(
+        "portfolio/DAI", agent_ids=[member.id], steps=(10, 20)
+    )
+    assert list(balances) == [member.id]
+    # Agent portfolios start with the value before step 0.
+    assert balances[member.id].tolist() == member.metrics["portfolio"]["DAI"][11:21]
+    assert np.shares_memory(balances[member.id], store.data)
+
+    name = store.find(metric="portfolio", agent_id=member.id)[0]
+    buffer = store.get_buffer(name, steps=(10, 20))
+    assert buffer.readonly
+    assert np.array_equal(np.asarray(buffer), store.read(name)[11:21])
+
+
+def test_step_range_aligns_columns_with_an_initial_value(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simulation = run(make_settings("store"))
+    store = ResultsStore(f"{simulation.experiment_logs_path}/results.store")
+
+    steps = (10, 20)
+    k = store.read("pool_1/k", steps)
+    usdt = store.read("pool_1/portfolio/USDT", steps)
+    dai = store.read("pool_1/portfolio/DAI", steps)
+    assert len(store.read("pool_1/k")) == len(store.read("pool_1/portfolio/USDT")) + 1
+    assert len(k) == len(usdt) == 10
+    assert np.allclose(k, usdt * dai)
+    assert k.tolist() == simulation.pools[1].metrics["k"][11:21].tolist()
+
+
+def test_windowed_columns_are_sliced_by_window(tmp_path):
+    path = str(tmp_path / "results.store")
+    writer = ResultsStoreWriter(path)
+    writer.add_column("pool_1/k", np.arange(5.0), steps_per_row=10)
+    writer.add_column("pool_2/k", np.arange(5.0), steps_per_row=10, first_step=-1)
+    writer.add_column_blocks(
+        "pool_1/rows",
+        (np.ones((2, 3)), np.zeros((1, 3))),
+        np.float64,
+        (3, 3),
+    )
+    writer.close({})
+
+    store = ResultsStore(path)
+    assert store.read("pool_1/k", steps=(15, 31)).tolist() == [1.0, 2.0, 3.0]
+    assert store.read("pool_2/k", steps=(15, 29)).tolist() == [1.0, 2.0]
+    assert store.read("pool_1/rows").sum() == 6
+    for info in store.columns.values():
+        assert info["offset"] % 64 == 0
+
+
+def test_incomplete_store_is_rejected(tmp_path):
+    path = tmp_path / "results.store"
+    writer = ResultsStoreWriter(str(path))
+    writer.add_column("pool_1/k", np.arange(5.0))
+    writer.close({})
+    path.write_bytes(path.read_bytes()[:-4])
+    with pytest.raises(ValueError, match="incomplete"):
+        ResultsStore(str(path))
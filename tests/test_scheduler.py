@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+
+from trade_simulator.simulation.scheduler import AgentScheduler
+from trade_simulator.simulation.simulation import Simulation
+
+
+def test_scheduler_pops_due_actors_only():
+    scheduler = AgentScheduler(["a", "b"], 0)
+    assert scheduler.pop_due(0) == ["a", "b"]
+    scheduler.push("a", 5)
+    scheduler.push("b", 3)
+    assert scheduler.get_next_step() == 3
+    assert scheduler.pop_due(2) == []
+    assert scheduler.pop_due(4) == ["b"]
+    assert scheduler.pop_due(10) == ["a"]
+    assert scheduler.get_next_step() is None
+
+
+def make_settings(execution):
+    portfolio = [
+        {"name": "USDT", "quantity": 100},
+        {"name": "DAI", "quantity": 100},
+    ]
+    trader_settings = {
+        "token_as_currency": "USDT",
+        "pool_id": 1,
+        "steps_to_make_new_transaction": 40,
+        "probability_to_make_order": 0.7,
+        "portfolio": portfolio,
+    }
+    return {
+        "meta_info": {"experiment_id": 1, "experiment_name": "scheduler test"},
+        "simulation": {
+            "steps_of_simulation": 300,
+            "execution": execution,
+            "pools_settings": {
+                "pools": [
+                    {
+                        "id": 1,
+                        "name": "pool",
+                        "steps_to_check_orderbook": 1,
+                        "step_to_start_simulation": 0,
+                        "amm_settings": {"type": "UniswapV2", "fee": 0.001},
+                        "tokens": [
+                            {"name": "USDT", "start_quantity": 10_000},
+                            {"name": "DAI", "start_quantity": 10_000},
+                        ],
+                    }
+                ]
+            },
+            "agents_settings": {
+                "agents": [
+                    {
+                        "agent_type": "SinglePoolFoolishRandomTrader",
+                        "agent_settings": trader_settings,
+                    }
+                ]
+                * 5,
+                "agents_batches": [
+                    {
+                        "number_of_agents": 5,
+                        "agent_type": "SinglePoolFoolishRandomTrader",
+                        "agent_settings": trader_settings,
+                    }
+                ],
+            },
+        },
+    }
+
+
+def run(execution):
+    random.seed(7)
+    np.random.seed(7)
+    simulation = Simulation(plots="none", progress=False, **make_settings(execution))
+    simulation.run()
+    return simulation
+
+
+def test_idle_steps_are_skipped_without_changing_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scheduled = run({})
+    # The sharded workers call every agent at every step.
+    every_step = run({"mode": "sharded", "processes": 1})
+
+    pool = scheduled.pools[1]
+    assert pool.total_number_of_unique_orders > 0
+    assert len(pool.metrics["k"]) == 301
+    assert len(pool.metrics["number_of_Awaiting_orders_in_order_book"]) == 600
+    assert pool.export_metrics() == every_step.pools[1].export_metrics()
+    assert [agent.metrics for agent in scheduled.agents] == [
+        agent.metrics for agent in every_step.agents
+    ]
@@ -0,0 +1,136 @@
+import random
+
+import numpy as np
+
+from trade_simulator.simulation.sharding import partition_pools
+from trade_simulator.simulation.simulation import Simulation
+
+
+def make_rule(pool_id, asset, currency):
+    return {
+        "pool_id": pool_id,
+        "token_as_asset": asset,
+        "token_as_currency": currency,
+        "lower_bound_of_asset_price_in_currency": 0.999,
+        "upper_bound_of_asset_price_in_currency": 1.001,
+        "middle_price": 1.0,
+        "steps_to_make_action_in_case_passivity": 5,
+        "max_assets_to_buy": 100,
+        "max_assets_to_sell": 100,
+    }
+
+
+def make_portfolio(tokens):
+    return [{"name": token, "quantity": 1000} for token in tokens]
+
+
+def make_settings(execution, rules):
+    pools = []
+    for pool_id, amm_type, tokens in (
+        (1, "UniswapV2", ["USDT", "DAI"]),
+        (2, "Mariana", ["DAI", "USDT", "USDC", "WETH"]),
+        (3, "UniswapV2", ["USDC", "WETH"]),
+    ):
+        pools.append(
+            {
+                "id": pool_id,
+                "name": f"pool {pool_id}",
+                "steps_to_check_orderbook": 1,
+                "step_to_start_simulation": 0,
+                "amm_settings": {"type": amm_type, "fee": 0.001},
+                "tokens": [
+                    {"name": token, "start_quantity": 10_000} for token in tokens
+                ],
+            }
+        )
+    batches = [
+        {
+            "number_of_agents": 20,
+            "agent_type": "SinglePoolFoolishRandomTrader",
+            "agent_settings": {
+                "token_as_currency": pool["tokens"][0]["name"],
+                "pool_id": pool["id"],
+                "steps_to_make_new_transaction": 2,
+                "probability_to_make_order": 0.5,
+                "portfolio": make_portfolio(
+                    [token["name"] for token in pool["tokens"]]
+                ),
+            },
+        }
+        for pool in pools
+    ]
+    return {
+        "meta_info": {"experiment_id": 1, "experiment_name": "sharding test"},
+        "simulation": {
+            "steps_of_simulation": 80,
+            "execution": execution,
+            "pools_settings": {"pools": pools},
+            "agents_settings": {
+                "agents": [
+                    {
+                        "agent_type": "SimpleMarketMaker",
+                        "agent_settings": {
+                            "rules": rules,
+                            "portfolio": make_portfolio(
+                                ["USDT", "DAI", "USDC", "WETH"]
+                            ),
+                        },
+                    }
+                ],
+                "agents_batches": batches,
+            },
+        },
+    }
+
+
+RULES = [make_rule(1, "DAI", "USDT"), make_rule(3, "WETH", "USDC")]
+
+
+def run(execution, rules=RULES):
+    random.seed(5)
+    np.random.seed(5)
+    simulation = Simulation(
+        plots="none", progress=False, **make_settings(execution, rules)
+    )
+    simulation.run()
+    return simulation
+
+
+def get_state(simulation):
+    return (
+        {pool_id: pool.export_metrics() for pool_id, pool in simulation.pools.items()},
+        [agent.metrics for agent in simulation.agents],
+    )
+
+
+def test_partition_keeps_pools_sharing_agent_tokens_together():
+    simulation = Simulation(
+        plots="none",
+        progress=False,
+        **make_settings({}, RULES + [make_rule(2, "WETH", "USDT")]),
+    )
+    shards = partition_pools(simulation.pools, simulation.actors, 3)
+    assert sorted(shards) == [[1, 2, 3]]
+
+    simulation = Simulation(plots="none", progress=False, **make_settings({}, RULES))
+    shards = partition_pools(simulation.pools, simulation.actors, 2)
+    assert sorted(len(shard) for shard in shards) == [1, 2]
+
+
+def test_sharded_run_matches_single_process_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    expected = get_state(run({}))
+    sharded = run({"mode": "sharded", "processes": 3})
+    assert sharded.pools[1].total_number_of_unique_orders > 0
+    assert get_state(sharded) == expected
+
+
+def test_sharded_run_with_barrier_interval(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simulation = run({"mode": "sharded", "processes": 2, "barrier_every_steps": 7})
+    assert len(simulation.pools[2].metrics["k"]) == 80
+    assert len(simulation.agents[0].metrics["portfolio"]["USDT"]) == 81
+    assert (
+        simulation.agents[0].metrics["buy_orders"]
+        + simulation.agents[0].metrics["sell_orders"]
+    )
@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+from trade_simulator.agents.single_pool_foolish_random_trader_population import (
+    SinglePoolFoolishRandomTraderPopulation,
+)
+from trade_simulator.order.order import Order
+from trade_simulator.pool.pool import Pool
+
+
+def make_pool():
+    return Pool(
+        id=1,
+        name="pool",
+        steps_to_check_orderbook=1,
+        step_to_start_simulation=0,
+        amm_settings={"type": "UniswapV2", "fee": 0.001},
+        tokens=[
+            {"name": "USDT", "start_quantity": 100_000},
+            {"name": "DAI", "start_quantity": 100_000},
+        ],
+    )
+
+
+def make_population(pool, number_of_agents=50, probability_to_make_order=1.0):
+    return SinglePoolFoolishRandomTraderPopulation(
+        number_of_agents,
+        pool,
+        token_as_currency="USDT",
+        pool_id=1,
+        steps_to_make_new_transaction=3,
+        probability_to_make_order=probability_to_make_order,
+        portfolio=[
+            {"name": "USDT", "quantity": 100},
+            {"name": "DAI", "quantity": 100},
+        ],
+    )
+
+
+def test_population_places_orders_for_due_agents_only():
+    pool = make_pool()
+    population = make_population(pool)
+
+    population.complete_agent_action(0)
+    assert len(pool.order_book) == 0
+
+    population.complete_agent_action(3)
+    assert len(pool.order_book) == 50
+    assert pool.metrics["total_number_of_unique_orders"] == 50
+    for order in pool.order_book:
+        assert order.token != order.second_token
+        assert order.token_volume in (1, 2, 3)
+        assert order.trader.pool is pool
+
+    population.complete_agent_action(4)
+    assert len(pool.order_book) == 50
+
+
+def test_population_members_keep_agent_metrics_layout():
+    pool = make_pool()
+    population = make_population(pool, number_of_agents=3)
+    member = population.members[1]
+    member.id = 7
+
+    population.complete_agent_action(3)
+    member.portfolio["USDT"] -= 10
+    population.complete_agent_action(4)
+
+    metrics = member.metrics
+    assert list(metrics.keys()) == [
+        "portfolio",
+        "sell_orders",
+        "buy_orders",
+        "pool_id",
+        "id",
+        "type",
+    ]
+    assert metrics["portfolio"]["USDT"] == [100, 100, 90]
+    assert metrics["portfolio"]["DAI"] == [100, 100, 100]
+    assert len(metrics["sell_orders"]) + len(metrics["buy_orders"]) == 1
+    assert metrics["pool_id"] == [1]
+    assert metrics["id"] == 7
+    assert metrics["type"] == "SinglePoolFoolishRandomTrader"
+
+
+def test_members_keep_balance_types_of_an_agent_portfolio():
+    population = make_population(make_pool(), number_of_agents=1)
+    member = population.members[0]
+    member.id = 0
+    agent = SimpleNamespace(id=1, portfolio={"USDT": 100, "DAI": 100})
+    pools = [make_pool(), make_pool()]
+    for timestamp, operation_type in enumerate(["BUY", "SELL", "BUY"]):
+        for pool, trader in zip(pools, [member, agent]):
+            pool.add_order(
+                Order(
+                    trader=trader,
+                    creation_timestamp=timestamp,
+                    operation_type=operation_type,
+                    token="DAI",
+                    token_volume=2,
+                    second_token="USDT",
+                )
+            )
+            pool.execute_orders(timestamp)
+        population.update_metrics()
+        assert dict(member.portfolio) == agent.portfolio
+        for token, balance in agent.portfolio.items():
+            assert isinstance(member.portfolio[token], int) == isinstance(balance, int)
+
+    # DAI only ever changed by whole volumes, USDT took a float at step 0.
+    portfolio = member.metrics["portfolio"]
+    assert portfolio["DAI"] == [100, 102, 100, 102]
+    assert [type(balance) for balance in portfolio["DAI"]] == [int] * 4
+    assert [type(balance) for balance in portfolio["USDT"]] == [int] + [float] * 3
@@ -0,0 +1,105 @@
+import pytest
+
+from trade_simulator.sweep.sweep import (
+    build_runs,
+    expand_overrides,
+    run_sweep,
+    set_by_path,
+)
+
+
+def make_settings():
+    return {
+        "meta_info": {"experiment_id": 1, "experiment_name": "sweep test"},
+        "simulation": {
+            "steps_of_simulation": 30,
+            "pools_settings": {
+                "pools": [
+                    {
+                        "id": 1,
+                        "name": "pool",
+                        "steps_to_check_orderbook": 1,
+                        "step_to_start_simulation": 0,
+                        "amm_settings": {"type": "UniswapV2", "fee": 0.001},
+                        "tokens": [
+                            {"name": "USDT", "start_quantity": 10_000},
+                            {"name": "DAI", "start_quantity": 10_000},
+                        ],
+                    }
+                ]
+            },
+            "agents_settings": {
+                "agents_batches": [
+                    {
+                        "number_of_agents": 5,
+                        "agent_type": "SinglePoolFoolishRandomTrader",
+                        "agent_settings": {
+                            "token_as_currency": "USDT",
+                            "pool_id": 1,
+                            "steps_to_make_new_transaction": 2,
+                            "probability_to_make_order": 0.5,
+                            "portfolio": [
+                                {"name": "USDT", "quantity": 100},
+                                {"name": "DAI", "quantity": 100},
+                            ],
+                        },
+                    }
+                ]
+            },
+        },
+    }
+
+
+FEE_PATH = "simulation.pools_settings.pools[0].amm_settings.fee"
+
+
+def test_set_by_path():
+    settings = make_settings()
+    set_by_path(settings, FEE_PATH, 0.01)
+    assert settings["simulation"]["pools_settings"]["pools"][0]["amm_settings"] == {
+        "type": "UniswapV2",
+        "fee": 0.01,
+    }
+    with pytest.raises(ValueError, match="does not exist"):
+        set_by_path(settings, "simulation.pools_settings.pools[3].id", 1)
+    with pytest.raises(ValueError, match="does not exist"):
+        set_by_path(settings, "simulation.pools_settings.pools[0].amm_settings.fe", 1)
+    assert "fe" not in settings["simulation"]["pools_settings"]["pools"][0][
+        "amm_settings"
+    ]
+
+
+def test_expand_overrides():
+    grid = expand_overrides({"parameters": {"a": [1, 2], "b": ["x", "y", "z"]}})
+    assert len(grid) == 6 and {"a": 2, "b": "z"} in grid
+
+    spec = {
+        "mode": "random",
+        "samples": 5,
+        "parameters": {"a": {"low": 0.1, "high": 0.2}, "b": [1, 2]},
+    }
+    draws = expand_overrides(spec)
+    assert draws == expand_overrides(spec)
+    assert all(0.1 <= draw["a"] <= 0.2 and draw["b"] in (1, 2) for draw in draws)
+
+    with pytest.raises(ValueError, match="Unsupported sweep mode"):
+        expand_overrides({"mode": "bayes"})
+
+
+def test_runs_are_reproducible_per_seed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sweep_settings = {"seeds": [1, 2, 1], "parameters": {FEE_PATH: [0.001, 0.01]}}
+    assert [
+        run["settings"]["meta_info"]["experiment_id"]
+        for run in build_runs(make_settings(), sweep_settings)
+    ] == list(range(6))
+
+    results = run_sweep(make_settings(), sweep_settings, processes=1)
+
+    assert len(results) == 6
+    assert (tmp_path / "Experiments_logs/sweep_test_sweep/sweep_results.csv").exists()
+    assert (tmp_path / "Experiments_logs/sweep_test_sweep/Experiment_5").is_dir()
+    # Runs 0 and 2 share the fee and the seed, run 1 only the fee.
+    summary = results.drop(columns="run_id")
+    assert summary.iloc[0].equals(summary.iloc[2])
+    assert not summary.iloc[0].equals(summary.iloc[1])
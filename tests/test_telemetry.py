@@ -0,0 +1,75 @@
+import json
+import random
+import socket
+import urllib.request
+
+import numpy as np
+
+from tests.helpers import make_settings
+from trade_simulator.simulation.simulation import Simulation
+from trade_simulator.utils.telemetry import RingBuffer, TelemetryServer
+
+
+def test_ring_buffer_keeps_last_rows():
+    buffer = RingBuffer(["a", "b"], capacity=3)
+    for step in range(5):
+        buffer.append(step, [step, -step])
+    steps, values = buffer.get_rows()
+    assert steps.tolist() == [2, 3, 4]
+    assert values[:, 1].tolist() == [-2, -3, -4]
+    assert buffer.get_rows(4)[0].tolist() == [4]
+    assert buffer.get_rows(5)[0].tolist() == []
+
+
+def read_event(stream):
+    line = stream.readline()
+    assert stream.readline() == b"\n"
+    return json.loads(line.removeprefix(b"data: "))
+
+
+def test_server_streams_published_rows():
+    server = TelemetryServer({"pool_1": ["k", "price"]}, buffer_size=4)
+    server.start()
+    try:
+        with socket.create_connection(("127.0.0.1", server.port)) as client:
+            client.sendall(b"GET /stream HTTP/1.1\r\n\r\n")
+            stream = client.makefile("rb")
+            while stream.readline() != b"\r\n":
+                pass
+            server.publish(9, {"pool_1": [100.0, np.nan]})
+            server.publish(19, {"pool_1": [101.0, 1.5]})
+            assert read_event(stream) == {
+                "step": 9,
+                "pool_1": {"k": 100.0, "price": None},
+            }
+            assert read_event(stream)["pool_1"]["k"] == 101.0
+
+        with urllib.request.urlopen(f"{server.address}/") as response:
+            snapshot = json.load(response)
+        assert snapshot["pool_1"]["steps"] == [9, 19]
+        assert snapshot["pool_1"]["values"] == [[100.0, None], [101.0, 1.5]]
+    finally:
+        server.stop()
+
+
+def test_simulation_publishes_sampled_metrics(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    published = []
+    monkeypatch.setattr(
+        TelemetryServer,
+        "publish",
+        lambda self, step, rows: published.append((step, rows)),
+    )
+    settings = make_settings()
+    settings["simulation"]["telemetry"] = {"every_steps": 20}
+    random.seed(1)
+    simulation = Simulation(plots="none", progress=False, **settings)
+    simulation.run()
+
+    assert [step for step, _ in published] == [19, 39, 59]
+    pool = simulation.pools[1]
+    columns = simulation.get_telemetry_sources()["pool_1"]
+    last_row = dict(zip(columns, published[-1][1]["pool_1"]))
+    assert last_row["k"] == pool.metrics["k"][-1]
+    assert "portfolio/USDT" in last_row
+    assert "profit_from_fees/USDT/timestamp" not in last_row
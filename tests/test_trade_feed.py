@@ -0,0 +1,100 @@
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from trade_simulator.simulation.simulation import Simulation
+from trade_simulator.utils.trade_feed import TradeFeed, convert_csv_to_trade_feed
+
+TAPE = """step,operation_type,token,volume
+2,BUY,DAI,10
+2,SELL,USDT,5.5
+5,SELL,DAI,3
+9,BUY,USDT,1
+"""
+
+
+def make_feed(tmp_path, tape=TAPE):
+    csv_path = tmp_path / "trades.csv"
+    csv_path.write_text(tape)
+    feed_path = str(tmp_path / "trades.feed")
+    convert_csv_to_trade_feed(str(csv_path), feed_path)
+    return feed_path
+
+
+def test_trade_feed_steps(tmp_path):
+    feed = TradeFeed(make_feed(tmp_path))
+    assert len(feed) == 4
+    assert feed.number_of_steps == 10
+    assert feed.tokens == ["DAI", "USDT"]
+    assert feed.get_step(2)["volume"].tolist() == [10.0, 5.5]
+    assert len(feed.get_step(3)) == 0
+    assert len(feed.get_step(12)) == 0
+    assert [feed.get_next_step(step) for step in (-5, 2, 5, 8, 9)] == [
+        2,
+        5,
+        9,
+        9,
+        None,
+    ]
+    restored = pickle.loads(pickle.dumps(feed))
+    assert isinstance(restored.records, np.memmap)
+    assert restored.get_step(5)["volume"].tolist() == [3.0]
+
+
+def test_unsorted_tape_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Trades have to be sorted by step"):
+        make_feed(
+            tmp_path,
+            "step,operation_type,token,volume\n3,BUY,DAI,1\n1,BUY,DAI,1\n",
+        )
+
+
+def test_trade_feed_trader_places_tape(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    random.seed(3)
+    settings = {
+        "meta_info": {"experiment_id": 1, "experiment_name": "trade feed test"},
+        "simulation": {
+            "steps_of_simulation": 20,
+            "pools_settings": {
+                "pools": [
+                    {
+                        "id": 1,
+                        "name": "pool",
+                        "steps_to_check_orderbook": 1,
+                        "step_to_start_simulation": 0,
+                        "amm_settings": {"type": "UniswapV2", "fee": 0.001},
+                        "tokens": [
+                            {"name": "USDT", "start_quantity": 10_000},
+                            {"name": "DAI", "start_quantity": 10_000},
+                        ],
+                    }
+                ]
+            },
+            "agents_settings": {
+                "agents": [
+                    {
+                        "agent_type": "TradeFeedTrader",
+                        "agent_settings": {
+                            "path": make_feed(tmp_path),
+                            "pool_id": 1,
+                            "first_step": 3,
+                            "portfolio": [
+                                {"name": "USDT", "quantity": 1000},
+                                {"name": "DAI", "quantity": 1000},
+                            ],
+                        },
+                    }
+                ]
+            },
+        },
+    }
+    simulation = Simulation(plots="none", progress=False, **settings)
+    simulation.run()
+    agent = simulation.agents[0]
+    assert agent.metrics["buy_orders"] == [5, 12]
+    assert agent.metrics["sell_orders"] == [5, 8]
+    assert simulation.pools[1].total_number_of_unique_orders == 4
+    assert agent.portfolio != {"USDT": 1000, "DAI": 1000}
@@ -0,0 +1,22 @@
+from tests.helpers import make_orders, make_pool
+
+
+def run(write_every_order):
+    pool = make_pool("UniswapV2", ["USDT", "DAI"], fee=0.003)
+    _, orders = make_orders(["USDT", "DAI"], seed=1)
+    for timestamp in range(20):
+        for order in orders:
+            if order.creation_timestamp != timestamp:
+                continue
+            pool.amm_agent.execute_order(order, timestamp)
+            if write_every_order:
+                pool.amm_agent.write_profit_from_fees(timestamp)
+        pool.amm_agent.write_profit_from_fees(timestamp)
+    return pool.export_metrics()["profit_from_fees"]
+
+
+def test_profit_from_fees_written_once_per_step():
+    per_step = run(write_every_order=False)
+    assert per_step == run(write_every_order=True)
+    assert per_step["USDT"]["timestamp"] == list(range(20))
+    assert per_step["DAI"]["value"][-1] > 0
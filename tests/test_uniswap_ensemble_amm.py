@@ -0,0 +1,175 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from trade_simulator.order.order import Order
+from trade_simulator.pool.pool import Pool
+from trade_simulator.utils.utils import check_amm_settings
+
+VARIANTS = [
+    {"fee": 0.003},
+    {"fee": 0.01},
+    {"fee": 0.003, "start_quantities": {"USDT": 2_000, "DAI": 3_000}},
+]
+
+
+def make_pool(amm_settings, start_quantities=None):
+    start_quantities = start_quantities or {"USDT": 1_000, "DAI": 1_000}
+    return Pool(
+        id=1,
+        name="pool",
+        steps_to_check_orderbook=1,
+        step_to_start_simulation=0,
+        amm_settings=amm_settings,
+        tokens=[
+            {"name": token, "start_quantity": quantity}
+            for token, quantity in start_quantities.items()
+        ],
+    )
+
+
+def run(pool, limit_orders=False):
+    rng = random.Random(5)
+    trader = SimpleNamespace(id=0, portfolio={"USDT": 1e12, "DAI": 1e12})
+    for step in range(20):
+        pool.execute_orders(step)
+        for _ in range(10):
+            token, second_token = rng.sample(["USDT", "DAI"], 2)
+            pool.add_order(
+                Order(
+                    trader=trader,
+                    creation_timestamp=step,
+                    operation_type=rng.choice(["BUY", "SELL"]),
+                    token=token,
+                    token_volume=rng.choice([1, 2.5, 40]),
+                    second_token=second_token,
+                )
+            )
+        if limit_orders:
+            pool.add_order(
+                Order(
+                    trader=trader,
+                    creation_timestamp=step,
+                    operation_type="SELL",
+                    token="DAI",
+                    token_volume=3,
+                    order_type="Limit",
+                    limit_price=0.9,
+                    lifetime=5,
+                    second_token="USDT",
+                )
+            )
+        pool.amm_agent.write_metrics()
+    pool.execute_orders(20)
+    pool.amm_agent.write_metrics()
+    return pool
+
+
+@pytest.mark.parametrize("limit_orders", [False, True])
+def test_variants_match_separate_pools(limit_orders):
+    ensemble = run(
+        make_pool({"type": "UniswapV2Ensemble", "variants": VARIANTS}),
+        limit_orders,
+    )
+    metrics = ensemble.metrics
+    assert ensemble.amm_agent.fee == 0.003
+    assert list(metrics["variants"]["0"]["k"]) == pytest.approx(list(metrics["k"]))
+
+    for i, variant in enumerate(VARIANTS):
+        pool = run(
+            make_pool(
+                {"type": "UniswapV2", "fee": variant["fee"]},
+                variant.get("start_quantities"),
+            ),
+            limit_orders,
+        )
+        if i == 0 or not limit_orders:
+            # With limit orders the variants fill what the primary triggered,
+            # the separate pools trigger limit orders at their own prices.
+            expected = pool.metrics
+            variant_metrics = metrics["variants"][str(i)]
+            assert list(variant_metrics["k"]) == pytest.approx(list(expected["k"]))
+            assert list(variant_metrics["price_of_USDT_DAI"]) == pytest.approx(
+                list(expected["price_of_USDT_DAI"])
+            )
+            assert variant_metrics["profit_from_fees"]["USDT"][-1] == pytest.approx(
+                expected["profit_from_fees"]["USDT"]["value"][-1]
+            )
+
+
+def execute_buy(pool, trader, volume):
+    order = Order(
+        trader=trader,
+        creation_timestamp=0,
+        operation_type="BUY",
+        token="DAI",
+        token_volume=volume,
+        second_token="USDT",
+    )
+    pool.add_order(order)
+    pool.execute_orders(0)
+    return order
+
+
+def test_variants_fill_by_their_own_reserves():
+    pool = make_pool(
+        {
+            "type": "UniswapV2Ensemble",
+            "variants": [
+                {"fee": 0.003, "start_quantities": {"USDT": 30, "DAI": 30}},
+                {"fee": 0.003},
+            ],
+        }
+    )
+    trader = SimpleNamespace(id=0, portfolio={"USDT": 1_000, "DAI": 0})
+    order = execute_buy(pool, trader, 40)
+
+    assert order.status == "Canceled"
+    assert trader.portfolio == {"USDT": 1_000, "DAI": 0}
+    primary, deep = pool.amm_agent.variant_reserves.tolist()
+    assert primary == [30, 30]
+    assert deep[1] == 960 and deep[0] > 1_000
+    assert pool.amm_agent.variant_profit_from_fees[1, 0] > 0
+
+
+def test_variants_check_the_trader_balance():
+    pool = make_pool(
+        {"type": "UniswapV2Ensemble", "variants": [{"fee": 0.0}, {"fee": 0.5}]}
+    )
+    # 10 DAI cost about 10.1 USDT without fee and 20.2 USDT with a 50% fee.
+    trader = SimpleNamespace(id=0, portfolio={"USDT": 15, "DAI": 0})
+    order = execute_buy(pool, trader, 10)
+
+    assert order.status == "Succeed"
+    primary, expensive = pool.amm_agent.variant_reserves.tolist()
+    assert primary[1] == 990
+    assert expensive == [1_000, 1_000]
+
+
+def test_primary_variant_is_what_agents_see():
+    pool = make_pool(
+        {"type": "UniswapV2Ensemble", "variants": VARIANTS, "primary_variant": 2}
+    )
+    assert pool.tokens_info == {"USDT": 2_000, "DAI": 3_000}
+    assert pool.amm_agent.fee == 0.003
+    pool.amm_agent.write_idle_metrics(3)
+    assert len(pool.metrics["variants"]["1"]["k"]) == 4
+    assert len(pool.metrics["variants"]["1"]["profit_from_fees"]["DAI"]) == 4
+
+
+def test_check_ensemble_settings():
+    pool_settings = {"tokens": [{"name": "USDT"}, {"name": "DAI"}]}
+    amm_settings = {"type": "UniswapV2Ensemble"}
+    with pytest.raises(ValueError, match="at least 1 variant is required"):
+        check_amm_settings(amm_settings, pool_settings)
+    amm_settings["variants"] = [{"fee": 0.001}]
+    amm_settings["primary_variant"] = 1
+    with pytest.raises(ValueError, match="'primary_variant' has to be in"):
+        check_amm_settings(amm_settings, pool_settings)
+    amm_settings["primary_variant"] = 0
+    amm_settings["variants"].append({"fee": 0.01, "start_quantities": {"USDT": 1}})
+    with pytest.raises(ValueError, match="start quantities have to cover"):
+        check_amm_settings(amm_settings, pool_settings)
+    amm_settings["variants"][1]["start_quantities"]["DAI"] = 1
+    check_amm_settings(amm_settings, pool_settings)
@@ -1,3 +1,7 @@
+import os
+import subprocess
+import sys
+
 import pytest
 
 from trade_simulator.utils.utils import (
@@ -87,3 +91,20 @@ def test_check_pool_settings():
     ):
         check_pools_settings(pools_settings)
     pools_settings["pools"][0]["step_to_start_simulation"] = 5
+
+
+def test_simulation_import_does_not_load_plotting_stack():
+    code = (
+        "import sys\n"
+        "import trade_simulator.simulation.simulation\n"
+        "import trade_simulator.sweep.sweep\n"
+        "print(sorted({'matplotlib', 'tqdm', 'pandas'} & set(sys.modules)))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    ).stdout
+    assert output.strip() == "[]"